@@ -0,0 +1,238 @@
+"""
+Motor de agregación de ventas en una sola pasada
+
+Las métricas no recorren los datos por su cuenta: declaran qué mapas
+intermedios (acumuladores) necesitan y el motor actualiza todos esos mapas
+en un único recorrido. Varias métricas que usan el mismo mapa (por ejemplo,
+ingresos por producto) lo comparten en lugar de recalcularlo.
+
+Para añadir una métrica nueva basta con registrar sus acumuladores (si no
+existen ya) y una función que calcule el resultado a partir de los mapas:
+
+    registrar_acumulador('cantidad_por_mes', lambda v: ..., lambda v: v['cantidad'], int)
+    registrar_metrica('unidades_por_mes', ['cantidad_por_mes'], lambda mapas, opciones: ...)
+"""
+
+from collections import defaultdict
+
+from fechas import formatear_mes
+from top_k import top_k
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+class Acumulador:
+    """Mapa clave -> suma que se actualiza con cada venta"""
+
+    def __init__(self, nombre, clave, valor, tipo=float):
+        """
+        Args:
+            nombre (str): Nombre del mapa intermedio
+            clave (callable): Función venta -> clave de agrupación
+            valor (callable): Función venta -> valor a sumar
+            tipo (type): Tipo del valor acumulado (int o float)
+        """
+        self.nombre = nombre
+        self.clave = clave
+        self.valor = valor
+        self.tipo = tipo
+
+    def nuevo_mapa(self):
+        return defaultdict(self.tipo)
+
+
+class Metrica:
+    """Resultado calculado a partir de uno o varios acumuladores"""
+
+    def __init__(self, nombre, requiere, finalizar):
+        """
+        Args:
+            nombre (str): Nombre de la métrica
+            requiere (list): Nombres de los acumuladores que necesita
+            finalizar (callable): Función (mapas, opciones) -> resultado
+        """
+        self.nombre = nombre
+        self.requiere = list(requiere)
+        self.finalizar = finalizar
+
+
+# Registros globales de acumuladores y métricas disponibles
+ACUMULADORES = {}
+METRICAS = {}
+
+
+def registrar_acumulador(nombre, clave, valor, tipo=float):
+    """Registra un mapa intermedio que pueden compartir varias métricas"""
+    ACUMULADORES[nombre] = Acumulador(nombre, clave, valor, tipo)
+    return ACUMULADORES[nombre]
+
+
+def registrar_metrica(nombre, requiere, finalizar):
+    """Registra una métrica calculada a partir de acumuladores ya registrados"""
+    desconocidos = [acumulador for acumulador in requiere if acumulador not in ACUMULADORES]
+    if desconocidos:
+        raise ValueError(f"Acumuladores no registrados: {', '.join(desconocidos)}")
+    METRICAS[nombre] = Metrica(nombre, requiere, finalizar)
+    return METRICAS[nombre]
+
+
+class MotorAgregacion:
+    """
+    Calcula varias métricas recorriendo las ventas una sola vez.
+
+    Ejemplo:
+        motor = MotorAgregacion(['ventas_por_mes', 'top_productos'], top_n=5)
+        motor.procesar(iterar_ventas('ventas.csv'))
+        resultados = motor.resultados()
+    """
+
+    def __init__(self, metricas=None, **opciones):
+        """
+        Args:
+            metricas (list, optional): Métricas a calcular. Si es None, todas las registradas
+            **opciones: Parámetros para las métricas (por ejemplo, top_n)
+        """
+        nombres = list(METRICAS) if metricas is None else list(metricas)
+        desconocidas = [nombre for nombre in nombres if nombre not in METRICAS]
+        if desconocidas:
+            raise ValueError(f"Métricas no registradas: {', '.join(desconocidas)}")
+        self.metricas = [METRICAS[nombre] for nombre in nombres]
+        self.opciones = opciones
+        # Cada acumulador aparece una sola vez aunque lo pidan varias métricas
+        requeridos = dict.fromkeys(
+            acumulador for metrica in self.metricas for acumulador in metrica.requiere
+        )
+        self.acumuladores = [ACUMULADORES[nombre] for nombre in requeridos]
+        self.mapas = {acumulador.nombre: acumulador.nuevo_mapa() for acumulador in self.acumuladores}
+
+    def procesar(self, ventas):
+        """
+        Actualiza todos los acumuladores en una sola pasada.
+
+        Args:
+            ventas (iterable): Ventas (lista o flujo); puede llamarse varias veces
+        """
+        actualizaciones = [
+            (self.mapas[acumulador.nombre], acumulador.clave, acumulador.valor)
+            for acumulador in self.acumuladores
+        ]
+        for venta in ventas:
+            for mapa, clave, valor in actualizaciones:
+                mapa[clave(venta)] += valor(venta)
+        return self
+
+    def combinar(self, mapas):
+        """
+        Suma en este motor los mapas parciales de otro motor con las mismas
+        métricas (por ejemplo, el resultado de un proceso de trabajo).
+
+        Args:
+            mapas (dict): Nombre de acumulador -> mapa parcial
+        """
+        for nombre, parcial in mapas.items():
+            destino = self.mapas[nombre]
+            for clave, valor in parcial.items():
+                destino[clave] += valor
+        return self
+
+    def exportar_mapas(self):
+        """Mapas intermedios como diccionarios normales (serializables con pickle)"""
+        return {nombre: dict(mapa) for nombre, mapa in self.mapas.items()}
+
+    def resultados(self):
+        """
+        Returns:
+            dict: Nombre de métrica -> resultado
+        """
+        return {
+            metrica.nombre: metrica.finalizar(self.mapas, self.opciones)
+            for metrica in self.metricas
+        }
+
+
+def agregar(ventas, metricas=None, **opciones):
+    """
+    Atajo: calcula las métricas indicadas sobre las ventas en una sola pasada.
+
+    Returns:
+        dict: Nombre de métrica -> resultado
+    """
+    return MotorAgregacion(metricas, **opciones).procesar(ventas).resultados()
+
+
+# ============================================================================
+# ACUMULADORES Y MÉTRICAS PREDEFINIDOS
+# ============================================================================
+
+def a_moneda(centavos):
+    """Convierte un importe en centavos enteros a unidades monetarias"""
+    return centavos / 100
+
+
+def _maximo(mapa, convertir=None):
+    if mapa:
+        clave, valor = max(mapa.items(), key=lambda x: x[1])
+        return clave, convertir(valor) if convertir else valor
+    return None, 0
+
+
+def _top(mapa, top_n):
+    # Los top N por ingresos con un montículo, sin ordenar el mapa completo
+    return [(clave, a_moneda(centavos)) for clave, centavos in top_k(mapa, top_n)]
+
+
+# Las claves de fecha se agrupan sin formatear (clave entera de mes, objeto
+# fecha); el texto 'YYYY-MM' / 'YYYY-MM-DD' se genera una vez por grupo al final
+#
+# Los ingresos se acumulan en centavos enteros: la suma es exacta e
+# independiente del orden, de modo que los mapas parciales de varios procesos
+# se combinan sin diferencias de redondeo. Se convierten a moneda al final.
+registrar_acumulador('ingresos_por_mes', lambda v: v['mes'], lambda v: v['total_centavos'], int)
+registrar_acumulador('ingresos_por_dia', lambda v: v['fecha'], lambda v: v['total_centavos'], int)
+registrar_acumulador('ingresos_por_dia_semana', lambda v: v['fecha'].weekday(), lambda v: v['total_centavos'], int)
+registrar_acumulador('cantidad_por_producto', lambda v: v['producto'], lambda v: v['cantidad'], int)
+registrar_acumulador('ingresos_por_producto', lambda v: v['producto'], lambda v: v['total_centavos'], int)
+registrar_acumulador('ingresos_totales', lambda v: None, lambda v: v['total_centavos'], int)
+registrar_acumulador('numero_ventas', lambda v: None, lambda v: 1, int)
+
+registrar_metrica(
+    'ventas_por_mes', ['ingresos_por_mes'],
+    lambda mapas, opciones: {
+        formatear_mes(mes): a_moneda(total) for mes, total in sorted(mapas['ingresos_por_mes'].items())
+    },
+)
+registrar_metrica(
+    'ventas_por_dia', ['ingresos_por_dia'],
+    lambda mapas, opciones: {
+        dia.strftime('%Y-%m-%d'): a_moneda(total) for dia, total in sorted(mapas['ingresos_por_dia'].items())
+    },
+)
+registrar_metrica(
+    'ventas_por_dia_semana', ['ingresos_por_dia_semana'],
+    lambda mapas, opciones: {
+        DIAS_SEMANA[dia]: a_moneda(total) for dia, total in sorted(mapas['ingresos_por_dia_semana'].items())
+    },
+)
+registrar_metrica(
+    'producto_mas_vendido', ['cantidad_por_producto'],
+    lambda mapas, opciones: _maximo(mapas['cantidad_por_producto']),
+)
+registrar_metrica(
+    'producto_mayor_ingresos', ['ingresos_por_producto'],
+    lambda mapas, opciones: _maximo(mapas['ingresos_por_producto'], a_moneda),
+)
+registrar_metrica(
+    'top_productos', ['ingresos_por_producto'],
+    lambda mapas, opciones: _top(mapas['ingresos_por_producto'], opciones.get('top_n', 5)),
+)
+registrar_metrica(
+    'numero_ventas', ['numero_ventas'],
+    lambda mapas, opciones: mapas['numero_ventas'].get(None, 0),
+)
+registrar_metrica(
+    'ticket_promedio', ['ingresos_totales', 'numero_ventas'],
+    lambda mapas, opciones: (
+        a_moneda(mapas['ingresos_totales'][None]) / mapas['numero_ventas'][None]
+        if mapas['numero_ventas'].get(None) else 0.0
+    ),
+)
@@ -3,45 +3,114 @@ Script de análisis de ventas
 Analiza datos de ventas desde un archivo CSV y genera gráficos
 """
 
+import argparse
 import csv
-from datetime import datetime
-from collections import defaultdict
-import matplotlib.pyplot as plt
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+# API orientada a objetos de matplotlib: sin pyplot no hay estado global ni
+# interfaz gráfica, y cada Figure se guarda con el backend Agg (o SVG)
+from matplotlib.figure import Figure
+
+from agregacion import MotorAgregacion, a_moneda, agregar
+from fechas import clave_mes, parsear_fecha
+from instrumentacion import INACTIVA, PERFILES, Instrumentacion
+from top_k import SpaceSaving
 
 # ============================================================================
 # 1. CARGAR DATOS DEL CSV
 # ============================================================================
 
-def cargar_datos(archivo_csv='ventas.csv'):
+# Columnas del CSV en el orden en que las recibe convertir_venta
+COLUMNAS = ('fecha', 'producto', 'cantidad', 'precio')
+
+
+def convertir_venta(fecha, producto, cantidad, precio):
     """
-    Carga los datos de ventas desde un archivo CSV.
+    Convierte los campos de texto de una fila del CSV en una venta.
+    
+    Returns:
+        dict: Venta con fecha, mes (clave entera AAAAMM), producto, cantidad,
+            precio, total y total_centavos
+    """
+    cantidad = int(cantidad)
+    precio = float(precio)
+    return {
+        'fecha': parsear_fecha(fecha),
+        'mes': clave_mes(fecha),
+        'producto': producto,
+        'cantidad': cantidad,
+        'precio': precio,
+        'total': cantidad * precio,
+        # Importe exacto en centavos: las sumas enteras no dependen del orden,
+        # así que el análisis en serie y en paralelo dan el mismo resultado.
+        # Se redondea el total de la línea una sola vez (no el precio): con
+        # precios de fracciones de centavo, redondear el precio y multiplicar
+        # desviaría el total hasta medio centavo por unidad
+        'total_centavos': round(cantidad * precio * 100)
+    }
+
+
+def indices_columnas(encabezado):
+    """Posición de cada columna de COLUMNAS en la fila de encabezado del CSV"""
+    return [encabezado.index(columna) for columna in COLUMNAS]
+
+
+def ventas_desde_filas(filas, columnas):
+    """
+    Convierte filas ya separadas por csv.reader en ventas.
     
     Args:
-        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        filas (iterable): Listas de campos de texto
+        columnas (list): Resultado de indices_columnas
         
-    Returns:
-        list: Lista de diccionarios con los datos de ventas
+    Yields:
+        dict: Una venta por fila (ver convertir_venta)
+    """
+    i_fecha, i_producto, i_cantidad, i_precio = columnas
+    for fila in filas:
+        yield convertir_venta(fila[i_fecha], fila[i_producto], fila[i_cantidad], fila[i_precio])
+
+
+def iterar_ventas(archivo_csv='ventas.csv'):
     """
-    ventas = []
+    Recorre las ventas del CSV fila a fila sin cargarlas en memoria.
     
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        
+    Yields:
+        dict: Una venta (ver convertir_venta)
+    """
     try:
-        with open(archivo_csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                venta = {
-                    'fecha': datetime.strptime(row['fecha'], '%Y-%m-%d'),
-                    'producto': row['producto'],
-                    'cantidad': int(row['cantidad']),
-                    'precio': float(row['precio']),
-                    'total': int(row['cantidad']) * float(row['precio'])
-                }
-                ventas.append(venta)
+        with open(archivo_csv, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            encabezado = next(reader, None)
+            if encabezado is not None:
+                yield from ventas_desde_filas(reader, indices_columnas(encabezado))
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo {archivo_csv}")
     except Exception as e:
         print(f"Error al cargar datos: {e}")
+
+
+def cargar_datos(archivo_csv='ventas.csv'):
+    """
+    Carga los datos de ventas desde un archivo CSV.
+    
+    Para archivos grandes conviene usar iterar_ventas, que no mantiene
+    todas las filas en memoria.
     
-    return ventas
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        
+    Returns:
+        list: Lista de diccionarios con los datos de ventas
+    """
+    return list(iterar_ventas(archivo_csv))
 
 
 # ============================================================================
@@ -53,19 +122,12 @@ def calcular_ventas_por_mes(ventas):
     Calcula el total de ventas agrupadas por mes.
     
     Args:
-        ventas (list): Lista de diccionarios con datos de ventas
+        ventas (iterable): Ventas (lista o flujo de iterar_ventas); se recorre una sola vez
         
     Returns:
         dict: Diccionario con claves en formato 'YYYY-MM' y valores de total de ventas
     """
-    ventas_por_mes = defaultdict(float)
-    
-    for venta in ventas:
-        mes_clave = venta['fecha'].strftime('%Y-%m')
-        ventas_por_mes[mes_clave] += venta['total']
-    
-    # Convertir a diccionario normal y ordenar por mes
-    return dict(sorted(ventas_por_mes.items()))
+    return agregar(ventas, ['ventas_por_mes'])['ventas_por_mes']
 
 
 # ============================================================================
@@ -77,20 +139,12 @@ def producto_mas_vendido(ventas):
     Determina el producto con mayor cantidad de unidades vendidas.
     
     Args:
-        ventas (list): Lista de diccionarios con datos de ventas
+        ventas (iterable): Ventas (lista o flujo de iterar_ventas); se recorre una sola vez
         
     Returns:
         tuple: (nombre_producto, cantidad_total)
     """
-    cantidad_por_producto = defaultdict(int)
-    
-    for venta in ventas:
-        cantidad_por_producto[venta['producto']] += venta['cantidad']
-    
-    if cantidad_por_producto:
-        producto_max = max(cantidad_por_producto.items(), key=lambda x: x[1])
-        return producto_max
-    return None, 0
+    return agregar(ventas, ['producto_mas_vendido'])['producto_mas_vendido']
 
 
 def producto_mayor_ingresos(ventas):
@@ -98,151 +152,427 @@ def producto_mayor_ingresos(ventas):
     Determina el producto que genera mayores ingresos.
     
     Args:
-        ventas (list): Lista de diccionarios con datos de ventas
+        ventas (iterable): Ventas (lista o flujo de iterar_ventas); se recorre una sola vez
         
     Returns:
         tuple: (nombre_producto, ingresos_totales)
     """
-    ingresos_por_producto = defaultdict(float)
-    
-    for venta in ventas:
-        ingresos_por_producto[venta['producto']] += venta['total']
-    
-    if ingresos_por_producto:
-        producto_max = max(ingresos_por_producto.items(), key=lambda x: x[1])
-        return producto_max
-    return None, 0
+    return agregar(ventas, ['producto_mayor_ingresos'])['producto_mayor_ingresos']
 
 
 # ============================================================================
 # 4. GRAFICAR VENTAS POR MES
 # ============================================================================
 
-def graficar_ventas_por_mes(ventas_por_mes):
+# Formatos de salida admitidos para los gráficos
+FORMATOS_GRAFICO = ('png', 'svg')
+
+
+def _figura_ventas_por_mes(ventas_por_mes):
+    meses = list(ventas_por_mes.keys())
+    valores = list(ventas_por_mes.values())
+    
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.bar(meses, valores, color='steelblue', edgecolor='black')
+    ax.set_title('Ventas Totales por Mes', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Mes (YYYY-MM)', fontsize=12)
+    ax.set_ylabel('Ventas Totales ($)', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_horizontalalignment('right')
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    fig.tight_layout()
+    return fig
+
+
+def graficar_ventas_por_mes(ventas_por_mes, dpi=300, formato='png', directorio=''):
     """
     Genera un gráfico de barras con las ventas totales por mes.
     
     Args:
         ventas_por_mes (dict): Diccionario con ventas agrupadas por mes
+        dpi (int): Resolución de la imagen (solo afecta a formatos raster)
+        formato (str): 'png' o 'svg'
+        directorio (str): Carpeta de salida (default: carpeta actual)
+        
+    Returns:
+        str: Ruta del gráfico guardado, o None si no hay datos
     """
     if not ventas_por_mes:
         print("   ⚠ No hay datos para graficar")
-        return
-    
-    meses = list(ventas_por_mes.keys())
-    valores = list(ventas_por_mes.values())
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(meses, valores, color='steelblue', edgecolor='black')
-    plt.title('Ventas Totales por Mes', fontsize=16, fontweight='bold')
-    plt.xlabel('Mes (YYYY-MM)', fontsize=12)
-    plt.ylabel('Ventas Totales ($)', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y', alpha=0.3, linestyle='--')
-    plt.tight_layout()
+        return None
     
     # Guardar el gráfico
-    plt.savefig('ventas_por_mes.png', dpi=300, bbox_inches='tight')
-    print("   ✓ Gráfico guardado: ventas_por_mes.png")
-    plt.close()
+    ruta = _guardar_grafico('ventas_por_mes', ventas_por_mes, dpi, formato, directorio)
+    print(f"   ✓ Gráfico guardado: {ruta}")
+    return ruta
 
 
 # ============================================================================
 # 5. GRAFICAR TOP 5 PRODUCTOS POR INGRESOS
 # ============================================================================
 
-def calcular_top_productos(ventas, top_n=5):
+def calcular_top_productos(ventas, top_n=5, capacidad=None):
     """
     Calcula los top N productos por ingresos totales.
     
     Args:
-        ventas (list): Lista de diccionarios con datos de ventas
+        ventas (iterable): Ventas (lista o flujo de iterar_ventas); se recorre una sola vez
         top_n (int): Número de productos a retornar (default: 5)
+        capacidad (int, optional): Si se indica, el resultado es aproximado y
+            solo se guardan en memoria `capacidad` productos (Space-Saving).
+            Los ingresos son cotas superiores de los reales.
         
     Returns:
         list: Lista de tuplas (producto, ingresos) ordenadas por ingresos descendente
     """
-    ingresos_por_producto = defaultdict(float)
-    
+    if capacidad is None:
+        return agregar(ventas, ['top_productos'], top_n=top_n)['top_productos']
+    resumen = SpaceSaving(max(capacidad, top_n))
     for venta in ventas:
-        ingresos_por_producto[venta['producto']] += venta['total']
+        resumen.agregar(venta['producto'], venta['total_centavos'])
+    return [(producto, a_moneda(centavos)) for producto, centavos, _ in resumen.top(top_n)]
+
+
+def _figura_top_productos(top_productos):
+    productos = [p[0] for p in top_productos]
+    ingresos = [p[1] for p in top_productos]
     
-    # Ordenar por ingresos descendente y tomar los top N
-    productos_ordenados = sorted(ingresos_por_producto.items(), key=lambda x: x[1], reverse=True)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.barh(productos, ingresos, color='coral', edgecolor='black')
+    ax.set_title(f'Top {len(top_productos)} Productos por Ingresos', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Ingresos Totales ($)', fontsize=12)
+    ax.set_ylabel('Producto', fontsize=12)
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    
+    # Agregar valores en las barras
+    for i, v in enumerate(ingresos):
+        ax.text(v, i, f' ${v:,.2f}', va='center', fontweight='bold')
     
-    return productos_ordenados[:top_n]
+    fig.tight_layout()
+    return fig
 
 
-def graficar_top_productos(top_productos):
+def graficar_top_productos(top_productos, dpi=300, formato='png', directorio=''):
     """
     Genera un gráfico de barras horizontales con los top 5 productos por ingresos.
     
     Args:
         top_productos (list): Lista de tuplas (producto, ingresos)
+        dpi (int): Resolución de la imagen (solo afecta a formatos raster)
+        formato (str): 'png' o 'svg'
+        directorio (str): Carpeta de salida (default: carpeta actual)
+        
+    Returns:
+        str: Ruta del gráfico guardado, o None si no hay datos
     """
     if not top_productos:
         print("   ⚠ No hay datos para graficar")
-        return
-    
-    productos = [p[0] for p in top_productos]
-    ingresos = [p[1] for p in top_productos]
-    
-    plt.figure(figsize=(10, 6))
-    plt.barh(productos, ingresos, color='coral', edgecolor='black')
-    plt.title('Top 5 Productos por Ingresos', fontsize=16, fontweight='bold')
-    plt.xlabel('Ingresos Totales ($)', fontsize=12)
-    plt.ylabel('Producto', fontsize=12)
-    plt.grid(axis='x', alpha=0.3, linestyle='--')
-    
-    # Agregar valores en las barras
-    for i, v in enumerate(ingresos):
-        plt.text(v, i, f' ${v:,.2f}', va='center', fontweight='bold')
-    
-    plt.tight_layout()
+        return None
     
     # Guardar el gráfico
-    plt.savefig('top_productos.png', dpi=300, bbox_inches='tight')
-    print("   ✓ Gráfico guardado: top_productos.png")
-    plt.close()
+    ruta = _guardar_grafico('top_productos', top_productos, dpi, formato, directorio)
+    print(f"   ✓ Gráfico guardado: {ruta}")
+    return ruta
+
+
+# ============================================================================
+# 6. GENERAR TODOS LOS GRÁFICOS
+# ============================================================================
+
+# Cada gráfico se construye a partir de sus datos con una de estas funciones
+FIGURAS = {
+    'ventas_por_mes': _figura_ventas_por_mes,
+    'top_productos': _figura_top_productos,
+}
+
+# Huella de los datos y parámetros de cada gráfico ya generado
+ARCHIVO_CACHE_GRAFICOS = '.graficos_cache.json'
+
+
+def _guardar_grafico(nombre, datos, dpi, formato, directorio):
+    """Dibuja y guarda un gráfico; se puede ejecutar en un proceso de trabajo"""
+    ruta = os.path.join(directorio, f'{nombre}.{formato}')
+    FIGURAS[nombre](datos).savefig(ruta, dpi=dpi, format=formato, bbox_inches='tight')
+    return ruta
+
+
+def _huella_grafico(nombre, datos, dpi, formato):
+    contenido = json.dumps([nombre, datos, dpi, formato], sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _leer_cache_graficos(directorio):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_CACHE_GRAFICOS), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def generar_graficos(ventas_por_mes, top_productos, dpi=300, formato='png', directorio='',
+                     en_paralelo=True, forzar=False):
+    """
+    Genera todos los gráficos del informe, en procesos separados y omitiendo
+    los que ya existen con los mismos datos y parámetros.
+    
+    Args:
+        ventas_por_mes (dict): Datos del gráfico de ventas por mes
+        top_productos (list | None): Datos del gráfico de top productos (None: no generarlo)
+        dpi (int): Resolución de las imágenes
+        formato (str): 'png' o 'svg'
+        directorio (str): Carpeta de salida (default: carpeta actual)
+        en_paralelo (bool): Dibujar cada gráfico en su propio proceso
+        forzar (bool): Regenerar aunque los datos no hayan cambiado
+        
+    Returns:
+        list: Rutas de los gráficos generados en esta ejecución
+    """
+    if formato not in FORMATOS_GRAFICO:
+        raise ValueError(f"Formato de gráfico no admitido: {formato}")
+    
+    cache = _leer_cache_graficos(directorio)
+    pendientes = []
+    for nombre, datos in (('ventas_por_mes', ventas_por_mes), ('top_productos', top_productos)):
+        if datos is None:
+            # Gráfico que no forma parte del informe pedido
+            continue
+        if not datos:
+            print("   ⚠ No hay datos para graficar")
+            continue
+        ruta = os.path.join(directorio, f'{nombre}.{formato}')
+        huella = _huella_grafico(nombre, datos, dpi, formato)
+        if not forzar and cache.get(ruta) == huella and os.path.exists(ruta):
+            print(f"   ✓ Gráfico sin cambios: {ruta}")
+            continue
+        pendientes.append((nombre, datos, huella))
+    if not pendientes:
+        return []
+    
+    if en_paralelo and len(pendientes) > 1:
+        with ProcessPoolExecutor(max_workers=len(pendientes)) as pool:
+            futuros = [
+                pool.submit(_guardar_grafico, nombre, datos, dpi, formato, directorio)
+                for nombre, datos, _ in pendientes
+            ]
+            rutas = [futuro.result() for futuro in futuros]
+    else:
+        rutas = [
+            _guardar_grafico(nombre, datos, dpi, formato, directorio)
+            for nombre, datos, _ in pendientes
+        ]
+    
+    for (_, _, huella), ruta in zip(pendientes, rutas):
+        cache[ruta] = huella
+        print(f"   ✓ Gráfico guardado: {ruta}")
+    with open(os.path.join(directorio, ARCHIVO_CACHE_GRAFICOS), 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    return rutas
 
 
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
 
-def main():
+# Métricas que calcula el informe de main()
+METRICAS_INFORME = [
+    'numero_ventas', 'ventas_por_mes', 'producto_mas_vendido',
+    'producto_mayor_ingresos', 'top_productos', 'ticket_promedio',
+]
+# Métricas del informe mensual (--informe mensual): con --cache solo se
+# leen las columnas fecha, cantidad y precio
+METRICAS_MENSUALES = ['numero_ventas', 'ventas_por_mes']
+INFORMES = {'completo': METRICAS_INFORME, 'mensual': METRICAS_MENSUALES}
+
+
+def calcular_resultados(archivo_csv='ventas.csv', columnar=False, top_n=5, procesos=None,
+                        incremental=False, cache=False, desde=None, hasta=None, productos=None,
+                        metricas=None, instrumentacion=INACTIVA):
+    """
+    Calcula las métricas del informe sobre un archivo CSV.
+    
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        columnar (bool): Usar la tabla columnar de NumPy (tabla_ventas) en lugar
+            del motor en streaming
+        top_n (int): Número de productos del ranking
+        procesos (int, optional): Si es mayor que 1, repartir el archivo (o los
+            archivos que coincidan con el patrón) entre varios procesos
+        incremental (bool): Reutilizar los agregados guardados y parsear solo
+            las filas añadidas desde la última ejecución
+        cache (bool): Modo columnar leyendo la caché binaria <archivo>.columnas
+            (se crea o se regenera si el CSV cambió)
+        desde, hasta (str, optional): Analizar solo las ventas entre estas
+            fechas 'YYYY-MM-DD' (incluidas), saltando los meses que no aplican
+        productos (iterable, optional): Analizar solo estos productos
+        metricas (list, optional): Métricas a calcular (default:
+            METRICAS_INFORME). Con cache=True solo se cargan las columnas que
+            necesitan (ver cache_columnar.COLUMNAS_POR_METRICA)
+        instrumentacion (Instrumentacion, optional): Registro de tiempos por
+            etapa ('cargar' y 'agregar' en modo columnar; 'cargar_y_agregar'
+            en los modos en flujo, donde ambas cosas ocurren en la misma pasada)
+        
+    Returns:
+        dict: Nombre de métrica -> resultado (ver METRICAS_INFORME)
+    """
+    metricas = list(METRICAS_INFORME if metricas is None else metricas)
+    if cache or columnar:
+        # NumPy solo es necesario en este modo
+        import tabla_ventas
+        with instrumentacion.etapa('cargar', modo='cache' if cache else 'columnar') as etapa:
+            if cache:
+                import cache_columnar
+                columnas = cache_columnar.columnas_para(metricas)
+                tabla = cache_columnar.cargar_tabla_cache(archivo_csv, columnas)
+                etapa['columnas'] = list(columnas)
+            else:
+                tabla = tabla_ventas.cargar_tabla(archivo_csv)
+            etapa['filas'] = len(tabla)
+        with instrumentacion.etapa('agregar', filas=len(tabla)):
+            return tabla_ventas.analizar(tabla, top_n=top_n, metricas=metricas)
+    
+    if desde or hasta or productos:
+        modo = 'consulta'
+    elif incremental:
+        modo = 'incremental'
+    elif procesos and procesos > 1:
+        modo = 'paralelo'
+    else:
+        modo = 'flujo'
+    with instrumentacion.etapa('cargar_y_agregar', modo=modo) as etapa:
+        if modo == 'consulta':
+            import consultas
+            resultados = consultas.consultar(archivo_csv, desde, hasta, productos,
+                                             metricas, top_n=top_n)
+        elif modo == 'incremental':
+            import incremental as modulo_incremental
+            resultados, _ = modulo_incremental.analizar_incremental(archivo_csv, metricas, top_n=top_n)
+        elif modo == 'paralelo':
+            import paralelo
+            resultados = paralelo.analizar_en_paralelo(archivo_csv, procesos=procesos,
+                                                      metricas=metricas, top_n=top_n)
+        else:
+            # Una sola pasada en streaming: la memoria no depende del tamaño del CSV
+            motor = MotorAgregacion(metricas, top_n=top_n)
+            resultados = motor.procesar(iterar_ventas(archivo_csv)).resultados()
+        etapa['filas'] = resultados['numero_ventas']
+    return resultados
+
+
+def fecha_argumento(texto):
+    """Valida una fecha 'YYYY-MM-DD' de la línea de comandos (los filtros la comparan como texto)"""
+    try:
+        if re.fullmatch(r'\d{4}-\d{2}-\d{2}', texto) is None:
+            raise ValueError
+        date.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: {texto!r} (se esperaba YYYY-MM-DD)") from None
+    return texto
+
+
+def crear_parser():
+    """Argumentos de línea de comandos del análisis"""
+    parser = argparse.ArgumentParser(description='Análisis de ventas desde un archivo CSV')
+    parser.add_argument('archivo', nargs='?', default='ventas.csv',
+                        help='Archivo CSV de ventas o patrón glob de fragmentos, '
+                             'por ejemplo "ventas_*.csv" (default: ventas.csv)')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Cargar los datos en columnas de NumPy y agregar de forma vectorizada')
+    parser.add_argument('--cache', action='store_true',
+                        help='Modo columnar usando una caché binaria del CSV en <archivo>.columnas '
+                             '(se regenera si el CSV cambia)')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='Analizar en paralelo con este número de procesos')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Procesar solo las filas nuevas usando los agregados guardados '
+                             'en <archivo>.agregados.json')
+    parser.add_argument('--informe', choices=INFORMES, default='completo',
+                        help='completo (default) o mensual: solo ventas por mes; con --cache '
+                             'solo se leen las columnas fecha, cantidad y precio')
+    parser.add_argument('--desde', metavar='YYYY-MM-DD', type=fecha_argumento,
+                        help='Analizar solo ventas desde esta fecha (incluida)')
+    parser.add_argument('--hasta', metavar='YYYY-MM-DD', type=fecha_argumento,
+                        help='Analizar solo ventas hasta esta fecha (incluida)')
+    parser.add_argument('--productos', type=lambda texto: [p.strip() for p in texto.split(',')],
+                        help='Analizar solo estos productos, separados por comas '
+                             '(por ejemplo "Laptop,Monitor")')
+    parser.add_argument('--traza', metavar='JSON',
+                        help='Guardar tiempos, filas y memoria de cada etapa en este archivo '
+                             '(también con la variable de entorno ANALISIS_TRAZA)')
+    parser.add_argument('--perfil', choices=PERFILES,
+                        help='Perfilar cada etapa con cProfile o tracemalloc (requiere --traza; '
+                             'también con ANALISIS_PERFIL)')
+    parser.add_argument('--dpi', type=int, default=300,
+                        help='Resolución de los gráficos (default: 300)')
+    parser.add_argument('--formato', choices=FORMATOS_GRAFICO, default='png',
+                        help='Formato de los gráficos (default: png)')
+    parser.add_argument('--forzar-graficos', action='store_true',
+                        help='Regenerar los gráficos aunque sus datos no hayan cambiado')
+    return parser
+
+
+def main(argv=None):
     """
     Función principal que ejecuta el análisis completo de ventas.
+    
+    Args:
+        argv (list, optional): Argumentos de línea de comandos (default: sys.argv)
     """
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    if (args.desde or args.hasta or args.productos) and (
+            args.columnar or args.cache or args.incremental or args.procesos):
+        parser.error("--desde, --hasta y --productos no se pueden combinar con "
+                     "--columnar, --cache, --incremental ni --procesos")
+    try:
+        instrumentacion, ruta_traza = Instrumentacion.desde_entorno(args.traza, args.perfil)
+    except ValueError as e:
+        parser.error(str(e))
+    if instrumentacion.perfil is None and (args.perfil or os.environ.get('ANALISIS_PERFIL')):
+        parser.error("--perfil requiere --traza (o ANALISIS_TRAZA)")
+    
     print("=" * 60)
     print("ANÁLISIS DE VENTAS")
     print("=" * 60)
     
-    # 1. Cargar datos
-    print("\n1. Cargando datos del CSV...")
-    ventas = cargar_datos('ventas.csv')
-    print(f"   ✓ {len(ventas)} registros cargados")
+    # 1. Leer datos y calcular todas las métricas en una sola pasada
+    print("\n1. Leyendo datos del CSV y calculando métricas...")
+    resultados = calcular_resultados(args.archivo, columnar=args.columnar, top_n=5,
+                                     procesos=args.procesos, incremental=args.incremental,
+                                     cache=args.cache, desde=args.desde, hasta=args.hasta,
+                                     productos=args.productos, metricas=INFORMES[args.informe],
+                                     instrumentacion=instrumentacion)
+    print(f"   ✓ {resultados['numero_ventas']} registros procesados")
     
     # 2. Calcular ventas por mes
     print("\n2. Calculando ventas totales por mes...")
-    ventas_por_mes = calcular_ventas_por_mes(ventas)
-    
-    # 3. Productos destacados
-    print("\n3. Analizando productos...")
-    producto_cantidad, cantidad_total = producto_mas_vendido(ventas)
-    producto_ingresos, ingresos_total = producto_mayor_ingresos(ventas)
+    ventas_por_mes = resultados['ventas_por_mes']
     
-    print(f"   ✓ Producto más vendido: {producto_cantidad} ({cantidad_total} unidades)")
-    print(f"   ✓ Producto con mayor ingresos: {producto_ingresos} (${ingresos_total:,.2f})")
-    
-    # 4. Graficar ventas por mes
-    print("\n4. Generando gráfico de ventas por mes...")
-    graficar_ventas_por_mes(ventas_por_mes)
-    
-    # 5. Graficar top 5 productos
-    print("\n5. Generando gráfico de top 5 productos...")
-    top_productos = calcular_top_productos(ventas, top_n=5)
-    graficar_top_productos(top_productos)
+    # 3. Productos destacados (no forman parte del informe mensual)
+    if args.informe == 'completo':
+        print("\n3. Analizando productos...")
+        producto_cantidad, cantidad_total = resultados['producto_mas_vendido']
+        producto_ingresos, ingresos_total = resultados['producto_mayor_ingresos']
+        
+        print(f"   ✓ Producto más vendido: {producto_cantidad} ({cantidad_total} unidades)")
+        print(f"   ✓ Producto con mayor ingresos: {producto_ingresos} (${ingresos_total:,.2f})")
+        print(f"   ✓ Ticket promedio: ${resultados['ticket_promedio']:,.2f}")
+    
+    # 4. Graficar ventas por mes y top 5 productos (en paralelo, y solo los
+    # gráficos cuyos datos cambiaron desde la última ejecución)
+    top_productos = resultados.get('top_productos')
+    if top_productos is None:
+        print("\n4. Generando gráfico de ventas por mes...")
+    else:
+        print("\n4. Generando gráficos de ventas por mes y top 5 productos...")
+    with instrumentacion.etapa('graficos', formato=args.formato, dpi=args.dpi) as etapa:
+        etapa['generados'] = len(generar_graficos(ventas_por_mes, top_productos, dpi=args.dpi,
+                                                  formato=args.formato, forzar=args.forzar_graficos))
+    
+    if instrumentacion.guardar(ruta_traza):
+        print(f"\n   ✓ Traza guardada: {ruta_traza}")
     
     print("\n" + "=" * 60)
     print("Análisis completado")
@@ -0,0 +1,221 @@
+"""
+Benchmark de las etapas del análisis de ventas según el tamaño de los datos
+
+Genera (o reutiliza) CSV sintéticos de distintos tamaños y mide por
+separado cada etapa de analisis.main(): tiempo, filas por segundo y pico de
+memoria residente (RSS). Cada tamaño se mide en un proceso nuevo para que
+el pico de memoria no arrastre el de tamaños anteriores.
+
+Uso (desde analisis_ventas/):
+    python benchmark_ventas.py
+    python benchmark_ventas.py --tamanos 1000 1000000 100000000 --datos /tmp/bench
+    python benchmark_ventas.py --guardar-base base.json
+    python benchmark_ventas.py --comparar base.json   # código de salida 1 si hay regresiones
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+import analisis
+from generar_ventas import generar_ventas
+from instrumentacion import rss_pico_mb
+
+TAMANOS = [1_000, 10_000, 100_000, 1_000_000]
+# Por encima de este tamaño no se miden las etapas que cargan todas las
+# ventas en una lista (unos 500 bytes por venta)
+MAXIMO_EN_MEMORIA = 10_000_000
+# Las etapas más rápidas que esto se repiten y se toma el mejor tiempo
+SEGUNDOS_MINIMOS = 0.1
+REPETICIONES_MAXIMAS = 5
+# Una etapa es una regresión si tarda más que la base multiplicada por esto
+# y al menos RUIDO_SEGUNDOS más (las etapas muy cortas son ruidosas)
+TOLERANCIA = 1.25
+RUIDO_SEGUNDOS = 0.005
+VERSION_BASE = 1
+
+
+def _medir(mediciones, filas, etapa, funcion, *args, **kwargs):
+    segundos = None
+    for _ in range(REPETICIONES_MAXIMAS):
+        inicio = time.perf_counter()
+        # Los mensajes de progreso de analisis no forman parte de la tabla
+        with redirect_stdout(io.StringIO()):
+            resultado = funcion(*args, **kwargs)
+        duracion = time.perf_counter() - inicio
+        segundos = duracion if segundos is None else min(segundos, duracion)
+        if duracion >= SEGUNDOS_MINIMOS:
+            break
+    mediciones.append({
+        'filas': filas,
+        'etapa': etapa,
+        'segundos': segundos,
+        'filas_por_segundo': filas / segundos if segundos > 0 else None,
+        'rss_pico_mb': rss_pico_mb(),
+    })
+    return resultado
+
+
+def medir_tamano(archivo_csv, filas, maximo_en_memoria=MAXIMO_EN_MEMORIA):
+    """
+    Mide las etapas del análisis sobre un CSV (se ejecuta en un proceso nuevo).
+
+    Las etapas de flujo van primero: el pico de RSS es acumulado dentro del
+    proceso, así que las etapas que cargan la lista completa se miden al final.
+
+    Returns:
+        tuple: (mediciones, huella SHA-256 de los resultados del análisis)
+    """
+    mediciones = []
+    resultados = _medir(mediciones, filas, 'una_pasada', analisis.calcular_resultados, archivo_csv)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        _medir(mediciones, filas, 'columnar', analisis.calcular_resultados, archivo_csv, columnar=True)
+        import cache_columnar
+        # La conversión se hace una vez fuera de la medición: se mide la carga
+        # desde la caché ya creada
+        cache_columnar.convertir(archivo_csv)
+        _medir(mediciones, filas, 'cache_columnar', analisis.calcular_resultados, archivo_csv, cache=True)
+    with tempfile.TemporaryDirectory() as directorio:
+        _medir(mediciones, filas, 'graficos', analisis.generar_graficos,
+               resultados['ventas_por_mes'], resultados['top_productos'],
+               directorio=directorio, forzar=True)
+    if filas <= maximo_en_memoria:
+        ventas = _medir(mediciones, filas, 'cargar_datos', analisis.cargar_datos, archivo_csv)
+        for etapa in ('calcular_ventas_por_mes', 'producto_mas_vendido',
+                      'producto_mayor_ingresos', 'calcular_top_productos'):
+            _medir(mediciones, filas, etapa, getattr(analisis, etapa), ventas)
+    contenido = json.dumps(resultados, sort_keys=True, default=str)
+    return mediciones, hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def preparar_datos(directorio, filas):
+    """CSV sintético de `filas` filas (se reutiliza si ya existe en el directorio)"""
+    archivo = os.path.join(directorio, f'ventas_{filas}.csv')
+    if not os.path.exists(archivo):
+        temporal = archivo + '.tmp'
+        generar_ventas(temporal, filas, procesos=1)
+        os.replace(temporal, archivo)
+    return archivo
+
+
+def ejecutar(tamanos, directorio, maximo_en_memoria=MAXIMO_EN_MEMORIA):
+    """
+    Ejecuta el benchmark para cada tamaño.
+
+    Returns:
+        dict: Informe con las mediciones y la huella de los resultados por tamaño
+    """
+    informe = {
+        'version': VERSION_BASE,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'mediciones': [],
+        'huellas': {},
+    }
+    # 'spawn': cada tamaño empieza con un intérprete limpio y su propio pico de RSS
+    contexto = multiprocessing.get_context('spawn')
+    for filas in tamanos:
+        archivo = preparar_datos(directorio, filas)
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+            mediciones, huella = pool.submit(medir_tamano, archivo, filas, maximo_en_memoria).result()
+        informe['mediciones'].extend(mediciones)
+        informe['huellas'][str(filas)] = huella
+        for medicion in mediciones:
+            imprimir_medicion(medicion)
+    return informe
+
+
+def comparar(informe, base, tolerancia=TOLERANCIA):
+    """
+    Compara un informe con una base guardada.
+
+    Returns:
+        list: Textos que describen cada regresión (vacía si no hay)
+    """
+    tiempos_base = {(m['filas'], m['etapa']): m['segundos'] for m in base['mediciones']}
+    regresiones = []
+    for medicion in informe['mediciones']:
+        anterior = tiempos_base.get((medicion['filas'], medicion['etapa']))
+        if (anterior and medicion['segundos'] > anterior * tolerancia
+                and medicion['segundos'] - anterior > RUIDO_SEGUNDOS):
+            regresiones.append(
+                f"{medicion['etapa']} con {medicion['filas']:,} filas: "
+                f"{medicion['segundos']:.3f}s frente a {anterior:.3f}s "
+                f"(x{medicion['segundos'] / anterior:.2f})"
+            )
+    for filas, huella in informe['huellas'].items():
+        anterior = base['huellas'].get(filas)
+        if anterior and anterior != huella:
+            regresiones.append(f"Los resultados con {int(filas):,} filas no coinciden con la base")
+    return regresiones
+
+
+def imprimir_medicion(medicion):
+    filas_por_segundo = medicion['filas_por_segundo'] or 0
+    rss = medicion['rss_pico_mb']
+    print(f"{medicion['filas']:>12,} | {medicion['etapa']:<24} | {medicion['segundos']:>9.3f} | "
+          f"{filas_por_segundo:>14,.0f} | {rss if rss is not None else float('nan'):>10.1f}")
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description='Benchmark del análisis de ventas')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS,
+                        help='Número de filas de cada conjunto de datos (hasta 10^8)')
+    parser.add_argument('--datos',
+                        help='Carpeta donde se guardan y reutilizan los CSV generados '
+                             '(default: carpeta temporal)')
+    parser.add_argument('--maximo-en-memoria', type=int, default=MAXIMO_EN_MEMORIA,
+                        help='Tamaño máximo para las etapas que cargan la lista completa')
+    parser.add_argument('--guardar-base', metavar='JSON',
+                        help='Guardar el informe como base para comparaciones futuras')
+    parser.add_argument('--comparar', metavar='JSON',
+                        help='Comparar con una base guardada y salir con código 1 si hay regresiones')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='Cociente de tiempo máximo frente a la base (default: 1.25)')
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    print(f"{'Filas':>12} | {'Etapa':<24} | {'Segundos':>9} | {'Filas/s':>14} | {'RSS pico MB':>10}")
+    print("-" * 84)
+    if args.datos:
+        os.makedirs(args.datos, exist_ok=True)
+        informe = ejecutar(args.tamanos, args.datos, args.maximo_en_memoria)
+    else:
+        with tempfile.TemporaryDirectory() as directorio:
+            informe = ejecutar(args.tamanos, directorio, args.maximo_en_memoria)
+
+    if args.guardar_base:
+        with open(args.guardar_base, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2)
+        print(f"\nBase guardada: {args.guardar_base}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar(informe, base, args.tolerancia)
+        if regresiones:
+            print(f"\n⚠ {len(regresiones)} regresiones respecto a {args.comparar}:")
+            for regresion in regresiones:
+                print(f"   - {regresion}")
+            sys.exit(1)
+        print(f"\n✓ Sin regresiones respecto a {args.comparar}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Caché binaria columnar de un CSV de ventas
+
+La primera vez, el CSV se parsea con tabla_ventas.cargar_tabla y cada
+columna se guarda como un archivo .npy en la carpeta <archivo>.columnas/.
+Las siguientes cargas abren esos archivos con np.load(mmap_mode='r'): no se
+parsea texto ni se copian datos, el sistema operativo lee bajo demanda solo
+las páginas que se usan, y solo se abren las columnas pedidas.
+
+La caché guarda el mtime y el tamaño del CSV de origen; si alguno cambia,
+se regenera automáticamente.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from tabla_ventas import TablaVentas, cargar_tabla
+
+VERSION_CACHE = 1
+COLUMNAS = ('fecha', 'producto', 'cantidad', 'precio')
+# Columnas que necesita cada métrica de tabla_ventas.analizar (numero_ventas
+# solo necesita una columna cualquiera para contar las filas)
+COLUMNAS_POR_METRICA = {
+    'numero_ventas': ('cantidad',),
+    'ventas_por_mes': ('fecha', 'cantidad', 'precio'),
+    'producto_mas_vendido': ('producto', 'cantidad'),
+    'producto_mayor_ingresos': ('producto', 'cantidad', 'precio'),
+    'top_productos': ('producto', 'cantidad', 'precio'),
+    'ticket_promedio': ('cantidad', 'precio'),
+}
+
+
+def columnas_para(metricas):
+    """Columnas (en el orden de COLUMNAS) que necesitan unas métricas"""
+    desconocidas = [nombre for nombre in metricas if nombre not in COLUMNAS_POR_METRICA]
+    if desconocidas:
+        raise ValueError(f"Métricas desconocidas: {', '.join(desconocidas)}")
+    necesarias = {columna for nombre in metricas for columna in COLUMNAS_POR_METRICA[nombre]}
+    return tuple(columna for columna in COLUMNAS if columna in necesarias)
+
+
+def ruta_cache(archivo_csv):
+    """Carpeta donde se guarda la caché columnar de un CSV"""
+    return archivo_csv + '.columnas'
+
+
+def _firma(archivo_csv):
+    estado = os.stat(archivo_csv)
+    return {'mtime_ns': estado.st_mtime_ns, 'tamano': estado.st_size}
+
+
+def cache_valida(archivo_csv):
+    """True si la caché existe y corresponde al CSV en su estado actual"""
+    try:
+        with open(os.path.join(ruta_cache(archivo_csv), 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return meta.get('version') == VERSION_CACHE and meta.get('origen') == _firma(archivo_csv)
+
+
+def convertir(archivo_csv):
+    """
+    Parsea el CSV una vez y guarda sus columnas en formato .npy.
+
+    meta.json se borra al empezar y se escribe al final: una conversión
+    interrumpida deja la caché inválida en lugar de a medias.
+
+    Returns:
+        str: Carpeta de la caché
+    """
+    destino = ruta_cache(archivo_csv)
+    os.makedirs(destino, exist_ok=True)
+    meta = os.path.join(destino, 'meta.json')
+    if os.path.exists(meta):
+        os.remove(meta)
+
+    # Firma tomada antes de leer: si el CSV cambia durante la conversión,
+    # la siguiente carga lo detecta y vuelve a convertir
+    firma = _firma(archivo_csv)
+    tabla = cargar_tabla(archivo_csv)
+    for nombre in COLUMNAS:
+        temporal = os.path.join(destino, f'{nombre}.tmp.npy')
+        np.save(temporal, getattr(tabla, nombre))
+        os.replace(temporal, os.path.join(destino, f'{nombre}.npy'))
+    with open(os.path.join(destino, 'productos.json'), 'w', encoding='utf-8') as f:
+        json.dump(tabla.productos, f, ensure_ascii=False)
+    with open(meta, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_CACHE, 'origen': firma, 'filas': len(tabla)}, f)
+    return destino
+
+
+def cargar_tabla_cache(archivo_csv='ventas.csv', columnas=None):
+    """
+    Carga una TablaVentas desde la caché, convirtiendo el CSV si hace falta.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        columnas (iterable, optional): Columnas a cargar (default: todas). Las
+            demás quedan como None en la tabla
+
+    Returns:
+        TablaVentas: Columnas como arrays de solo lectura mapeados en memoria
+            (vacía si el CSV no existe)
+    """
+    columnas = COLUMNAS if columnas is None else tuple(columnas)
+    desconocidas = [nombre for nombre in columnas if nombre not in COLUMNAS]
+    if desconocidas:
+        raise ValueError(f"Columnas desconocidas: {', '.join(desconocidas)}")
+    if not os.path.exists(archivo_csv):
+        # cargar_tabla informa del error y devuelve una tabla vacía
+        return cargar_tabla(archivo_csv)
+    if not cache_valida(archivo_csv):
+        convertir(archivo_csv)
+
+    destino = ruta_cache(archivo_csv)
+    arrays = {
+        nombre: np.load(os.path.join(destino, f'{nombre}.npy'), mmap_mode='r') if nombre in columnas else None
+        for nombre in COLUMNAS
+    }
+    productos = []
+    if 'producto' in columnas:
+        with open(os.path.join(destino, 'productos.json'), 'r', encoding='utf-8') as f:
+            productos = json.load(f)
+    return TablaVentas(productos=productos, **arrays)
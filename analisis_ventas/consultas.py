@@ -0,0 +1,205 @@
+"""
+Consultas sobre ventas con filtros de fechas y productos
+
+Como generar_ventas escribe el CSV ordenado por fecha, un índice disperso
+con el rango de bytes de cada mes permite saltar directamente a los meses
+pedidos sin leer el resto del archivo. Dentro de esos meses, los filtros de
+fecha y producto se aplican sobre los campos de texto, antes de convertir
+cantidades, precios y fechas: las filas descartadas no se llegan a parsear.
+
+El índice se guarda en <archivo>.indice.json y se regenera si cambian la
+fecha de modificación o el tamaño del CSV. Si el archivo no está ordenado
+por fecha, las consultas recorren el archivo completo (con los mismos
+filtros).
+
+Ejemplo:
+    consultar('ventas.csv', desde='2024-07-01', hasta='2024-09-30',
+              productos={'Laptop', 'Monitor'})
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import date, datetime
+
+from agregacion import MotorAgregacion
+from analisis import METRICAS_INFORME, convertir_venta, indices_columnas
+from fechas import clave_mes
+from paralelo import leer_encabezado, lineas_en_rango
+
+VERSION_INDICE = 1
+
+
+def ruta_indice(archivo_csv):
+    """Archivo donde se guarda el índice de meses de un CSV"""
+    return archivo_csv + '.indice.json'
+
+
+def _firma(archivo_csv):
+    estado = os.stat(archivo_csv)
+    return {'mtime_ns': estado.st_mtime_ns, 'tamano': estado.st_size}
+
+
+def construir_indice(archivo_csv):
+    """
+    Recorre el CSV una vez (sin parsear las filas) y anota dónde empieza y
+    termina cada mes.
+
+    Returns:
+        dict: {'ordenado': bool, 'meses': [[clave AAAAMM, inicio, fin], ...]}
+            (sin meses si el archivo está vacío)
+    """
+    campos, inicio_datos = leer_encabezado(archivo_csv)
+    if not campos:
+        return {'ordenado': True, 'meses': []}
+    i_fecha = indices_columnas(campos)[0]
+    meses = []
+    ordenado = True
+    with open(archivo_csv, 'rb') as f:
+        f.seek(inicio_datos)
+        posicion = inicio_datos
+        for linea in f:
+            if i_fecha == 0:
+                # Caso habitual: la fecha ISO son los 10 primeros bytes
+                texto = linea[:10].decode('utf-8')
+            else:
+                texto = next(csv.reader([linea.decode('utf-8')]), [''] * (i_fecha + 1))[i_fecha]
+            if texto.strip():
+                mes = clave_mes(texto)
+                if not meses or meses[-1][0] != mes:
+                    if meses and mes < meses[-1][0]:
+                        ordenado = False
+                    meses.append([mes, posicion, posicion])
+            posicion += len(linea)
+            if meses:
+                meses[-1][2] = posicion
+    return {'ordenado': ordenado, 'meses': meses}
+
+
+def cargar_indice(archivo_csv):
+    """
+    Índice de meses del CSV, construyéndolo (y guardándolo) si no existe o
+    si el CSV cambió desde que se creó.
+    """
+    firma = _firma(archivo_csv)
+    try:
+        with open(ruta_indice(archivo_csv), 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+        if indice.get('version') == VERSION_INDICE and indice.get('origen') == firma:
+            return indice
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    indice = dict(construir_indice(archivo_csv), version=VERSION_INDICE, origen=firma)
+    destino = ruta_indice(archivo_csv)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, separators=(',', ':'))
+        os.replace(temporal, destino)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return indice
+
+
+def _texto_fecha(valor):
+    """Normaliza un límite de fecha (date, datetime o 'YYYY-MM-DD') a texto ISO"""
+    if valor is None:
+        return None
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+def rangos_a_leer(indice, desde=None, hasta=None):
+    """
+    Rangos de bytes que pueden contener ventas entre desde y hasta.
+
+    Args:
+        indice (dict): Resultado de cargar_indice
+        desde (str, optional): Primera fecha 'YYYY-MM-DD' (incluida)
+        hasta (str, optional): Última fecha 'YYYY-MM-DD' (incluida)
+
+    Returns:
+        list: Tuplas (inicio, fin), o None si hay que leer el archivo completo
+    """
+    if not indice['ordenado']:
+        return None
+    primero = clave_mes(desde) if desde else None
+    ultimo = clave_mes(hasta) if hasta else None
+    rangos = []
+    for mes, inicio, fin in indice['meses']:
+        if (primero is None or mes >= primero) and (ultimo is None or mes <= ultimo):
+            # Meses consecutivos forman un único rango contiguo
+            if rangos and rangos[-1][1] == inicio:
+                rangos[-1] = (rangos[-1][0], fin)
+            else:
+                rangos.append((inicio, fin))
+    return rangos
+
+
+def iterar_consulta(archivo_csv='ventas.csv', desde=None, hasta=None, productos=None):
+    """
+    Recorre solo las ventas que cumplen los filtros.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        desde (str | date, optional): Primera fecha incluida
+        hasta (str | date, optional): Última fecha incluida
+        productos (iterable, optional): Productos a incluir (default: todos)
+
+    Yields:
+        dict: Una venta (ver analisis.convertir_venta)
+    """
+    if not os.path.exists(archivo_csv):
+        print(f"Error: No se encontró el archivo {archivo_csv}")
+        return
+    desde, hasta = _texto_fecha(desde), _texto_fecha(hasta)
+    productos = None if productos is None else frozenset(productos)
+    campos, inicio_datos = leer_encabezado(archivo_csv)
+    if not campos:
+        # Archivo vacío o sin encabezado: ninguna venta, como en iterar_ventas
+        return
+    i_fecha, i_producto, i_cantidad, i_precio = indices_columnas(campos)
+
+    rangos = rangos_a_leer(cargar_indice(archivo_csv), desde, hasta)
+    if rangos is None:
+        rangos = [(inicio_datos, os.path.getsize(archivo_csv))]
+
+    with open(archivo_csv, 'rb') as f:
+        for inicio, fin in rangos:
+            for fila in csv.reader(lineas_en_rango(f, inicio, fin)):
+                if not fila:
+                    continue
+                # Filtros sobre el texto: las fechas ISO se comparan como cadenas
+                fecha = fila[i_fecha]
+                if desde is not None and fecha < desde:
+                    continue
+                if hasta is not None and fecha > hasta:
+                    continue
+                if productos is not None and fila[i_producto] not in productos:
+                    continue
+                yield convertir_venta(fecha, fila[i_producto], fila[i_cantidad], fila[i_precio])
+
+
+def consultar(archivo_csv='ventas.csv', desde=None, hasta=None, productos=None,
+              metricas=None, **opciones):
+    """
+    Calcula métricas solo sobre las ventas que cumplen los filtros.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        desde (str | date, optional): Primera fecha incluida
+        hasta (str | date, optional): Última fecha incluida
+        productos (iterable, optional): Productos a incluir (default: todos)
+        metricas (list, optional): Métricas a calcular (default: METRICAS_INFORME)
+        **opciones: Parámetros de las métricas (por ejemplo, top_n)
+
+    Returns:
+        dict: Nombre de métrica -> resultado
+    """
+    metricas = list(METRICAS_INFORME if metricas is None else metricas)
+    motor = MotorAgregacion(metricas, **opciones)
+    return motor.procesar(iterar_consulta(archivo_csv, desde, hasta, productos)).resultados()
@@ -0,0 +1,47 @@
+"""
+Conversión rápida de fechas ISO (YYYY-MM-DD) de ventas.csv
+
+El formato es fijo, así que se parsea por posiciones en lugar de con
+datetime.strptime, y cada cadena distinta se convierte una sola vez
+(un año tiene como mucho 366 fechas distintas). Los meses se representan
+con una clave entera AAAAMM que solo se formatea como 'YYYY-MM' al final.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+# Suficiente para varios años de fechas distintas sin crecer sin límite
+MAXIMO_FECHAS_EN_CACHE = 1 << 14
+
+
+@lru_cache(maxsize=MAXIMO_FECHAS_EN_CACHE)
+def parsear_fecha(texto):
+    """
+    Convierte 'YYYY-MM-DD' en datetime sin strptime.
+
+    Args:
+        texto (str): Fecha en formato ISO
+
+    Returns:
+        datetime: Fecha (el mismo objeto para cadenas iguales)
+    """
+    return datetime(int(texto[0:4]), int(texto[5:7]), int(texto[8:10]))
+
+
+@lru_cache(maxsize=MAXIMO_FECHAS_EN_CACHE)
+def clave_mes(texto):
+    """
+    Clave entera del mes de una fecha ISO: '2024-03-15' -> 202403.
+
+    Args:
+        texto (str): Fecha en formato ISO
+
+    Returns:
+        int: Año * 100 + mes
+    """
+    return int(texto[0:4]) * 100 + int(texto[5:7])
+
+
+def formatear_mes(clave):
+    """Convierte una clave de mes 202403 en '2024-03'"""
+    return f'{clave // 100:04d}-{clave % 100:02d}'
@@ -1,6 +1,25 @@
+"""
+Generador de datos sintéticos de ventas
+
+Escribe las filas directamente en el CSV, ya en orden de fecha y sin
+guardarlas en memoria, de modo que puede generar desde 200 filas hasta miles
+de millones. Las fechas se obtienen como una muestra uniforme ya ordenada
+(estadísticos de orden generados de mayor a menor), equivalente a sortear
+fechas al azar y ordenarlas después.
+
+Con --fragmentos el resultado se divide en varios archivos consecutivos
+(ventas_0000.csv, ventas_0001.csv, ...) que pueden generarse en paralelo.
+La salida es idéntica para la misma semilla y número de fragmentos, con
+cualquier número de procesos.
+"""
+
+import argparse
 import csv
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from itertools import chain
 
 # Productos disponibles
 productos = [
@@ -13,39 +32,238 @@ productos = [
 fecha_inicio = datetime(2024, 1, 1)
 fecha_fin = datetime(2024, 12, 31)
 
-# Generar datos sintéticos
-ventas = []
-random.seed(42)  # Para resultados reproducibles
+SEMILLA = 42  # Para resultados reproducibles
+ENCABEZADO = ['fecha', 'producto', 'cantidad', 'precio']
 
-# Generar 200 registros de ventas
-for _ in range(200):
-    fecha = fecha_inicio + timedelta(days=random.randint(0, 365))
-    producto = random.choice(productos)
-    cantidad = random.randint(1, 10)
-    # Precios variados según el producto
+
+def rango_precio(producto):
+    """Precios variados según el producto: (mínimo, máximo)"""
     if producto in ['Laptop', 'Smartphone', 'Tablet']:
-        precio = round(random.uniform(200.0, 1500.0), 2)
+        return 200.0, 1500.0
     elif producto in ['Monitor', 'Impresora']:
-        precio = round(random.uniform(100.0, 500.0), 2)
+        return 100.0, 500.0
+    else:
+        return 10.0, 150.0
+
+
+# Catálogo por defecto: (producto, precio mínimo, precio máximo)
+CATALOGO = [(producto, *rango_precio(producto)) for producto in productos]
+
+
+def cargar_catalogo(archivo):
+    """
+    Lee un catálogo de productos desde un CSV con columnas
+    producto, precio_min y precio_max.
+
+    Returns:
+        list: Tuplas (producto, precio mínimo, precio máximo)
+    """
+    with open(archivo, 'r', encoding='utf-8', newline='') as f:
+        return [
+            (fila['producto'], float(fila['precio_min']), float(fila['precio_max']))
+            for fila in csv.DictReader(f)
+        ]
+
+
+def catalogo_sintetico(numero_productos, semilla=SEMILLA):
+    """
+    Catálogo de `numero_productos` productos ('Producto 0000001', ...) con
+    rangos de precio al azar, para pruebas con muchos productos distintos.
+    """
+    rng = random.Random(f'{semilla}:catalogo')
+    ancho = len(str(numero_productos))
+    catalogo = []
+    for i in range(numero_productos):
+        minimo = round(rng.uniform(1.0, 1000.0), 2)
+        catalogo.append((f'Producto {i:0{ancho}d}', minimo, round(minimo * rng.uniform(1.0, 3.0), 2)))
+    return catalogo
+
+
+def planificar_fragmentos(filas, fragmentos, semilla=SEMILLA):
+    """
+    Reparte las filas en fragmentos consecutivos de tamaño casi igual.
+
+    Las fechas de todas las filas son una muestra uniforme ordenada en
+    [0, 1). El límite entre fragmentos es el valor de la última fila de cada
+    uno, que se sortea con su distribución exacta (Beta); dado ese valor, las
+    demás filas de cada fragmento son uniformes en su intervalo y cada proceso
+    las genera por su cuenta.
+
+    Returns:
+        list: Por fragmento, (filas libres, inicio, fin, incluye_fin); si
+            incluye_fin es True, la última fila del fragmento cae en `fin`
+    """
+    rng = random.Random(f'{semilla}:fragmentos')
+    planes = []
+    anterior, inicio = 0, 0.0
+    for indice in range(1, fragmentos + 1):
+        hasta = filas * indice // fragmentos
+        if hasta == anterior:
+            planes.append((0, inicio, inicio, False))
+        elif indice == fragmentos:
+            planes.append((hasta - anterior, inicio, 1.0, False))
+        else:
+            # Dado el valor de la fila `anterior`, la fila `hasta` es el
+            # estadístico de orden (hasta - anterior) de las restantes
+            k, restantes = hasta - anterior, filas - anterior
+            fin = inicio + (1.0 - inicio) * rng.betavariate(k, restantes - k + 1)
+            planes.append((k - 1, inicio, fin, True))
+            anterior, inicio = hasta, fin
+    return planes
+
+
+def _fracciones_ordenadas(rng, n, inicio, fin):
+    """n valores uniformes en [inicio, fin) en orden creciente, sin ordenar"""
+    # El máximo de i uniformes se distribuye como U ** (1 / i): se generan
+    # de mayor a menor y se reflejan para obtenerlos de menor a mayor
+    actual = 1.0
+    ancho = fin - inicio
+    for i in range(n, 0, -1):
+        actual *= rng.random() ** (1.0 / i)
+        yield inicio + ancho * (1.0 - actual)
+
+
+def generar_filas(rng, plan, catalogo, fechas):
+    """
+    Filas de un fragmento en orden de fecha.
+
+    Args:
+        rng (random.Random): Generador del fragmento
+        plan (tuple): (filas libres, inicio, fin, incluye_fin) de planificar_fragmentos
+        catalogo (list): Tuplas (producto, precio mínimo, precio máximo)
+        fechas (list): Texto 'YYYY-MM-DD' de cada día del rango
+
+    Yields:
+        list: [fecha, producto, cantidad, precio]
+    """
+    libres, inicio, fin, incluye_fin = plan
+    dias = len(fechas)
+    fracciones = _fracciones_ordenadas(rng, libres, inicio, fin)
+    if incluye_fin:
+        fracciones = chain(fracciones, [fin])
+    # Métodos locales: este bucle se ejecuta una vez por fila
+    elegir, entero, uniforme = rng.choice, rng.randint, rng.uniform
+    for fraccion in fracciones:
+        producto, precio_min, precio_max = elegir(catalogo)
+        yield [
+            fechas[min(int(fraccion * dias), dias - 1)],
+            producto,
+            entero(1, 10),
+            round(uniforme(precio_min, precio_max), 2),
+        ]
+
+
+def _escribir_fragmento(tarea):
+    """Escribe un fragmento (se ejecuta en un proceso de trabajo)"""
+    ruta, indice, plan, catalogo, fechas, semilla = tarea
+    rng = random.Random(f'{semilla}:{indice}')
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ENCABEZADO)
+        writer.writerows(generar_filas(rng, plan, catalogo, fechas))
+    return ruta, plan[0] + plan[3]
+
+
+def rutas_fragmentos(archivo, fragmentos):
+    """Nombre de cada fragmento: ventas.csv -> ventas_0000.csv, ventas_0001.csv, ..."""
+    if fragmentos == 1:
+        return [archivo]
+    base, extension = os.path.splitext(archivo)
+    return [f'{base}_{indice:04d}{extension}' for indice in range(fragmentos)]
+
+
+def generar_ventas(archivo='ventas.csv', filas=200, catalogo=None, inicio=fecha_inicio,
+                   fin=fecha_fin, semilla=SEMILLA, fragmentos=1, procesos=1):
+    """
+    Genera un CSV de ventas sintéticas ordenado por fecha.
+
+    Args:
+        archivo (str): Archivo de salida (o nombre base de los fragmentos)
+        filas (int): Número total de filas
+        catalogo (list, optional): Tuplas (producto, precio mínimo, precio máximo)
+        inicio (datetime): Primera fecha posible
+        fin (datetime): Última fecha posible (incluida)
+        semilla (int): Semilla de los números aleatorios
+        fragmentos (int): Número de archivos en que se divide la salida
+        procesos (int): Procesos que escriben fragmentos a la vez
+
+    Returns:
+        list: Tuplas (ruta, filas escritas) de cada archivo, en orden de fecha
+    """
+    if fin < inicio:
+        raise ValueError("La fecha final es anterior a la inicial")
+    catalogo = list(CATALOGO if catalogo is None else catalogo)
+    if not catalogo:
+        raise ValueError("El catálogo de productos está vacío")
+    fechas = [
+        (inicio + timedelta(days=dia)).strftime('%Y-%m-%d')
+        for dia in range((fin - inicio).days + 1)
+    ]
+    tareas = [
+        (ruta, indice, plan, catalogo, fechas, semilla)
+        for indice, (ruta, plan) in enumerate(zip(
+            rutas_fragmentos(archivo, fragmentos), planificar_fragmentos(filas, fragmentos, semilla)
+        ))
+    ]
+    if procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as pool:
+            return list(pool.map(_escribir_fragmento, tareas))
+    return [_escribir_fragmento(tarea) for tarea in tareas]
+
+
+def _fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida (se espera YYYY-MM-DD): {texto}")
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos de ventas')
+    parser.add_argument('archivo', nargs='?', default='ventas.csv',
+                        help='Archivo CSV de salida (default: ventas.csv)')
+    parser.add_argument('-n', '--filas', type=int, default=200,
+                        help='Número de filas a generar (default: 200)')
+    parser.add_argument('--desde', type=_fecha, default=fecha_inicio,
+                        help='Primera fecha, YYYY-MM-DD (default: 2024-01-01)')
+    parser.add_argument('--hasta', type=_fecha, default=fecha_fin,
+                        help='Última fecha, YYYY-MM-DD (default: 2024-12-31)')
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help='Semilla para resultados reproducibles (default: 42)')
+    catalogo = parser.add_mutually_exclusive_group()
+    catalogo.add_argument('--catalogo', metavar='CSV',
+                          help='Catálogo con columnas producto, precio_min y precio_max')
+    catalogo.add_argument('--productos', type=int, metavar='N',
+                          help='Usar un catálogo sintético de N productos')
+    parser.add_argument('--fragmentos', type=int, default=1,
+                        help='Dividir la salida en N archivos consecutivos (default: 1)')
+    parser.add_argument('--procesos', type=int, default=1,
+                        help='Procesos que generan fragmentos en paralelo (default: 1)')
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    if args.filas < 0 or args.fragmentos < 1 or args.procesos < 1:
+        parser.error("--filas no puede ser negativo y --fragmentos/--procesos deben ser al menos 1")
+    if args.hasta < args.desde:
+        parser.error("--hasta es anterior a --desde")
+
+    if args.catalogo:
+        catalogo = cargar_catalogo(args.catalogo)
+    elif args.productos:
+        catalogo = catalogo_sintetico(args.productos, args.semilla)
     else:
-        precio = round(random.uniform(10.0, 150.0), 2)
-    
-    ventas.append([
-        fecha.strftime('%Y-%m-%d'),
-        producto,
-        cantidad,
-        precio
-    ])
-
-# Ordenar por fecha
-ventas.sort(key=lambda x: x[0])
-
-# Escribir al archivo CSV
-with open('ventas.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['fecha', 'producto', 'cantidad', 'precio'])
-    writer.writerows(ventas)
-
-print(f'CSV creado exitosamente con {len(ventas)} registros de ventas')
-print('Archivo: ventas.csv')
+        catalogo = CATALOGO
+
+    archivos = generar_ventas(args.archivo, args.filas, catalogo, args.desde, args.hasta,
+                              args.semilla, args.fragmentos, args.procesos)
+
+    print(f'CSV creado exitosamente con {sum(filas for _, filas in archivos)} registros de ventas')
+    for ruta, _ in archivos:
+        print(f'Archivo: {ruta}')
+
 
+if __name__ == '__main__':
+    main()
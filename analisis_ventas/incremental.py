@@ -0,0 +1,161 @@
+"""
+Análisis incremental de un CSV de ventas que solo crece por el final
+
+Tras cada ejecución se guardan junto al CSV los mapas intermedios del motor
+de agregación (totales por mes, cantidad e ingresos por producto, ...), el
+byte hasta el que se procesó el archivo y un SHA-256 de ese prefijo. La
+siguiente ejecución solo parsea las filas añadidas después de ese byte. Si
+el prefijo ya no coincide (el archivo se editó o se regeneró), se recalcula
+todo automáticamente.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from agregacion import MotorAgregacion
+from analisis import METRICAS_INFORME
+from paralelo import iterar_ventas_rango, leer_encabezado
+
+# 2: total_centavos redondea el total de cada línea, no el precio unitario
+VERSION_ESTADO = 2
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def ruta_estado(archivo_csv):
+    """Archivo donde se guarda el estado incremental de un CSV"""
+    return archivo_csv + '.agregados.json'
+
+
+def _actualizar_hash(hasher, archivo_csv, inicio, fin):
+    """Añade al hash los bytes [inicio, fin) del archivo"""
+    with open(archivo_csv, 'rb') as f:
+        f.seek(inicio)
+        restante = fin - inicio
+        while restante > 0:
+            bloque = f.read(min(TAMANO_BLOQUE, restante))
+            if not bloque:
+                break
+            hasher.update(bloque)
+            restante -= len(bloque)
+    return hasher
+
+
+def _fin_ultima_linea_completa(archivo_csv):
+    """Byte siguiente al último salto de línea (ignora una línea a medio escribir)"""
+    tamano = os.path.getsize(archivo_csv)
+    with open(archivo_csv, 'rb') as f:
+        posicion = tamano
+        while posicion > 0:
+            inicio = max(0, posicion - TAMANO_BLOQUE)
+            f.seek(inicio)
+            bloque = f.read(posicion - inicio)
+            indice = bloque.rfind(b'\n')
+            if indice != -1:
+                return inicio + indice + 1
+            posicion = inicio
+    return 0
+
+
+# Las claves de los mapas pueden ser enteros, textos, None o fechas; JSON
+# solo admite textos como claves, así que se guardan como pares [clave, valor]
+def _codificar_clave(clave):
+    if isinstance(clave, datetime):
+        return {'fecha': clave.strftime('%Y-%m-%d')}
+    return clave
+
+
+def _decodificar_clave(clave):
+    if isinstance(clave, dict):
+        return datetime.strptime(clave['fecha'], '%Y-%m-%d')
+    return clave
+
+
+def cargar_estado(archivo_csv):
+    """Estado guardado para un CSV, o None si no existe o no se puede leer"""
+    try:
+        with open(ruta_estado(archivo_csv), 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if estado.get('version') != VERSION_ESTADO:
+        return None
+    estado['mapas'] = {
+        nombre: {_decodificar_clave(clave): valor for clave, valor in pares}
+        for nombre, pares in estado['mapas'].items()
+    }
+    return estado
+
+
+def guardar_estado(archivo_csv, estado):
+    """Guarda el estado de forma atómica (archivo temporal + rename)"""
+    datos = dict(estado, mapas={
+        nombre: [[_codificar_clave(clave), valor] for clave, valor in mapa.items()]
+        for nombre, mapa in estado['mapas'].items()
+    })
+    destino = ruta_estado(archivo_csv)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, destino)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def analizar_incremental(archivo_csv='ventas.csv', metricas=None, **opciones):
+    """
+    Calcula métricas procesando solo las filas nuevas desde la última ejecución.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV (se asume que solo crece por el final)
+        metricas (list, optional): Métricas a calcular (default: METRICAS_INFORME)
+        **opciones: Parámetros de las métricas (por ejemplo, top_n)
+
+    Returns:
+        tuple: (resultados, info) donde info indica el modo ('incremental' o
+            'completo') y los bytes parseados en esta ejecución
+    """
+    metricas = list(METRICAS_INFORME if metricas is None else metricas)
+    motor = MotorAgregacion(metricas, **opciones)
+    if not os.path.exists(archivo_csv):
+        print(f"Error: No se encontró el archivo {archivo_csv}")
+        return motor.resultados(), {'modo': 'completo', 'bytes_procesados': 0}
+
+    inicio_datos = leer_encabezado(archivo_csv)[1]
+    fin = _fin_ultima_linea_completa(archivo_csv)
+    estado = cargar_estado(archivo_csv)
+    hasher = hashlib.sha256()
+    reutilizable = False
+    if (estado is not None and estado['acumuladores'] == sorted(motor.mapas)
+            and estado['offset'] <= fin):
+        _actualizar_hash(hasher, archivo_csv, 0, estado['offset'])
+        # copy(): el mismo hash sigue acumulando los bytes nuevos
+        reutilizable = hasher.copy().hexdigest() == estado['sha256_prefijo']
+    if reutilizable:
+        motor.combinar(estado['mapas'])
+        procesado = estado['offset']
+        modo = 'incremental'
+    else:
+        hasher = hashlib.sha256()
+        procesado = 0
+        modo = 'completo'
+
+    inicio = max(procesado, inicio_datos)
+    if fin > inicio:
+        motor.procesar(iterar_ventas_rango(archivo_csv, inicio, fin))
+    if fin > procesado:
+        _actualizar_hash(hasher, archivo_csv, procesado, fin)
+        procesado = fin
+
+    guardar_estado(archivo_csv, {
+        'version': VERSION_ESTADO,
+        'acumuladores': sorted(motor.mapas),
+        'offset': procesado,
+        'sha256_prefijo': hasher.hexdigest(),
+        'mapas': motor.exportar_mapas(),
+    })
+    return motor.resultados(), {'modo': modo, 'bytes_procesados': max(fin - inicio, 0)}
@@ -0,0 +1,200 @@
+"""
+Medición de tiempos, filas y memoria por etapa del análisis
+
+Cada etapa se envuelve en un bloque `with`:
+
+    instrumentacion = Instrumentacion.desde_entorno()
+    with instrumentacion.etapa('cargar') as etapa:
+        ventas = cargar_datos('ventas.csv')
+        etapa['filas'] = len(ventas)
+    instrumentacion.guardar('traza.json')
+
+Por etapa se registran el tiempo real y de CPU, las filas procesadas y la
+memoria residente (actual y pico). Opcionalmente cada etapa se perfila con
+cProfile (un archivo .prof por etapa) o con tracemalloc (pico de memoria de
+Python y líneas que más memoria reservan).
+
+Desactivada, etapa() devuelve siempre el mismo contexto vacío: el coste es
+una llamada a método por etapa, así que puede quedarse en el código de
+producción. Se activa con --traza en analisis.py o con las variables de
+entorno ANALISIS_TRAZA (ruta del JSON) y ANALISIS_PERFIL (cprofile o
+tracemalloc).
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERFILES = ('cprofile', 'tracemalloc')
+# Líneas de código con más memoria reservada que se guardan con tracemalloc
+LINEAS_TRACEMALLOC = 10
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB (None si no se puede medir)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def rss_pico_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return pico / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class _EtapaInactiva:
+    """Contexto vacío compartido por todas las etapas cuando no se mide nada"""
+
+    def __enter__(self):
+        # Diccionario nuevo: lo que escriba la etapa (filas, ...) se descarta
+        return {}
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_ETAPA_INACTIVA = _EtapaInactiva()
+
+
+class _Etapa:
+    """Mide una etapa y añade su registro a la instrumentación"""
+
+    def __init__(self, instrumentacion, nombre, datos):
+        self.instrumentacion = instrumentacion
+        self.registro = {'etapa': nombre, **datos}
+        self.perfilador = None
+
+    def __enter__(self):
+        perfil = self.instrumentacion.perfil
+        if perfil == 'cprofile':
+            import cProfile
+            self.perfilador = cProfile.Profile()
+        elif perfil == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+        self.rss_inicial = rss_actual_mb()
+        self.cpu_inicial = time.process_time()
+        self.inicio = time.perf_counter()
+        if self.perfilador is not None:
+            self.perfilador.enable()
+        return self.registro
+
+    def __exit__(self, tipo, valor, traza):
+        if self.perfilador is not None:
+            self.perfilador.disable()
+        segundos = time.perf_counter() - self.inicio
+        registro = self.registro
+        registro['inicio_segundos'] = self.inicio - self.instrumentacion.origen
+        registro['segundos'] = segundos
+        registro['cpu_segundos'] = time.process_time() - self.cpu_inicial
+        rss = rss_actual_mb()
+        registro['rss_mb'] = rss
+        registro['rss_delta_mb'] = rss - self.rss_inicial if rss is not None and self.rss_inicial is not None else None
+        registro['rss_pico_mb'] = rss_pico_mb()
+        if registro.get('filas') is not None and segundos > 0:
+            registro['filas_por_segundo'] = registro['filas'] / segundos
+        if tipo is not None:
+            registro['error'] = f'{tipo.__name__}: {valor}'
+
+        if self.perfilador is not None:
+            ruta = os.path.join(self.instrumentacion.directorio_perfiles, f"perfil_{registro['etapa']}.prof")
+            self.perfilador.dump_stats(ruta)
+            registro['perfil'] = ruta
+        elif self.instrumentacion.perfil == 'tracemalloc':
+            import tracemalloc
+            _, pico = tracemalloc.get_traced_memory()
+            lineas = tracemalloc.take_snapshot().statistics('lineno')[:LINEAS_TRACEMALLOC]
+            tracemalloc.stop()
+            registro['python_pico_mb'] = pico / (1024 * 1024)
+            registro['mayores_reservas'] = [
+                {'linea': str(estadistica.traceback), 'mb': estadistica.size / (1024 * 1024)}
+                for estadistica in lineas
+            ]
+        self.instrumentacion.etapas.append(registro)
+        return False
+
+
+class Instrumentacion:
+    """Registro de las etapas de una ejecución"""
+
+    def __init__(self, activa=False, perfil=None, directorio_perfiles='.'):
+        """
+        Args:
+            activa (bool): Si es False, etapa() no mide nada
+            perfil (str, optional): 'cprofile' o 'tracemalloc' para perfilar cada etapa
+            directorio_perfiles (str): Carpeta de los archivos .prof de cProfile
+        """
+        if perfil is not None and perfil not in PERFILES:
+            raise ValueError(f"Perfil desconocido: {perfil} (opciones: {', '.join(PERFILES)})")
+        self.activa = activa
+        self.perfil = perfil if activa else None
+        self.directorio_perfiles = directorio_perfiles
+        self.etapas = []
+        self.inicio = datetime.now()
+        self.origen = time.perf_counter()
+
+    @classmethod
+    def desde_entorno(cls, traza=None, perfil=None):
+        """
+        Instrumentación según los argumentos o, si faltan, ANALISIS_TRAZA y
+        ANALISIS_PERFIL. Está activa si hay una ruta de traza.
+
+        Returns:
+            tuple: (Instrumentacion, ruta de la traza o None)
+        """
+        traza = traza or os.environ.get('ANALISIS_TRAZA') or None
+        perfil = perfil or os.environ.get('ANALISIS_PERFIL') or None
+        directorio = os.path.dirname(os.path.abspath(traza)) if traza else '.'
+        return cls(activa=traza is not None, perfil=perfil, directorio_perfiles=directorio), traza
+
+    def etapa(self, nombre, **datos):
+        """
+        Contexto que mide una etapa.
+
+        Args:
+            nombre (str): Nombre de la etapa
+            **datos: Campos adicionales del registro (por ejemplo, filas)
+
+        Returns:
+            Contexto cuyo `as` es el registro (dict) de la etapa; se le pueden
+            añadir campos, como las filas procesadas
+        """
+        if not self.activa:
+            return _ETAPA_INACTIVA
+        return _Etapa(self, nombre, datos)
+
+    def traza(self):
+        """Traza de la ejecución como diccionario serializable a JSON"""
+        return {
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'perfil': self.perfil,
+            'segundos_totales': time.perf_counter() - self.origen,
+            'etapas': self.etapas,
+        }
+
+    def guardar(self, ruta):
+        """Escribe la traza JSON en `ruta` (no hace nada si está desactivada)"""
+        if not self.activa:
+            return None
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.traza(), f, indent=2, ensure_ascii=False)
+        return ruta
+
+
+# Instrumentación desactivada por defecto para las funciones que la aceptan
+INACTIVA = Instrumentacion()
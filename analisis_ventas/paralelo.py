@@ -0,0 +1,168 @@
+"""
+Análisis de ventas en paralelo con varios procesos
+
+Un CSV grande se divide en rangos de bytes alineados al inicio de línea, y
+un conjunto de fragmentos (por ejemplo, exportaciones mensuales) se indica
+con un patrón glob. Cada rango se agrega en un proceso del pool con el
+mismo MotorAgregacion que el análisis en serie; los mapas parciales se
+combinan después. Como los ingresos se suman en centavos enteros, el
+resultado es idéntico al de las funciones calcular_* en serie.
+
+Se asume que ningún campo del CSV contiene saltos de línea entre comillas.
+"""
+
+import csv
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from agregacion import MotorAgregacion
+from analisis import METRICAS_INFORME, indices_columnas, ventas_desde_filas
+
+# Tamaño aproximado de cada rango de trabajo (varios rangos por proceso
+# reparten mejor la carga si unos rangos son más lentos que otros)
+BYTES_POR_RANGO = 64 * 1024 * 1024
+
+
+def leer_encabezado(archivo_csv):
+    """
+    Lee la fila de encabezado de un CSV.
+
+    Returns:
+        tuple: (campos del encabezado, byte donde empiezan los datos)
+    """
+    with open(archivo_csv, 'rb') as f:
+        linea = f.readline()
+        return next(csv.reader([linea.decode('utf-8')]), []), f.tell()
+
+
+def dividir_en_rangos(archivo_csv, partes):
+    """
+    Divide los datos de un CSV en rangos de bytes que empiezan en inicio de línea.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV
+        partes (int): Número de rangos deseado (puede devolver menos)
+
+    Returns:
+        list: Tuplas (inicio, fin) que cubren todas las filas de datos
+    """
+    _, inicio_datos = leer_encabezado(archivo_csv)
+    tamano = os.path.getsize(archivo_csv)
+    if tamano <= inicio_datos:
+        return []
+    limites = [inicio_datos]
+    with open(archivo_csv, 'rb') as f:
+        for i in range(1, partes):
+            objetivo = inicio_datos + (tamano - inicio_datos) * i // partes
+            if objetivo <= limites[-1]:
+                continue
+            # Avanzar hasta el final de la línea que contiene el byte objetivo
+            f.seek(objetivo - 1)
+            f.readline()
+            limite = f.tell()
+            if limites[-1] < limite < tamano:
+                limites.append(limite)
+    limites.append(tamano)
+    return list(zip(limites[:-1], limites[1:]))
+
+
+def lineas_en_rango(f, inicio, fin):
+    """Líneas decodificadas de un archivo binario entre los bytes inicio y fin"""
+    f.seek(inicio)
+    posicion = inicio
+    while posicion < fin:
+        linea = f.readline()
+        if not linea:
+            break
+        posicion += len(linea)
+        yield linea.decode('utf-8')
+
+
+def iterar_ventas_rango(archivo_csv, inicio, fin, columnas=None):
+    """
+    Recorre las ventas de un rango de bytes de un CSV.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV
+        inicio (int): Byte de inicio (debe ser inicio de línea)
+        fin (int): Byte final (exclusivo, debe ser inicio de línea o fin de archivo)
+        columnas (list, optional): Índices de columnas; si es None se leen del encabezado
+
+    Yields:
+        dict: Una venta (ver analisis.convertir_venta)
+    """
+    if columnas is None:
+        columnas = indices_columnas(leer_encabezado(archivo_csv)[0])
+    with open(archivo_csv, 'rb') as f:
+        yield from ventas_desde_filas(csv.reader(lineas_en_rango(f, inicio, fin)), columnas)
+
+
+def _agregar_rango(tarea):
+    """Proceso de trabajo: agrega un rango y devuelve los mapas parciales"""
+    archivo_csv, inicio, fin, metricas, opciones = tarea
+    motor = MotorAgregacion(metricas, **opciones)
+    motor.procesar(iterar_ventas_rango(archivo_csv, inicio, fin))
+    return motor.exportar_mapas()
+
+
+def resolver_archivos(patron):
+    """Archivos que coinciden con un patrón glob, en orden (o el propio archivo)"""
+    archivos = sorted(glob.glob(patron))
+    if not archivos and os.path.exists(patron):
+        archivos = [patron]
+    return archivos
+
+
+def planificar_rangos(archivos, procesos, bytes_por_rango=BYTES_POR_RANGO):
+    """
+    Reparte los archivos en rangos de trabajo.
+
+    Cada archivo se divide en rangos de unos bytes_por_rango bytes, y al menos
+    en `procesos` rangos si hay un único archivo, para que ningún proceso quede
+    sin trabajo.
+
+    Returns:
+        list: Tuplas (archivo, inicio, fin) en orden de archivo y posición
+    """
+    rangos = []
+    for archivo in archivos:
+        tamano = os.path.getsize(archivo)
+        partes = max(1, -(-tamano // bytes_por_rango))
+        if len(archivos) == 1:
+            partes = max(partes, procesos)
+        rangos.extend((archivo, inicio, fin) for inicio, fin in dividir_en_rangos(archivo, partes))
+    return rangos
+
+
+def analizar_en_paralelo(patron, procesos=None, metricas=None, **opciones):
+    """
+    Calcula métricas sobre uno o varios CSV repartiendo el trabajo entre procesos.
+
+    Args:
+        patron (str): Archivo CSV o patrón glob de fragmentos ('ventas_*.csv')
+        procesos (int, optional): Procesos del pool (default: número de CPUs)
+        metricas (list, optional): Métricas a calcular (default: METRICAS_INFORME)
+        **opciones: Parámetros de las métricas (por ejemplo, top_n)
+
+    Returns:
+        dict: Nombre de métrica -> resultado, idéntico al del análisis en serie
+    """
+    metricas = list(METRICAS_INFORME if metricas is None else metricas)
+    procesos = procesos or os.cpu_count() or 1
+    archivos = resolver_archivos(patron)
+    if not archivos:
+        print(f"Error: No se encontró el archivo {patron}")
+
+    motor = MotorAgregacion(metricas, **opciones)
+    tareas = [
+        (archivo, inicio, fin, metricas, opciones)
+        for archivo, inicio, fin in planificar_rangos(archivos, procesos)
+    ]
+    if tareas:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as pool:
+            # map conserva el orden de los rangos: las claves de los mapas
+            # combinados quedan en orden de aparición, como en serie
+            for mapas in pool.map(_agregar_rango, tareas):
+                motor.combinar(mapas)
+    return motor.resultados()
@@ -0,0 +1,243 @@
+"""
+Representación columnar de las ventas con NumPy
+
+En lugar de un diccionario por venta, cada columna se guarda en un array
+tipado:
+
+- fecha: datetime64[D]
+- producto: códigos enteros (int32) que indexan la lista `productos`
+- cantidad: int32
+- precio: float64
+
+Las agregaciones por mes y por producto se hacen con np.bincount, sin
+bucles en Python. Los resultados tienen el mismo formato que los de
+analisis.py / agregacion.py: los ingresos se suman en centavos enteros
+(exactos en float64 hasta 2**53 centavos) y se convierten al final.
+"""
+
+import csv
+from itertools import islice
+
+import numpy as np
+
+# Filas del CSV convertidas a arrays en cada bloque de lectura
+FILAS_POR_BLOQUE = 500_000
+
+
+class TablaVentas:
+    """
+    Ventas almacenadas por columnas.
+
+    Una columna puede ser None si no se cargó (ver cache_columnar): las
+    agregaciones que no la usan funcionan igual.
+    """
+
+    def __init__(self, fecha, producto, cantidad, precio, productos):
+        """
+        Args:
+            fecha (np.ndarray): Fechas (datetime64[D])
+            producto (np.ndarray): Código de producto por venta (int32)
+            cantidad (np.ndarray): Unidades por venta (int32)
+            precio (np.ndarray): Precio unitario por venta (float64)
+            productos (list): Nombre de cada código de producto
+        """
+        self.fecha = fecha
+        self.producto = producto
+        self.cantidad = cantidad
+        self.precio = precio
+        self.productos = list(productos)
+
+    @property
+    def columnas(self):
+        """Columnas cargadas: nombre -> array"""
+        return {
+            nombre: columna
+            for nombre, columna in (('fecha', self.fecha), ('producto', self.producto),
+                                    ('cantidad', self.cantidad), ('precio', self.precio))
+            if columna is not None
+        }
+
+    def __len__(self):
+        return len(next(iter(self.columnas.values()), ()))
+
+    @property
+    def total(self):
+        """Importe de cada venta (cantidad * precio)"""
+        return self.cantidad * self.precio
+
+    @property
+    def total_centavos(self):
+        """Importe exacto de cada venta en centavos (int64), redondeado como en analisis.convertir_venta"""
+        return np.rint(self.cantidad * self.precio * 100).astype(np.int64)
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por las columnas"""
+        return sum(columna.nbytes for columna in self.columnas.values())
+
+
+class _Diccionario:
+    """Codificación incremental de productos a enteros, en orden de aparición"""
+
+    def __init__(self):
+        self.codigos = {}
+
+    def codificar(self, nombres):
+        # Valores distintos del bloque en orden de primera aparición, para
+        # que los códigos (y los desempates) sigan el orden del archivo
+        unicos, primera, inverso = np.unique(nombres, return_index=True, return_inverse=True)
+        orden = np.argsort(primera, kind='stable')
+        traduccion = np.empty(len(unicos), dtype=np.int32)
+        for posicion in orden:
+            traduccion[posicion] = self.codigos.setdefault(str(unicos[posicion]), len(self.codigos))
+        return traduccion[inverso.reshape(-1)]
+
+    @property
+    def nombres(self):
+        return list(self.codigos)
+
+
+def cargar_tabla(archivo_csv='ventas.csv', filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Carga el CSV de ventas en una TablaVentas.
+
+    El archivo se lee por bloques: solo un bloque de filas de texto está en
+    memoria a la vez, y cada bloque se convierte a arrays tipados.
+
+    Args:
+        archivo_csv (str): Ruta al archivo CSV con los datos de ventas
+        filas_por_bloque (int): Filas convertidas a arrays en cada bloque
+
+    Returns:
+        TablaVentas: Ventas por columnas (vacía si el archivo no existe)
+    """
+    diccionario = _Diccionario()
+    bloques = {'fecha': [], 'producto': [], 'cantidad': [], 'precio': []}
+    try:
+        with open(archivo_csv, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            encabezado = next(reader, None)
+            if encabezado is not None:
+                columnas = [encabezado.index(nombre) for nombre in ('fecha', 'producto', 'cantidad', 'precio')]
+                while True:
+                    filas = list(islice(reader, filas_por_bloque))
+                    if not filas:
+                        break
+                    fechas, productos, cantidades, precios = (
+                        [fila[i] for fila in filas] for i in columnas
+                    )
+                    bloques['fecha'].append(np.array(fechas, dtype='datetime64[D]'))
+                    bloques['producto'].append(diccionario.codificar(np.array(productos)))
+                    bloques['cantidad'].append(np.array(cantidades, dtype=np.int32))
+                    bloques['precio'].append(np.array(precios, dtype=np.float64))
+    except FileNotFoundError:
+        print(f"Error: No se encontró el archivo {archivo_csv}")
+
+    tipos = {'fecha': 'datetime64[D]', 'producto': np.int32, 'cantidad': np.int32, 'precio': np.float64}
+    columnas = {
+        nombre: np.concatenate(partes) if partes else np.empty(0, dtype=tipos[nombre])
+        for nombre, partes in bloques.items()
+    }
+    return TablaVentas(productos=diccionario.nombres, **columnas)
+
+
+# ============================================================================
+# AGREGACIONES VECTORIZADAS
+# ============================================================================
+
+def ventas_por_mes(tabla):
+    """
+    Total de ventas por mes con np.bincount.
+
+    Returns:
+        dict: Claves 'YYYY-MM' ordenadas y total de ventas
+    """
+    if len(tabla) == 0:
+        return {}
+    # Meses desde 1970 como enteros: códigos densos restando el mínimo
+    meses = tabla.fecha.astype('datetime64[M]').astype(np.int64)
+    primero = meses.min()
+    totales = np.bincount(meses - primero, weights=tabla.total_centavos) / 100
+    presentes = np.bincount(meses - primero) > 0
+    return {
+        str(np.datetime64(int(primero + desplazamiento), 'M')): float(totales[desplazamiento])
+        for desplazamiento in np.flatnonzero(presentes)
+    }
+
+
+def cantidad_por_producto(tabla):
+    """Unidades vendidas por código de producto (array indexado por código)"""
+    return np.bincount(tabla.producto, weights=tabla.cantidad, minlength=len(tabla.productos)).astype(np.int64)
+
+
+def ingresos_por_producto(tabla):
+    """Ingresos por código de producto (array indexado por código)"""
+    return np.bincount(tabla.producto, weights=tabla.total_centavos, minlength=len(tabla.productos)) / 100
+
+
+def _maximo(tabla, valores):
+    if len(valores) == 0:
+        return None, 0
+    codigo = int(np.argmax(valores))
+    return tabla.productos[codigo], valores[codigo].item()
+
+
+def producto_mas_vendido(tabla):
+    """Producto con más unidades vendidas: (nombre, cantidad)"""
+    return _maximo(tabla, cantidad_por_producto(tabla))
+
+
+def producto_mayor_ingresos(tabla):
+    """Producto con mayores ingresos: (nombre, ingresos)"""
+    return _maximo(tabla, ingresos_por_producto(tabla))
+
+
+def calcular_top_productos(tabla, top_n=5):
+    """Top N productos por ingresos: lista de (nombre, ingresos) descendente"""
+    ingresos = ingresos_por_producto(tabla)
+    if top_n <= 0 or len(ingresos) == 0:
+        return []
+    if top_n < len(ingresos):
+        # Solo se ordenan los candidatos con ingresos >= el N-ésimo mayor
+        # (np.partition es O(n)); se conservan en orden de código para que
+        # los empates se resuelvan como con un orden estable completo
+        umbral = np.partition(ingresos, len(ingresos) - top_n)[len(ingresos) - top_n]
+        candidatos = np.flatnonzero(ingresos >= umbral)
+    else:
+        candidatos = np.arange(len(ingresos))
+    orden = candidatos[np.argsort(-ingresos[candidatos], kind='stable')][:top_n]
+    return [(tabla.productos[codigo], float(ingresos[codigo])) for codigo in orden]
+
+
+def ticket_promedio(tabla):
+    """Importe medio por venta"""
+    numero_ventas = len(tabla)
+    return int(tabla.total_centavos.sum()) / 100 / numero_ventas if numero_ventas else 0.0
+
+
+def analizar(tabla, top_n=5, metricas=None):
+    """
+    Calcula las métricas de analisis.main() sobre una tabla columnar.
+
+    Args:
+        tabla (TablaVentas): Ventas; basta con que tenga cargadas las columnas
+            de las métricas pedidas (ver cache_columnar.COLUMNAS_POR_METRICA)
+        top_n (int): Número de productos del ranking
+        metricas (list, optional): Métricas a calcular (default: todas)
+
+    Returns:
+        dict: Mismas claves que los resultados de MotorAgregacion
+    """
+    calculos = {
+        'numero_ventas': len,
+        'ventas_por_mes': ventas_por_mes,
+        'producto_mas_vendido': producto_mas_vendido,
+        'producto_mayor_ingresos': producto_mayor_ingresos,
+        'top_productos': lambda tabla: calcular_top_productos(tabla, top_n),
+        'ticket_promedio': ticket_promedio,
+    }
+    metricas = list(calculos) if metricas is None else list(metricas)
+    desconocidas = [nombre for nombre in metricas if nombre not in calculos]
+    if desconocidas:
+        raise ValueError(f"Métricas desconocidas: {', '.join(desconocidas)}")
+    return {nombre: calculos[nombre](tabla) for nombre in metricas}
@@ -0,0 +1,104 @@
+"""
+Top-K de productos: exacto sobre agregados o aproximado en memoria acotada
+
+- top_k(): los K mayores de un mapa clave -> valor con heapq.nlargest, en
+  O(n log K) en lugar de ordenar el mapa completo.
+- SpaceSaving: los K más frecuentes (o de mayor peso) de un flujo guardando
+  como mucho `capacidad` claves, para cuando no caben todos los productos.
+"""
+
+import heapq
+from itertools import count
+from operator import itemgetter
+
+
+def top_k(mapa, k):
+    """
+    Los k pares (clave, valor) con mayor valor.
+
+    Con empates, conserva el orden del mapa, igual que
+    sorted(mapa.items(), key=valor, reverse=True)[:k].
+
+    Args:
+        mapa (dict): Clave -> valor
+        k (int): Número de pares a retornar
+
+    Returns:
+        list: Pares (clave, valor) ordenados por valor descendente
+    """
+    return heapq.nlargest(k, mapa.items(), key=itemgetter(1))
+
+
+class SpaceSaving:
+    """
+    Algoritmo Space-Saving (Metwally et al.) con pesos.
+
+    Mantiene como mucho `capacidad` contadores. Cuando llega una clave nueva
+    y no hay sitio, reemplaza la de menor cuenta y hereda esa cuenta como
+    error. Toda clave con peso real mayor que total / capacidad está entre
+    los contadores, y cada cuenta sobreestima el peso real en como mucho su
+    error.
+
+    Ejemplo:
+        resumen = SpaceSaving(1000)
+        for venta in iterar_ventas('ventas.csv'):
+            resumen.agregar(venta['producto'], venta['total_centavos'])
+        resumen.top(5)
+    """
+
+    def __init__(self, capacidad):
+        """
+        Args:
+            capacidad (int): Número máximo de claves vigiladas
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self.capacidad = capacidad
+        self.total = 0
+        # Clave -> [cuenta, error]
+        self.contadores = {}
+        # Montículo de mínimos (cuenta, orden, clave) con entradas obsoletas:
+        # las cuentas solo crecen, así que una entrada es vigente si su
+        # cuenta coincide con la del contador
+        self._monticulo = []
+        self._orden = count()
+
+    def agregar(self, clave, peso=1):
+        """Suma `peso` a la clave"""
+        self.total += peso
+        contador = self.contadores.get(clave)
+        if contador is None:
+            if len(self.contadores) < self.capacidad:
+                contador = self.contadores[clave] = [0, 0]
+            else:
+                minimo, expulsada = self._extraer_minimo()
+                del self.contadores[expulsada]
+                contador = self.contadores[clave] = [minimo, minimo]
+        contador[0] += peso
+        heapq.heappush(self._monticulo, (contador[0], next(self._orden), clave))
+        if len(self._monticulo) > 4 * self.capacidad:
+            self._reconstruir()
+
+    def _extraer_minimo(self):
+        while True:
+            cuenta, _, clave = heapq.heappop(self._monticulo)
+            contador = self.contadores.get(clave)
+            if contador is not None and contador[0] == cuenta:
+                return cuenta, clave
+
+    def _reconstruir(self):
+        self._monticulo = [
+            (cuenta, next(self._orden), clave) for clave, (cuenta, _) in self.contadores.items()
+        ]
+        heapq.heapify(self._monticulo)
+
+    def top(self, k):
+        """
+        Las k claves con mayor cuenta estimada.
+
+        Returns:
+            list: Tuplas (clave, cuenta, error); el peso real está entre
+                cuenta - error y cuenta
+        """
+        mayores = heapq.nlargest(k, self.contadores.items(), key=lambda x: x[1][0])
+        return [(clave, cuenta, error) for clave, (cuenta, error) in mayores]
@@ -1,13 +1,31 @@
 from flask import Flask
 
-def create_app():
+def create_app(config=None):
     """Factory function para crear y configurar la aplicación Flask"""
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
     
+    # Almacenamiento de tareas: 'sqlite' (por defecto) o 'memoria' (pruebas;
+    # con TASKS_ARCHIVO persiste en un snapshot JSON más un diario)
+    app.config['TASKS_BACKEND'] = 'sqlite'
+    app.config['TASKS_DATABASE'] = 'tareas.db'
+    # tareas.json de versiones anteriores: se importa al crear la base de datos
+    app.config['TASKS_IMPORTAR'] = 'tareas.json'
+    app.config['TASKS_ARCHIVO'] = None
+    # Máximo de elementos por lote en la API JSON (/api/tasks)
+    app.config['TASKS_API_MAX_LOTE'] = 10000
+    if config:
+        app.config.update(config)
+    
+    from app import tasks
+    if app.config['TASKS_BACKEND'] == 'sqlite':
+        tasks.configurar('sqlite', ruta=app.config['TASKS_DATABASE'],
+                         importar=app.config['TASKS_IMPORTAR'])
+    else:
+        tasks.configurar(app.config['TASKS_BACKEND'], archivo=app.config['TASKS_ARCHIVO'])
+    
     # Registrar blueprints/rutas
     from app.routes import main
     app.register_blueprint(main)
     
     return app
-
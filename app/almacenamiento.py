@@ -0,0 +1,729 @@
+"""
+Backends de almacenamiento para las tareas
+
+- MemoriaBackend: estado en memoria del proceso, con persistencia opcional en
+  un snapshot JSON más un diario de operaciones. Útil para pruebas y para un
+  único proceso.
+- SQLiteBackend: base de datos SQLite en modo WAL, segura entre hilos y entre
+  procesos (varios workers de gunicorn sobre el mismo archivo).
+
+Todos exponen la misma interfaz: cargar(), listar(), pagina(...),
+obtener(id), agregar(texto), completar(id), sus variantes por lotes
+agregar_varias(textos) y completar_varias(ids), version() y cerrar().
+
+version() identifica el estado actual de las tareas: cambia con cada
+modificación y sirve para validar cachés HTTP (ETag / Last-Modified).
+"""
+
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Rango de los INTEGER de SQLite: un ID o cursor fuera de él no corresponde a
+# ninguna tarea (y sqlite3 lanzaría OverflowError al pasárselo)
+ID_MINIMO = -2 ** 63
+ID_MAXIMO = 2 ** 63 - 1
+
+
+def id_en_rango(id):
+    """True si el ID cabe en un INTEGER de SQLite"""
+    return ID_MINIMO <= id <= ID_MAXIMO
+
+
+def cursores_en_rango(despues_de, antes_de):
+    """True si los cursores de paginación (o None) caben en un INTEGER de SQLite"""
+    return all(cursor is None or id_en_rango(cursor) for cursor in (despues_de, antes_de))
+
+
+class ListaOrdenada:
+    """
+    IDs ordenados repartidos en bloques de tamaño acotado.
+
+    Insertar o quitar un ID en cualquier posición solo desplaza los elementos
+    de un bloque (O(√n)), en lugar de toda la lista como haría un
+    bisect.insort o un del sobre una lista de un millón de IDs.
+    """
+
+    TAMANO_BLOQUE = 1000
+
+    def __init__(self, ids=()):
+        ids = sorted(ids)
+        self._bloques = [ids[i:i + self.TAMANO_BLOQUE] for i in range(0, len(ids), self.TAMANO_BLOQUE)]
+        # Último ID de cada bloque, para localizar el bloque con bisect
+        self._maximos = [bloque[-1] for bloque in self._bloques]
+
+    def __len__(self):
+        return sum(len(bloque) for bloque in self._bloques)
+
+    def __iter__(self):
+        for bloque in self._bloques:
+            yield from bloque
+
+    def agregar(self, id):
+        """Inserta un ID en su posición (al final, sin búsqueda, si es el mayor)"""
+        if not self._bloques or id > self._maximos[-1]:
+            if not self._bloques or len(self._bloques[-1]) >= self.TAMANO_BLOQUE:
+                self._bloques.append([])
+                self._maximos.append(id)
+            self._bloques[-1].append(id)
+            self._maximos[-1] = id
+            return
+        i = bisect.bisect_left(self._maximos, id)
+        bloque = self._bloques[i]
+        bisect.insort(bloque, id)
+        if len(bloque) > 2 * self.TAMANO_BLOQUE:
+            mitad = len(bloque) // 2
+            self._bloques[i:i + 1] = [bloque[:mitad], bloque[mitad:]]
+            self._maximos[i:i + 1] = [bloque[mitad - 1], bloque[-1]]
+
+    def quitar(self, id):
+        """Quita un ID (ValueError si no está)"""
+        i = bisect.bisect_left(self._maximos, id)
+        if i == len(self._bloques):
+            raise ValueError(id)
+        bloque = self._bloques[i]
+        j = bisect.bisect_left(bloque, id)
+        if bloque[j] != id:
+            raise ValueError(id)
+        del bloque[j]
+        if not bloque:
+            del self._bloques[i]
+            del self._maximos[i]
+        elif j == len(bloque):
+            self._maximos[i] = bloque[-1]
+
+    def siguientes(self, despues_de=None, limite=20):
+        """Los primeros `limite` IDs mayores que `despues_de` (None: desde el principio)"""
+        i = j = 0
+        if despues_de is not None:
+            i = bisect.bisect_right(self._maximos, despues_de)
+            if i < len(self._bloques):
+                j = bisect.bisect_right(self._bloques[i], despues_de)
+        seleccion = []
+        while i < len(self._bloques) and len(seleccion) < limite:
+            seleccion.extend(self._bloques[i][j:j + limite - len(seleccion)])
+            i, j = i + 1, 0
+        return seleccion
+
+    def anteriores(self, antes_de, limite=20):
+        """Los últimos `limite` IDs menores que `antes_de`, en orden ascendente"""
+        i = bisect.bisect_left(self._maximos, antes_de)
+        if i == len(self._bloques):
+            i -= 1
+            j = len(self._bloques[i]) if i >= 0 else 0
+        else:
+            j = bisect.bisect_left(self._bloques[i], antes_de)
+        partes = []
+        faltan = limite
+        while i >= 0 and faltan > 0:
+            inicio = max(j - faltan, 0)
+            partes.append(self._bloques[i][inicio:j])
+            faltan -= j - inicio
+            i -= 1
+            if i >= 0:
+                j = len(self._bloques[i])
+        return [id for parte in reversed(partes) for id in parte]
+
+
+class MemoriaBackend:
+    """Tareas en memoria con diario JSON opcional"""
+
+    def __init__(self, archivo=None, diario=None, compactar_cada=1000):
+        """
+        Args:
+            archivo (str, optional): Snapshot JSON. Si es None no se persiste nada
+            diario (str, optional): Diario de operaciones (por defecto archivo + '.log')
+            compactar_cada (int): Operaciones del diario tras las que se compacta
+        """
+        self.archivo = archivo
+        self.diario = diario or (self._ruta_diario(archivo) if archivo else None)
+        self.compactar_cada = compactar_cada
+        self._lock = threading.RLock()
+        self.cargar()
+
+    # ------------------------------------------------------------------
+    # Estado en memoria
+    # ------------------------------------------------------------------
+
+    def _reiniciar(self, tareas=(), contador_id=1):
+        # Índice ID -> tarea; como los IDs solo crecen, el orden del
+        # diccionario es a la vez el de inserción y el de ID
+        self._por_id = {tarea['id']: tarea for tarea in tareas}
+        # IDs ordenados (todos y por estado) para paginar por cursor sin
+        # recorrer las tareas; completar una tarea la mueve de una lista de
+        # estado a la otra en cualquier posición
+        self._ids = ListaOrdenada(self._por_id)
+        self._ids_por_estado = {
+            estado: ListaOrdenada(id for id, tarea in self._por_id.items() if tarea['completada'] == estado)
+            for estado in (False, True)
+        }
+        self._contador_id = contador_id
+
+    def _indexar(self, tarea):
+        # Los IDs nuevos siempre son los mayores: basta con añadir al final
+        self._por_id[tarea['id']] = tarea
+        self._ids.agregar(tarea['id'])
+        self._ids_por_estado[tarea['completada']].agregar(tarea['id'])
+
+    def _tocar(self):
+        # Registrar una modificación del estado
+        self._version += 1
+        self._modificado = time.time()
+
+    def _marcar_completada(self, tarea):
+        """Devuelve False si la tarea ya estaba completada"""
+        if tarea['completada']:
+            return False
+        tarea['completada'] = True
+        self._ids_por_estado[False].quitar(tarea['id'])
+        self._ids_por_estado[True].agregar(tarea['id'])
+        return True
+
+    def _aplicar_registro(self, registro):
+        """Aplica una operación del diario sobre el estado en memoria"""
+        if registro['op'] == 'agregar':
+            tarea = registro['tarea']
+            # Los IDs solo crecen: si ya es menor que el contador, la tarea
+            # está incluida en el snapshot (compactación interrumpida)
+            if tarea['id'] >= self._contador_id:
+                self._indexar(tarea)
+                self._contador_id = tarea['id'] + 1
+        elif registro['op'] == 'completar':
+            tarea = self._por_id.get(registro['id'])
+            if tarea is not None:
+                self._marcar_completada(tarea)
+
+    # ------------------------------------------------------------------
+    # Persistencia: snapshot atómico + diario de operaciones
+    # ------------------------------------------------------------------
+
+    def cargar(self):
+        """Carga las tareas desde el snapshot JSON y reaplica el diario"""
+        with self._lock:
+            self._reiniciar()
+            self._operaciones_pendientes = 0
+            # Versión del estado: un identificador por carga (los números se
+            # reinician con el proceso) más un contador de modificaciones
+            self._instancia = uuid.uuid4().hex[:8]
+            self._version = 0
+            self._modificado = time.time()
+            if self.archivo is None:
+                return
+            if self._leer(self.archivo, self.diario):
+                # Compactar para que las siguientes líneas no se peguen a la truncada
+                self.compactar()
+
+    def _leer(self, archivo, diario):
+        """
+        Aplica un snapshot y su diario sobre el estado, sin escribir nada.
+
+        Returns:
+            bool: True si la última línea del diario estaba truncada
+        """
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self._reiniciar(data.get('tareas', []), data.get('contador_id', 1))
+            except (json.JSONDecodeError, IOError):
+                # Si hay error al leer, inicializar con valores por defecto
+                self._reiniciar()
+        diario_truncado = False
+        if os.path.exists(diario):
+            try:
+                with open(diario, 'r', encoding='utf-8') as f:
+                    for linea in f:
+                        try:
+                            registro = json.loads(linea)
+                        except json.JSONDecodeError:
+                            # Última línea truncada por una caída a mitad de escritura
+                            diario_truncado = True
+                            break
+                        self._aplicar_registro(registro)
+                        self._operaciones_pendientes += 1
+            except IOError:
+                pass
+        return diario_truncado
+
+    @classmethod
+    def leer(cls, archivo, diario=None):
+        """
+        Estado de un snapshot y su diario sin modificarlos: a diferencia de
+        MemoriaBackend(archivo), nunca compacta ni escribe en los archivos.
+
+        Returns:
+            MemoriaBackend: Backend sin persistencia con esas tareas
+        """
+        backend = cls()
+        backend._leer(archivo, diario or cls._ruta_diario(archivo))
+        return backend
+
+    @staticmethod
+    def _ruta_diario(archivo):
+        return os.path.splitext(archivo)[0] + '.log'
+
+    def guardar(self):
+        """Guarda un snapshot completo de forma atómica (archivo temporal + rename)"""
+        try:
+            data = {
+                'tareas': list(self._por_id.values()),
+                'contador_id': self._contador_id
+            }
+            directorio = os.path.dirname(os.path.abspath(self.archivo))
+            fd, ruta_temporal = tempfile.mkstemp(dir=directorio, prefix='.tareas-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(ruta_temporal, self.archivo)
+            except BaseException:
+                os.unlink(ruta_temporal)
+                raise
+            return True
+        except IOError:
+            # Si hay error al escribir, simplemente continuar
+            return False
+
+    def compactar(self):
+        """Vuelca el estado en un snapshot nuevo y vacía el diario"""
+        if self.archivo is None:
+            return
+        with self._lock:
+            if not self.guardar():
+                # Sin snapshot nuevo el diario sigue siendo necesario
+                return
+            try:
+                # El snapshot ya contiene todo: truncar el diario es seguro aunque
+                # se interrumpa, porque reaplicar sus operaciones es idempotente
+                open(self.diario, 'w', encoding='utf-8').close()
+            except IOError:
+                pass
+            self._operaciones_pendientes = 0
+
+    def _registrar(self, *registros):
+        """Añade operaciones al diario en una sola escritura y compacta cada `compactar_cada`"""
+        if self.archivo is None or not registros:
+            return
+        try:
+            with open(self.diario, 'a', encoding='utf-8') as f:
+                f.write(''.join(
+                    json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+                    for registro in registros
+                ))
+        except IOError:
+            # Si hay error al escribir, simplemente continuar
+            pass
+        self._operaciones_pendientes += len(registros)
+        if self._operaciones_pendientes >= self.compactar_cada:
+            self.compactar()
+
+    # ------------------------------------------------------------------
+    # Interfaz común
+    # ------------------------------------------------------------------
+
+    def listar(self):
+        """Devuelve una copia de las tareas en orden de inserción"""
+        with self._lock:
+            return [dict(tarea) for tarea in self._por_id.values()]
+
+    def pagina(self, completada=None, despues_de=None, antes_de=None, limite=20):
+        """
+        Devuelve una página de tareas en orden de ID usando paginación por cursor.
+
+        Args:
+            completada (bool, optional): Filtrar por estado; None devuelve todas
+            despues_de (int, optional): Devolver las tareas con ID mayor que este
+            antes_de (int, optional): Devolver las últimas tareas con ID menor que este
+            limite (int): Número máximo de tareas
+
+        Returns:
+            list: Tareas de la página, en orden de ID ascendente (vacía si un
+                cursor está fuera del rango de IDs, como en SQLiteBackend)
+        """
+        if not cursores_en_rango(despues_de, antes_de):
+            return []
+        with self._lock:
+            ids = self._ids if completada is None else self._ids_por_estado[completada]
+            if antes_de is not None:
+                seleccion = ids.anteriores(antes_de, limite)
+            else:
+                seleccion = ids.siguientes(despues_de, limite)
+            return [dict(self._por_id[id]) for id in seleccion]
+
+    def obtener(self, id):
+        """Devuelve una copia de la tarea con ese ID, o None"""
+        with self._lock:
+            tarea = self._por_id.get(id)
+            return dict(tarea) if tarea is not None else None
+
+    def agregar(self, texto):
+        """Agrega una nueva tarea con un ID incremental"""
+        return self.agregar_varias([texto])[0]
+
+    def agregar_varias(self, textos):
+        """Agrega un lote de tareas con una sola escritura en el diario"""
+        with self._lock:
+            nuevas = []
+            for texto in textos:
+                nueva_tarea = {
+                    'id': self._contador_id,
+                    'texto': texto,
+                    'completada': False
+                }
+                self._indexar(nueva_tarea)
+                self._contador_id += 1
+                nuevas.append(nueva_tarea)
+            if nuevas:
+                self._tocar()
+            self._registrar(*({'op': 'agregar', 'tarea': tarea} for tarea in nuevas))
+            return [dict(tarea) for tarea in nuevas]
+
+    def importar_tareas(self, tareas, contador_id=None):
+        """
+        Carga en bloque tareas con su ID (importaciones, benchmarks).
+
+        Con persistencia se escribe un snapshot al final en lugar de anotar
+        cada tarea en el diario.
+
+        Args:
+            tareas (iterable): Tareas {'id', 'texto', 'completada'} en orden
+                de ID, todos mayores que los de las tareas existentes
+            contador_id (int, optional): ID de la siguiente tarea nueva
+                (default: el mayor ID importado + 1)
+
+        Returns:
+            int: Número de tareas importadas
+        """
+        with self._lock:
+            ultimo = next(reversed(self._por_id), 0)
+            # Se valida todo antes de indexar: un error no deja la carga a medias
+            nuevas = []
+            for tarea in tareas:
+                if tarea['id'] <= ultimo:
+                    raise ValueError(f"ID {tarea['id']} no es mayor que el de la tarea anterior")
+                ultimo = tarea['id']
+                nuevas.append({'id': tarea['id'], 'texto': tarea['texto'], 'completada': bool(tarea['completada'])})
+            for tarea in nuevas:
+                self._indexar(tarea)
+            self._contador_id = max(self._contador_id, ultimo + 1, contador_id or 0)
+            if nuevas:
+                self._tocar()
+                self.compactar()
+            return len(nuevas)
+
+    def completar(self, id):
+        """Marca una tarea como completada basándose en su ID"""
+        completadas = self.completar_varias([id])
+        return completadas[0] if completadas else None
+
+    def completar_varias(self, ids):
+        """
+        Completa un lote de tareas; los IDs inexistentes se ignoran.
+
+        Las tareas que ya estaban completadas se devuelven igual, pero no
+        cambian la versión ni se anotan en el diario.
+        """
+        with self._lock:
+            completadas = []
+            cambiadas = []
+            for id in ids:
+                tarea = self._por_id.get(id)
+                if tarea is not None:
+                    if self._marcar_completada(tarea):
+                        cambiadas.append(tarea)
+                    completadas.append(tarea)
+            if cambiadas:
+                self._tocar()
+            self._registrar(*({'op': 'completar', 'id': tarea['id']} for tarea in cambiadas))
+            return [dict(tarea) for tarea in completadas]
+
+    def version(self):
+        """
+        Devuelve la versión actual del estado.
+
+        Returns:
+            dict: {'etag': str, 'modificado': timestamp de la última modificación}
+        """
+        with self._lock:
+            return {'etag': f'{self._instancia}-{self._version}', 'modificado': self._modificado}
+
+    def cerrar(self):
+        """Compacta el diario pendiente antes de descartar el backend"""
+        if self._operaciones_pendientes:
+            self.compactar()
+
+
+class SQLiteBackend:
+    """Tareas en una base de datos SQLite en modo WAL"""
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS tareas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            texto TEXT NOT NULL,
+            completada INTEGER NOT NULL DEFAULT 0
+        );
+        -- Índice por estado: las vistas filtradas paginan sin recorrer la tabla
+        CREATE INDEX IF NOT EXISTS idx_tareas_estado ON tareas (completada, id);
+        -- Versión del estado compartida por todos los procesos: se incrementa
+        -- en cada transacción de escritura que modifica tareas
+        CREATE TABLE IF NOT EXISTS version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            instancia TEXT NOT NULL,
+            numero INTEGER NOT NULL,
+            modificado REAL NOT NULL
+        );
+        INSERT OR IGNORE INTO version
+        VALUES (1, lower(hex(randomblob(4))), 0, CAST(strftime('%s', 'now') AS REAL));
+    """
+
+    def __init__(self, ruta='tareas.db', timeout=30.0, importar=None):
+        """
+        Args:
+            ruta (str): Archivo de la base de datos
+            timeout (float): Segundos de espera ante un bloqueo de escritura
+            importar (str, optional): tareas.json de versiones anteriores; sus
+                tareas se copian a la base de datos si esta es nueva
+        """
+        self.ruta = ruta
+        self.timeout = timeout
+        self._pid = None
+        self._pool = None
+        with self._conexion() as conexion:
+            conexion.executescript(self.ESQUEMA)
+        if importar is not None and os.path.exists(importar):
+            self._importar(importar)
+
+    def _importar(self, archivo):
+        """
+        Copia las tareas de un snapshot JSON (y su diario) si la base de datos
+        es nueva: sin tareas y sin ninguna modificación registrada. La
+        comprobación va dentro de la transacción de escritura, así que solo
+        un worker hace la importación.
+        """
+        with self._transaccion() as conexion:
+            nueva = conexion.execute(
+                'SELECT numero = 0 AND NOT EXISTS (SELECT 1 FROM tareas) FROM version'
+            ).fetchone()[0]
+            if not nueva:
+                return
+            # MemoriaBackend ignora un snapshot ilegible; aquí eso perdería las
+            # tareas sin avisar, así que se valida antes
+            try:
+                with open(archivo, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise ValueError(f"No se pueden importar las tareas de {archivo}: {e}") from None
+            # Solo lectura: el archivo antiguo no se modifica aunque su
+            # diario esté truncado
+            origen = MemoriaBackend.leer(archivo)
+            # Los IDs nuevos siguen donde los dejó el contador del JSON
+            self._insertar(conexion, origen.listar(), origen._contador_id)
+
+    @staticmethod
+    def _insertar(conexion, tareas, contador_id=None):
+        """Inserta tareas con su ID dentro de una transacción (ver importar_tareas)"""
+        ultimo = conexion.execute('SELECT coalesce(max(id), 0) FROM tareas').fetchone()[0]
+        filas = []
+        for tarea in tareas:
+            if tarea['id'] <= ultimo:
+                raise ValueError(f"ID {tarea['id']} no es mayor que el de la tarea anterior")
+            ultimo = tarea['id']
+            filas.append((tarea['id'], tarea['texto'], int(tarea['completada'])))
+        if not filas:
+            return 0
+        conexion.executemany('INSERT INTO tareas (id, texto, completada) VALUES (?, ?, ?)', filas)
+        if contador_id is not None:
+            conexion.execute(
+                "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'tareas'",
+                (contador_id - 1,),
+            )
+        return len(filas)
+
+    def cargar(self):
+        """El estado vive en la base de datos: no hay nada que cargar"""
+
+    def _conectar(self):
+        conexion = sqlite3.connect(
+            self.ruta,
+            timeout=self.timeout,
+            isolation_level=None,  # Transacciones explícitas con BEGIN
+            check_same_thread=False,  # El pool garantiza un solo hilo a la vez
+        )
+        conexion.row_factory = sqlite3.Row
+        conexion.execute('PRAGMA journal_mode=WAL')
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        return conexion
+
+    @contextmanager
+    def _conexion(self):
+        """
+        Presta una conexión del pool del proceso.
+
+        Cada hilo activo usa una conexión reutilizada en lugar de abrir una
+        por petición. Tras un fork (workers de gunicorn con --preload) las
+        conexiones heredadas se descartan y el proceso hijo crea las suyas.
+        """
+        if self._pid != os.getpid():
+            self._pool = queue.LifoQueue()
+            self._pid = os.getpid()
+        pool = self._pool
+        try:
+            conexion = pool.get_nowait()
+        except queue.Empty:
+            conexion = self._conectar()
+        try:
+            yield conexion
+        finally:
+            if conexion.in_transaction:
+                # Una transacción a medias (COMMIT o ROLLBACK fallido) no puede
+                # pasar a la siguiente petición: se deshace o se descarta la conexión
+                try:
+                    conexion.execute('ROLLBACK')
+                except sqlite3.Error:
+                    conexion.close()
+                    conexion = None
+            if conexion is not None:
+                pool.put(conexion)
+
+    @contextmanager
+    def _transaccion(self):
+        """Transacción de escritura: BEGIN IMMEDIATE toma el bloqueo desde el inicio"""
+        with self._conexion() as conexion:
+            conexion.execute('BEGIN IMMEDIATE')
+            cambios = conexion.total_changes
+            try:
+                yield conexion
+                if conexion.total_changes != cambios:
+                    conexion.execute(
+                        'UPDATE version SET numero = numero + 1, modificado = ? WHERE id = 1',
+                        (time.time(),),
+                    )
+            except BaseException:
+                try:
+                    conexion.execute('ROLLBACK')
+                except sqlite3.Error:
+                    # _conexion descarta la conexión si la transacción sigue abierta
+                    pass
+                raise
+            # Si el COMMIT falla, _conexion deshace la transacción antes de
+            # devolver la conexión al pool
+            conexion.execute('COMMIT')
+
+    @staticmethod
+    def _a_dict(fila):
+        return {'id': fila['id'], 'texto': fila['texto'], 'completada': bool(fila['completada'])}
+
+    def listar(self):
+        """Devuelve las tareas en orden de inserción (orden de ID)"""
+        with self._conexion() as conexion:
+            filas = conexion.execute('SELECT id, texto, completada FROM tareas ORDER BY id').fetchall()
+        return [self._a_dict(fila) for fila in filas]
+
+    def pagina(self, completada=None, despues_de=None, antes_de=None, limite=20):
+        """Devuelve una página de tareas en orden de ID (ver MemoriaBackend.pagina)"""
+        if not cursores_en_rango(despues_de, antes_de):
+            return []
+        condiciones, parametros = [], []
+        if completada is not None:
+            condiciones.append('completada = ?')
+            parametros.append(int(completada))
+        if antes_de is not None:
+            condiciones.append('id < ?')
+            parametros.append(antes_de)
+        elif despues_de is not None:
+            condiciones.append('id > ?')
+            parametros.append(despues_de)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        orden = 'DESC' if antes_de is not None else 'ASC'
+        with self._conexion() as conexion:
+            filas = conexion.execute(
+                f'SELECT id, texto, completada FROM tareas {where} ORDER BY id {orden} LIMIT ?',
+                (*parametros, limite),
+            ).fetchall()
+        tareas = [self._a_dict(fila) for fila in filas]
+        if antes_de is not None:
+            tareas.reverse()
+        return tareas
+
+    def obtener(self, id):
+        """Devuelve la tarea con ese ID, o None"""
+        if not id_en_rango(id):
+            return None
+        with self._conexion() as conexion:
+            fila = conexion.execute(
+                'SELECT id, texto, completada FROM tareas WHERE id = ?', (id,)
+            ).fetchone()
+        return self._a_dict(fila) if fila is not None else None
+
+    def agregar(self, texto):
+        """Agrega una nueva tarea; el ID lo asigna SQLite dentro de la transacción"""
+        return self.agregar_varias([texto])[0]
+
+    def agregar_varias(self, textos):
+        """Agrega un lote de tareas en una única transacción"""
+        nuevas = []
+        with self._transaccion() as conexion:
+            for texto in textos:
+                cursor = conexion.execute('INSERT INTO tareas (texto) VALUES (?)', (texto,))
+                nuevas.append({'id': cursor.lastrowid, 'texto': texto, 'completada': False})
+        return nuevas
+
+    def importar_tareas(self, tareas, contador_id=None):
+        """Carga en bloque tareas con su ID en una única transacción (ver MemoriaBackend.importar_tareas)"""
+        with self._transaccion() as conexion:
+            return self._insertar(conexion, tareas, contador_id)
+
+    def completar(self, id):
+        """Marca una tarea como completada basándose en su ID"""
+        completadas = self.completar_varias([id])
+        return completadas[0] if completadas else None
+
+    def completar_varias(self, ids):
+        """
+        Completa un lote de tareas en una única transacción; ignora IDs
+        inexistentes (también los que no caben en un INTEGER). Las ya
+        completadas no cuentan como modificación.
+        """
+        completadas = []
+        with self._transaccion() as conexion:
+            for id in ids:
+                if not id_en_rango(id):
+                    continue
+                conexion.execute('UPDATE tareas SET completada = 1 WHERE id = ? AND completada = 0', (id,))
+                fila = conexion.execute(
+                    'SELECT id, texto, completada FROM tareas WHERE id = ?', (id,)
+                ).fetchone()
+                if fila is not None:
+                    completadas.append(self._a_dict(fila))
+        return completadas
+
+    def version(self):
+        """Devuelve la versión actual del estado (ver MemoriaBackend.version)"""
+        with self._conexion() as conexion:
+            fila = conexion.execute('SELECT instancia, numero, modificado FROM version').fetchone()
+        return {'etag': f"{fila['instancia']}-{fila['numero']}", 'modificado': fila['modificado']}
+
+    def cerrar(self):
+        """Cierra las conexiones del pool de este proceso"""
+        if self._pid != os.getpid():
+            return
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Backends disponibles por nombre (clave de configuración TASKS_BACKEND)
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'memoria': MemoriaBackend,
+}
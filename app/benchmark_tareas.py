@@ -0,0 +1,83 @@
+"""
+Benchmark de latencia de completar_tarea según el número de tareas
+
+Uso (desde la raíz del repositorio):
+    python -m app.benchmark_tareas
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from app import tasks
+
+TAMANOS = [100, 1_000, 10_000, 100_000, 1_000_000]
+REPETICIONES = 1000
+
+
+def ids_recientes(n):
+    return list(range(n, max(n - REPETICIONES, 0), -1))
+
+
+def ids_antiguas(n):
+    return list(range(1, min(REPETICIONES, n) + 1))
+
+
+def ids_aleatorias(n):
+    return random.Random(n).sample(range(1, n + 1), min(REPETICIONES, n))
+
+
+# Qué tareas se completan: las más nuevas (peor caso de una búsqueda lineal),
+# las más antiguas (peor caso al mover IDs dentro de listas ordenadas) y al azar
+ORDENES = {
+    'recientes': ids_recientes,
+    'antiguas': ids_antiguas,
+    'aleatorias': ids_aleatorias,
+}
+
+
+def preparar_tareas(nombre_backend, n, directorio, orden='recientes'):
+    """Crea un backend con n tareas pendientes cargadas en bloque (una base de datos por medición)"""
+    tareas = [{'id': i, 'texto': f'Tarea {i}', 'completada': False} for i in range(1, n + 1)]
+    if nombre_backend == 'memoria':
+        backend = tasks.configurar('memoria')
+    else:
+        ruta = os.path.join(directorio, f'tareas-{n}-{orden}.db')
+        backend = tasks.configurar('sqlite', ruta=ruta)
+    tasks.importar_tareas(tareas)
+    return backend
+
+
+def medir_completar(nombre_backend, n, directorio, orden='recientes'):
+    """
+    Mide la latencia media de completar_tarea con n tareas cargadas.
+
+    Args:
+        orden (str): Clave de ORDENES con las tareas a completar
+
+    Returns:
+        float: Microsegundos por llamada
+    """
+    preparar_tareas(nombre_backend, n, directorio, orden)
+    ids = ORDENES[orden](n)
+    inicio = time.perf_counter()
+    for id in ids:
+        tasks.completar_tarea(id)
+    return (time.perf_counter() - inicio) / len(ids) * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"{'Tareas':>12} | {'Orden':>10} | {'memoria µs':>12} | {'sqlite µs':>12}")
+        print("-" * 55)
+        for n in TAMANOS:
+            for orden in ORDENES:
+                memoria = medir_completar('memoria', n, directorio, orden)
+                sqlite = medir_completar('sqlite', n, directorio, orden)
+                print(f"{n:>12,} | {orden:>10} | {memoria:>12.2f} | {sqlite:>12.2f}")
+        tasks.backend.cerrar()
+
+
+if __name__ == '__main__':
+    main()
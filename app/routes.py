@@ -1,13 +1,94 @@
-from flask import Blueprint, render_template, request, redirect, url_for
+import hashlib
+import time
+from pathlib import Path
+
+from flask import Blueprint, current_app, jsonify, make_response, render_template, request, redirect, url_for
 from app import tasks
+from app.almacenamiento import id_en_rango
 
 # Crear un Blueprint para las rutas principales
 main = Blueprint('main', __name__)
 
+# Límite de tareas por página en el listado de la API
+API_LIMITE_MAXIMO = 1000
+
+# ============================================================================
+# Caché HTTP (ETag / Last-Modified)
+# ============================================================================
+
+def _aplicar_cabeceras_cache(respuesta, etag, modificado):
+    """Marca la respuesta como cacheable, obligando al cliente a revalidar"""
+    respuesta.set_etag(etag)
+    respuesta.last_modified = int(modificado)
+    respuesta.cache_control.no_cache = True
+    return respuesta
+
+def _no_modificado(etag, modificado):
+    """Devuelve una respuesta 304 si la petición condicional sigue vigente, o None"""
+    if request.if_none_match:
+        vigente = request.if_none_match.contains(etag)
+    elif request.if_modified_since:
+        vigente = int(modificado) <= request.if_modified_since.timestamp()
+    else:
+        vigente = False
+    if not vigente:
+        return None
+    return _aplicar_cabeceras_cache(current_app.response_class(status=304), etag, modificado)
+
+def _version_plantillas():
+    """
+    Huella y fecha de las plantillas de la aplicación.
+
+    La versión de las tareas de SQLite se guarda en la base de datos y
+    sobrevive a los reinicios: sin esta huella en el ETag, tras desplegar
+    plantillas nuevas los clientes seguirían recibiendo 304 con la página
+    antigua. Se calcula una vez por aplicación (siempre en modo debug).
+    """
+    cache = current_app.extensions.setdefault('paginas_renderizadas', {})
+    if 'plantillas' not in cache or current_app.debug:
+        carpeta = Path(current_app.root_path, current_app.template_folder)
+        huella = hashlib.sha1()
+        modificado = 0
+        for ruta in sorted(carpeta.rglob('*')):
+            if ruta.is_file():
+                huella.update(ruta.relative_to(carpeta).as_posix().encode('utf-8'))
+                huella.update(ruta.read_bytes())
+                modificado = max(modificado, ruta.stat().st_mtime)
+        cache['plantillas'] = (huella.hexdigest()[:8], modificado)
+    return cache['plantillas']
+
+def _respuesta_versionada(generar):
+    """
+    Responde con el contenido de `generar()` o con un 304 sin generarlo
+    si el cliente ya tiene la versión actual de las tareas (y de las plantillas).
+    """
+    version = tasks.version_tareas()
+    huella_plantillas, plantillas_modificadas = _version_plantillas()
+    etag = f"{version['etag']}-{huella_plantillas}"
+    modificado = max(version['modificado'], plantillas_modificadas)
+    no_modificado = _no_modificado(etag, modificado)
+    if no_modificado is not None:
+        return no_modificado
+    respuesta = make_response(generar())
+    return _aplicar_cabeceras_cache(respuesta, etag, modificado)
+
 @main.route('/')
 def index():
-    """Ruta principal - página de lista de tareas"""
-    return render_template('index.html', tareas=tasks.tareas)
+    """Ruta principal - página de lista de tareas (paginada y filtrable)"""
+    estado = request.args.get('estado')
+    if estado not in tasks.ESTADOS:
+        estado = None
+
+    def renderizar():
+        pagina = tasks.listar_pagina(
+            estado=estado,
+            despues_de=request.args.get('despues', type=int),
+            antes_de=request.args.get('antes', type=int),
+        )
+        return render_template('index.html', tareas=pagina['tareas'], estado=estado,
+                               siguiente=pagina['siguiente'], anterior=pagina['anterior'])
+
+    return _respuesta_versionada(renderizar)
 
 @main.route('/agregar', methods=['POST'])
 def agregar():
@@ -25,6 +106,96 @@ def completar(id):
 
 @main.route('/about')
 def about():
-    """Ruta para la página 'Acerca de'"""
-    return render_template('about.html')
+    """Ruta para la página 'Acerca de' (estática: se renderiza una sola vez)"""
+    cache = current_app.extensions.setdefault('paginas_renderizadas', {})
+    if 'about' not in cache or current_app.debug:
+        html = render_template('about.html')
+        etag = hashlib.sha1(html.encode('utf-8')).hexdigest()
+        cache['about'] = (html, etag, time.time())
+    html, etag, modificado = cache['about']
+    no_modificado = _no_modificado(etag, modificado)
+    if no_modificado is not None:
+        return no_modificado
+    return _aplicar_cabeceras_cache(make_response(html), etag, modificado)
+
+
+
+# ============================================================================
+# API JSON
+# ============================================================================
+
+def _error_api(mensaje, codigo=400):
+    """Respuesta de error JSON de la API"""
+    return jsonify({'error': mensaje}), codigo
+
+def _lote_desde_json(clave):
+    """
+    Extrae la lista `clave` del cuerpo JSON de la petición.
+
+    Returns:
+        tuple: (lista, None) si es válida o (None, respuesta de error)
+    """
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict) or not isinstance(datos.get(clave), list):
+        return None, _error_api(f"Se esperaba un objeto JSON con la lista '{clave}'")
+    lote = datos[clave]
+    maximo = current_app.config['TASKS_API_MAX_LOTE']
+    if len(lote) > maximo:
+        return None, _error_api(f"El lote supera el máximo de {maximo} elementos", 413)
+    return lote, None
+
+def _es_id(valor):
+    """True si el valor es un ID válido: entero (no bool) dentro del rango de SQLite"""
+    return isinstance(valor, int) and not isinstance(valor, bool) and id_en_rango(valor)
+
+@main.route('/api/tasks', methods=['GET'])
+def api_listar():
+    """Lista tareas paginadas: ?estado=pendientes|completadas&despues=<id>&antes=<id>&limite=<n>"""
+    estado = request.args.get('estado')
+    if estado is not None and estado not in tasks.ESTADOS:
+        return _error_api(f"Estado desconocido: {estado}")
+    limite = request.args.get('limite', tasks.TAREAS_POR_PAGINA, type=int)
+    despues_de = request.args.get('despues', type=int)
+    antes_de = request.args.get('antes', type=int)
+    for nombre, cursor in (('despues', despues_de), ('antes', antes_de)):
+        if cursor is not None and not _es_id(cursor):
+            return _error_api(f"Cursor '{nombre}' fuera de rango")
+
+    def generar():
+        return jsonify(tasks.listar_pagina(
+            estado=estado,
+            despues_de=despues_de,
+            antes_de=antes_de,
+            limite=min(max(limite, 1), API_LIMITE_MAXIMO),
+        ))
+
+    return _respuesta_versionada(generar)
+
+@main.route('/api/tasks', methods=['POST'])
+def api_agregar():
+    """Crea un lote de tareas: {"tareas": ["texto", {"texto": "..."}, ...]}"""
+    lote, error = _lote_desde_json('tareas')
+    if error:
+        return error
+    textos = []
+    for posicion, elemento in enumerate(lote):
+        texto = elemento.get('texto') if isinstance(elemento, dict) else elemento
+        if not isinstance(texto, str) or not texto.strip():
+            return _error_api(f"Tarea {posicion}: el texto debe ser una cadena no vacía")
+        textos.append(texto.strip())
+    return jsonify({'tareas': tasks.agregar_tareas(textos)}), 201
 
+@main.route('/api/tasks/completar', methods=['POST'])
+def api_completar():
+    """Completa un lote de tareas: {"ids": [1, 2, ...]}"""
+    ids, error = _lote_desde_json('ids')
+    if error:
+        return error
+    if not all(_es_id(id) for id in ids):
+        return _error_api("Los IDs deben ser números enteros de 64 bits")
+    completadas = tasks.completar_tareas(ids)
+    encontrados = {tarea['id'] for tarea in completadas}
+    return jsonify({
+        'tareas': completadas,
+        'no_encontradas': [id for id in ids if id not in encontrados],
+    })
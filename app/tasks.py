@@ -1,66 +1,104 @@
-import json
-import os
+import threading
 
-# Archivo JSON para persistencia
-ARCHIVO_TAREAS = 'tareas.json'
+from app.almacenamiento import BACKENDS
 
-# Lista global de tareas con ID incremental
-tareas = []
-contador_id = 1
+# Backend por defecto: SQLite en modo WAL, seguro con varios hilos y workers
+BACKEND_POR_DEFECTO = 'sqlite'
+# tareas.json es el archivo de versiones anteriores: se importa al crear la base de datos
+OPCIONES_POR_DEFECTO = {'ruta': 'tareas.db', 'importar': 'tareas.json'}
+
+# Tamaño de página por defecto del listado
+TAREAS_POR_PAGINA = 20
+
+# Filtros de estado aceptados por listar_pagina
+ESTADOS = {'pendientes': False, 'completadas': True}
+
+# Backend activo (se crea al primer uso o al llamar a configurar)
+backend = None
+_lock_backend = threading.Lock()
+
+def configurar(nombre=BACKEND_POR_DEFECTO, **opciones):
+    """Selecciona el backend de almacenamiento de las tareas"""
+    global backend
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de tareas desconocido: {nombre}")
+    with _lock_backend:
+        if backend is not None:
+            backend.cerrar()
+        backend = BACKENDS[nombre](**opciones)
+        return backend
+
+def obtener_backend():
+    """Devuelve el backend activo, creando el de por defecto si hace falta"""
+    global backend
+    if backend is None:
+        with _lock_backend:
+            if backend is None:
+                backend = BACKENDS[BACKEND_POR_DEFECTO](**OPCIONES_POR_DEFECTO)
+    return backend
 
 def cargar_tareas():
-    """Carga las tareas desde el archivo JSON"""
-    global tareas, contador_id
-    if os.path.exists(ARCHIVO_TAREAS):
-        try:
-            with open(ARCHIVO_TAREAS, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                tareas = data.get('tareas', [])
-                contador_id = data.get('contador_id', 1)
-        except (json.JSONDecodeError, IOError):
-            # Si hay error al leer, inicializar con valores por defecto
-            tareas = []
-            contador_id = 1
+    """Recarga las tareas desde el almacenamiento persistente"""
+    obtener_backend().cargar()
+
+def listar_tareas():
+    """Devuelve todas las tareas en orden de inserción"""
+    return obtener_backend().listar()
+
+def listar_pagina(estado=None, despues_de=None, antes_de=None, limite=TAREAS_POR_PAGINA):
+    """
+    Devuelve una página de tareas usando paginación por cursor sobre el ID.
+
+    Args:
+        estado (str, optional): 'pendientes', 'completadas' o None para todas
+        despues_de (int, optional): Cursor de la página siguiente
+        antes_de (int, optional): Cursor de la página anterior
+        limite (int): Tareas por página
+
+    Returns:
+        dict: {'tareas': [...], 'siguiente': id o None, 'anterior': id o None}
+    """
+    completada = ESTADOS.get(estado)
+    # Se pide una tarea de más para saber si existe otra página en esa dirección
+    tareas = obtener_backend().pagina(completada, despues_de, antes_de, limite + 1)
+    if antes_de is not None:
+        hay_anterior = len(tareas) > limite
+        tareas = tareas[-limite:]
+        hay_siguiente = True
     else:
-        tareas = []
-        contador_id = 1
-
-def guardar_tareas():
-    """Guarda las tareas en el archivo JSON"""
-    try:
-        data = {
-            'tareas': tareas,
-            'contador_id': contador_id
-        }
-        with open(ARCHIVO_TAREAS, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except IOError:
-        # Si hay error al escribir, simplemente continuar
-        pass
+        hay_siguiente = len(tareas) > limite
+        tareas = tareas[:limite]
+        hay_anterior = despues_de is not None
+    return {
+        'tareas': tareas,
+        'siguiente': tareas[-1]['id'] if tareas and hay_siguiente else None,
+        'anterior': tareas[0]['id'] if tareas and hay_anterior else None,
+    }
+
+def obtener_tarea(id):
+    """Devuelve la tarea con ese ID, o None si no existe"""
+    return obtener_backend().obtener(id)
 
 def agregar_tarea(texto):
     """Agrega una nueva tarea a la lista con un ID incremental"""
-    global contador_id, tareas
-    nueva_tarea = {
-        'id': contador_id,
-        'texto': texto,
-        'completada': False
-    }
-    tareas.append(nueva_tarea)
-    contador_id += 1
-    guardar_tareas()  # Guardar después de agregar
-    return nueva_tarea
+    return obtener_backend().agregar(texto)
 
 def completar_tarea(id):
     """Marca una tarea como completada basándose en su ID"""
-    global tareas
-    for tarea in tareas:
-        if tarea['id'] == id:
-            tarea['completada'] = True
-            guardar_tareas()  # Guardar después de completar
-            return tarea
-    return None
+    return obtener_backend().completar(id)
+
+def version_tareas():
+    """Devuelve la versión actual de las tareas: {'etag': str, 'modificado': timestamp}"""
+    return obtener_backend().version()
+
+def agregar_tareas(textos):
+    """Agrega un lote de tareas en una sola transacción"""
+    return obtener_backend().agregar_varias(textos)
 
-# Cargar tareas al importar el módulo
-cargar_tareas()
+def completar_tareas(ids):
+    """Completa un lote de tareas en una sola transacción; ignora IDs inexistentes"""
+    return obtener_backend().completar_varias(ids)
 
+def importar_tareas(tareas, contador_id=None):
+    """Carga en bloque tareas con su ID, mayores que los existentes (importaciones, benchmarks)"""
+    return obtener_backend().importar_tareas(tareas, contador_id)
@@ -0,0 +1,255 @@
+"""
+Clasificación de archivos por tipo
+
+Las extensiones de TIPOS_ARCHIVO (y las del archivo de reglas del usuario)
+se compilan una vez en un diccionario extensión -> tipo: clasificar un
+archivo es una consulta por cada sufijo de su nombre ('.gz' y '.tar.gz'),
+sin recorrer las listas de cada tipo.
+
+Un archivo de reglas JSON puede añadir extensiones (también de varias
+partes) y reglas que se evalúan antes que las extensiones, en orden; gana la
+primera que se cumple:
+
+    {
+        "tipos": {
+            "Libros": [".epub", ".mobi"],
+            "Archivos_Comprimidos": [".tar.gz", ".tgz"]
+        },
+        "reglas": [
+            {"tipo": "Capturas", "patron": "Screenshot*.png"},
+            {"tipo": "Videos_Grandes", "extensiones": [".mp4", ".mkv"], "tamano_minimo": "1GB"},
+            {"tipo": "Antiguos", "antiguedad_minima_dias": 365}
+        ]
+    }
+
+Condiciones de una regla (todas deben cumplirse): patron (glob o lista de
+globs sobre el nombre, sin distinguir mayúsculas), extensiones,
+tamano_minimo / tamano_maximo (bytes o texto como "500MB") y
+antiguedad_minima_dias / antiguedad_maxima_dias (según la fecha de
+modificación). Solo se hace stat de un archivo si alguna regla lo necesita.
+
+El clasificador compilado se guarda en caché y solo se reconstruye si se
+pasa otro diccionario de tipos o cambia el archivo de reglas.
+"""
+
+import json
+import os
+import re
+import time
+from fnmatch import translate
+from pathlib import Path
+
+# Tipo de los archivos que no cumplen ninguna regla ni extensión
+TIPO_POR_DEFECTO = 'Otros'
+
+UNIDADES_TAMANO = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+CONDICIONES = ('patron', 'extensiones', 'tamano_minimo', 'tamano_maximo',
+               'antiguedad_minima_dias', 'antiguedad_maxima_dias')
+
+
+def ruta_reglas_por_defecto():
+    """Archivo de reglas del usuario: ~/.config/organizar_archivos/reglas.json"""
+    base = os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config'
+    return Path(base) / 'organizar_archivos' / 'reglas.json'
+
+
+def _bytes(valor):
+    """Tamaño en bytes a partir de un número o de un texto como '1.5GB'"""
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    coincidencia = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?B?)\s*', str(valor).upper())
+    if coincidencia is None:
+        raise ValueError(f"Tamaño no válido: {valor!r}")
+    return int(float(coincidencia.group(1)) * UNIDADES_TAMANO[coincidencia.group(2)])
+
+
+def _normalizar_extension(extension):
+    extension = extension.lower()
+    return extension if extension.startswith('.') else '.' + extension
+
+
+def _dias(definicion, clave):
+    """Antigüedad en segundos de una condición en días (None si la regla no la tiene)"""
+    if clave not in definicion:
+        return None
+    valor = definicion[clave]
+    # bool es subclase de int, pero "true" no es un número de días
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ValueError(f"{clave} debe ser un número de días: {valor!r}")
+    return valor * 24 * 60 * 60
+
+
+def _validar_tipo(tipo):
+    if not isinstance(tipo, str) or not tipo or tipo in ('.', '..') or '/' in tipo or os.sep in tipo:
+        raise ValueError(f"Nombre de tipo no válido: {tipo!r}")
+    return tipo
+
+
+class Regla:
+    """Una regla del archivo de reglas, con sus patrones ya compilados"""
+
+    __slots__ = ('tipo', 'patron', 'extensiones', 'tamano_minimo', 'tamano_maximo',
+                 'antiguedad_minima', 'antiguedad_maxima')
+
+    def __init__(self, definicion):
+        desconocidas = set(definicion) - {'tipo', *CONDICIONES}
+        if desconocidas:
+            raise ValueError(f"Condiciones desconocidas en una regla: {', '.join(sorted(desconocidas))}")
+        if not any(condicion in definicion for condicion in CONDICIONES):
+            raise ValueError(f"La regla del tipo {definicion.get('tipo')!r} no tiene condiciones")
+        self.tipo = _validar_tipo(definicion.get('tipo'))
+        patrones = definicion.get('patron')
+        if isinstance(patrones, str):
+            patrones = [patrones]
+        self.patron = None
+        if patrones:
+            self.patron = re.compile('|'.join(translate(patron.lower()) for patron in patrones))
+        extensiones = definicion.get('extensiones')
+        self.extensiones = None if extensiones is None else tuple(_normalizar_extension(e) for e in extensiones)
+        self.tamano_minimo = _bytes(definicion['tamano_minimo']) if 'tamano_minimo' in definicion else None
+        self.tamano_maximo = _bytes(definicion['tamano_maximo']) if 'tamano_maximo' in definicion else None
+        self.antiguedad_minima = _dias(definicion, 'antiguedad_minima_dias')
+        self.antiguedad_maxima = _dias(definicion, 'antiguedad_maxima_dias')
+
+    @property
+    def necesita_estado(self):
+        return any(limite is not None for limite in (self.tamano_minimo, self.tamano_maximo,
+                                                     self.antiguedad_minima, self.antiguedad_maxima))
+
+    def cumple(self, nombre, obtener_estado, ahora):
+        """
+        Args:
+            nombre (str): Nombre del archivo en minúsculas
+            obtener_estado (callable): Devuelve el os.stat_result del archivo
+            ahora (float): Momento de referencia para la antigüedad
+        """
+        if self.patron is not None and self.patron.match(nombre) is None:
+            return False
+        if self.extensiones is not None and not nombre.endswith(self.extensiones):
+            return False
+        if not self.necesita_estado:
+            return True
+        estado = obtener_estado()
+        if self.tamano_minimo is not None and estado.st_size < self.tamano_minimo:
+            return False
+        if self.tamano_maximo is not None and estado.st_size > self.tamano_maximo:
+            return False
+        antiguedad = ahora - estado.st_mtime
+        if self.antiguedad_minima is not None and antiguedad < self.antiguedad_minima:
+            return False
+        if self.antiguedad_maxima is not None and antiguedad > self.antiguedad_maxima:
+            return False
+        return True
+
+
+class Clasificador:
+    """Reglas de clasificación compiladas"""
+
+    def __init__(self, tipos, reglas=None):
+        """
+        Args:
+            tipos (dict): Tipo -> lista de extensiones (como TIPOS_ARCHIVO);
+                si una extensión aparece en varios tipos, gana el primero
+            reglas (dict, optional): Contenido de un archivo de reglas
+        """
+        reglas = reglas or {}
+        self.extensiones = {}
+        self.tipos = [_validar_tipo(tipo) for tipo in tipos]
+        for tipo, extensiones in tipos.items():
+            for extension in extensiones:
+                self.extensiones.setdefault(_normalizar_extension(extension), tipo)
+        # Las extensiones del usuario reemplazan a las de TIPOS_ARCHIVO
+        for tipo, extensiones in reglas.get('tipos', {}).items():
+            self._agregar_tipo(tipo)
+            for extension in extensiones:
+                self.extensiones[_normalizar_extension(extension)] = tipo
+        self.reglas = [Regla(definicion) for definicion in reglas.get('reglas', [])]
+        for regla in self.reglas:
+            self._agregar_tipo(regla.tipo)
+        if TIPO_POR_DEFECTO not in self.tipos:
+            self.tipos.append(TIPO_POR_DEFECTO)
+        # Partes del sufijo más largo ('.tar.gz' son 2)
+        self.max_partes = max((extension.count('.') for extension in self.extensiones), default=1)
+
+    def _agregar_tipo(self, tipo):
+        if _validar_tipo(tipo) not in self.tipos:
+            self.tipos.append(tipo)
+
+    def tipo(self, nombre, obtener_estado=None):
+        """
+        Tipo de un archivo.
+
+        Args:
+            nombre (str): Nombre del archivo (sin carpeta)
+            obtener_estado (callable, optional): Devuelve su os.stat_result;
+                solo se llama si alguna regla depende del tamaño o la fecha
+
+        Returns:
+            str: Nombre de la carpeta de tipo correspondiente
+        """
+        nombre = nombre.lower()
+        if self.reglas:
+            ahora = time.time()
+            for regla in self.reglas:
+                if regla.necesita_estado and obtener_estado is None:
+                    continue
+                try:
+                    if regla.cumple(nombre, obtener_estado, ahora):
+                        return regla.tipo
+                except OSError:
+                    # Sin stat (el archivo ya no existe) la regla no se cumple
+                    continue
+        # Sufijos de más corto a más largo; gana el más largo conocido. Como
+        # en Path.suffix, un punto inicial ('.bashrc') no es una extensión
+        tipo = TIPO_POR_DEFECTO
+        fin = len(nombre)
+        for _ in range(self.max_partes):
+            inicio = nombre.rfind('.', 0, fin)
+            if inicio <= 0:
+                break
+            encontrado = self.extensiones.get(nombre[inicio:])
+            if encontrado is not None:
+                tipo = encontrado
+            fin = inicio
+        return tipo
+
+
+def leer_reglas(ruta):
+    """Contenido de un archivo de reglas JSON (ValueError si no es válido)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        try:
+            reglas = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Archivo de reglas no válido ({ruta}): {e}") from None
+    if not isinstance(reglas, dict) or set(reglas) - {'tipos', 'reglas'}:
+        raise ValueError(f"Archivo de reglas no válido ({ruta}): se esperaba un objeto con 'tipos' y/o 'reglas'")
+    return reglas
+
+
+# Último clasificador construido, con el diccionario de tipos y la firma del
+# archivo de reglas con que se construyó
+_cache = {'tipos': None, 'reglas': None, 'clasificador': None}
+
+
+def cargar_clasificador(tipos, ruta_reglas=None):
+    """
+    Clasificador para unos tipos y, opcionalmente, un archivo de reglas.
+
+    Se reutiliza mientras se pase el mismo diccionario de tipos (se compara
+    por identidad: compararlo entero en cada llamada costaba más que
+    clasificar el archivo) y no cambie el archivo de reglas (su fecha de
+    modificación y tamaño); un archivo de reglas que no existe se ignora.
+    """
+    firma_reglas = None
+    if ruta_reglas is not None:
+        try:
+            estado = os.stat(ruta_reglas)
+            firma_reglas = (str(ruta_reglas), estado.st_mtime_ns, estado.st_size)
+        except FileNotFoundError:
+            pass
+    if _cache['tipos'] is not tipos or _cache['reglas'] != firma_reglas or _cache['clasificador'] is None:
+        reglas = leer_reglas(ruta_reglas) if firma_reglas is not None else None
+        _cache['clasificador'] = Clasificador(tipos, reglas)
+        _cache['tipos'] = tipos
+        _cache['reglas'] = firma_reglas
+    return _cache['clasificador']
@@ -0,0 +1,242 @@
+"""
+Índice persistente de una carpeta organizada
+
+Guarda en SQLite lo que ya está organizado en cada carpeta de tipo (nombre,
+inodo, tamaño, mtime y, si se calcularon, las huellas del contenido) y los
+duplicados que se dejaron sin mover. En la siguiente ejecución:
+
+- Una carpeta de tipo cuyo mtime no cambió no se vuelve a listar: sus
+  nombres ocupados y sus huellas salen del índice.
+- Si cambió (alguien añadió, borró o renombró archivos), se lista de nuevo
+  y solo se hace stat de las entradas con un inodo nuevo.
+- Si la propia carpeta tampoco cambió desde una ejecución que la dejó
+  organizada, no hay nada nuevo y ni siquiera se lista.
+- Los duplicados ya omitidos se reconocen por (inodo, tamaño, mtime) sin
+  volver a leer su contenido.
+
+El mtime que se guarda de cada carpeta es el leído antes de listarla, y solo
+si no cambió durante la ejecución: un archivo que llega a mitad de una
+ejecución hace que la siguiente vuelva a listar la carpeta.
+
+El mtime de una carpeta no cambia si se edita un archivo existente sin
+renombrarlo; por eso, antes de usar una huella guardada para decidir que un
+archivo es duplicado, organizar_archivos comprueba con un stat que el
+archivo original sigue teniendo el mismo tamaño y mtime.
+"""
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS carpetas (
+    tipo TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS organizados (
+    tipo TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    inodo INTEGER NOT NULL,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    huella_parcial TEXT,
+    huella TEXT,
+    PRIMARY KEY (tipo, nombre)
+);
+CREATE TABLE IF NOT EXISTS omitidos (
+    inodo INTEGER NOT NULL,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    original TEXT NOT NULL,
+    original_tamano INTEGER NOT NULL,
+    original_mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (inodo, tamano, mtime_ns)
+);
+"""
+
+# Clave de la propia carpeta organizada en la tabla de carpetas
+RAIZ = '.'
+
+
+def ruta_indice_por_defecto(carpeta):
+    """
+    Índice de una carpeta en la caché del usuario (fuera de la carpeta, para
+    que no se organice a sí mismo): ~/.cache/organizar_archivos/<hash>.db
+    """
+    clave = hashlib.sha1(str(Path(carpeta).resolve()).encode('utf-8')).hexdigest()[:16]
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'organizar_archivos' / f'{clave}.db'
+
+
+def firma(estado):
+    """(inodo, tamaño, mtime_ns) de un os.stat_result"""
+    return estado.st_ino, estado.st_size, estado.st_mtime_ns
+
+
+def fila_de(estado, huellas=None):
+    """Fila del índice para un archivo a partir de su stat y, si se conocen, sus huellas"""
+    huellas = huellas or {}
+    inodo, tamano, mtime_ns = firma(estado)
+    return {'inodo': inodo, 'tamano': tamano, 'mtime_ns': mtime_ns,
+            'huella_parcial': huellas.get('huella_parcial'), 'huella': huellas.get('huella')}
+
+
+class IndiceOrganizacion:
+    """
+    Índice SQLite de una carpeta organizada.
+
+    Todos los cambios de una ejecución se confirman juntos con guardar(); en
+    modo simulación nunca se escribe nada (ni siquiera se crea el archivo).
+    """
+
+    def __init__(self, ruta, simular=False):
+        """
+        Args:
+            ruta (str | Path): Archivo SQLite del índice
+            simular (bool): Leer el índice sin modificarlo
+        """
+        self.ruta = Path(ruta)
+        self.simular = simular
+        if simular and not self.ruta.exists():
+            self.conexion = sqlite3.connect(':memory:')
+        else:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self.conexion = sqlite3.connect(str(self.ruta))
+        self.conexion.executescript(ESQUEMA)
+        # mtime de cada carpeta leído antes de listarla en esta ejecución
+        self.mtimes_iniciales = {}
+
+    def archivos(self, raiz, tipo):
+        """
+        Archivos organizados en la carpeta de un tipo.
+
+        Returns:
+            dict: Nombre -> {'inodo', 'tamano', 'mtime_ns', 'huella_parcial', 'huella'}
+                (vacío si la carpeta no existe)
+        """
+        carpeta = Path(raiz) / tipo
+        try:
+            mtime_carpeta = os.stat(carpeta).st_mtime_ns
+            self.mtimes_iniciales[tipo] = mtime_carpeta
+        except FileNotFoundError:
+            self.conexion.execute('DELETE FROM organizados WHERE tipo = ?', (tipo,))
+            self.conexion.execute('DELETE FROM carpetas WHERE tipo = ?', (tipo,))
+            return {}
+
+        filas = {
+            nombre: {'inodo': inodo, 'tamano': tamano, 'mtime_ns': mtime_ns,
+                     'huella_parcial': huella_parcial, 'huella': huella}
+            for nombre, inodo, tamano, mtime_ns, huella_parcial, huella in self.conexion.execute(
+                'SELECT nombre, inodo, tamano, mtime_ns, huella_parcial, huella '
+                'FROM organizados WHERE tipo = ?', (tipo,)
+            )
+        }
+        guardado = self.conexion.execute('SELECT mtime_ns FROM carpetas WHERE tipo = ?', (tipo,)).fetchone()
+        if guardado is not None and guardado[0] == mtime_carpeta:
+            return filas
+
+        # La carpeta cambió fuera del organizador: volver a listarla
+        actuales = {}
+        with os.scandir(carpeta) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                fila = filas.get(entrada.name)
+                if fila is None or fila['inodo'] != entrada.inode():
+                    fila = fila_de(entrada.stat())
+                actuales[entrada.name] = fila
+        self.conexion.execute('DELETE FROM organizados WHERE tipo = ?', (tipo,))
+        self.conexion.executemany(
+            'INSERT INTO organizados (tipo, nombre, inodo, tamano, mtime_ns, huella_parcial, huella) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(tipo, nombre, f['inodo'], f['tamano'], f['mtime_ns'], f['huella_parcial'], f['huella'])
+             for nombre, f in actuales.items()]
+        )
+        return actuales
+
+    def registrar(self, tipo, nombre, fila):
+        """Anota (o actualiza) un archivo de la carpeta de un tipo; fila como en archivos()"""
+        self.conexion.execute(
+            'INSERT OR REPLACE INTO organizados '
+            '(tipo, nombre, inodo, tamano, mtime_ns, huella_parcial, huella) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (tipo, nombre, fila['inodo'], fila['tamano'], fila['mtime_ns'],
+             fila.get('huella_parcial'), fila.get('huella'))
+        )
+
+    def omitido(self, estado):
+        """
+        Original de un duplicado ya omitido en otra ejecución, o None si no
+        lo era o si el original ya no existe o cambió desde entonces
+        """
+        fila = self.conexion.execute(
+            'SELECT original, original_tamano, original_mtime_ns FROM omitidos '
+            'WHERE inodo = ? AND tamano = ? AND mtime_ns = ?', firma(estado)
+        ).fetchone()
+        if fila is None:
+            return None
+        original, tamano, mtime_ns = fila
+        try:
+            estado_original = os.stat(original)
+        except OSError:
+            return None
+        if (estado_original.st_size, estado_original.st_mtime_ns) != (tamano, mtime_ns):
+            return None
+        return original
+
+    def registrar_omitido(self, estado, original):
+        """Anota un duplicado que se dejó sin mover y el estado actual de su original"""
+        estado_original = os.stat(original)
+        self.conexion.execute(
+            'INSERT OR REPLACE INTO omitidos '
+            '(inodo, tamano, mtime_ns, original, original_tamano, original_mtime_ns) VALUES (?, ?, ?, ?, ?, ?)',
+            (*firma(estado), str(original), estado_original.st_size, estado_original.st_mtime_ns)
+        )
+
+    def sin_cambios(self, raiz):
+        """
+        True si la carpeta no cambió desde una ejecución que la dejó
+        completamente organizada (ver marcar_carpetas).
+
+        Hay que llamarlo antes de listar la carpeta: el mtime que lee es el
+        que marcar_carpetas guardará si la carpeta no cambia durante la ejecución.
+        """
+        mtime_carpeta = os.stat(raiz).st_mtime_ns
+        self.mtimes_iniciales[RAIZ] = mtime_carpeta
+        guardado = self.conexion.execute('SELECT mtime_ns FROM carpetas WHERE tipo = ?', (RAIZ,)).fetchone()
+        return guardado is not None and guardado[0] == mtime_carpeta
+
+    def marcar_carpetas(self, raiz, tipos, completa=False):
+        """
+        Da por sincronizadas con el índice las carpetas de tipo y, si quedó
+        completamente organizada (sin errores ni duplicados pendientes), la
+        propia carpeta.
+
+        Se guarda el mtime leído antes de listar cada carpeta, y solo si no
+        cambió durante la ejecución: un archivo que llega mientras tanto (o
+        los que movió esta misma ejecución) hace que la siguiente vuelva a
+        listarla en lugar de darlo por visto.
+        """
+        for tipo in [*tipos, RAIZ]:
+            inicial = self.mtimes_iniciales.get(tipo)
+            try:
+                actual = os.stat(Path(raiz) / tipo).st_mtime_ns
+            except FileNotFoundError:
+                actual = None
+            if (tipo != RAIZ or completa) and inicial is not None and actual == inicial:
+                self.conexion.execute(
+                    'INSERT OR REPLACE INTO carpetas (tipo, mtime_ns) VALUES (?, ?)', (tipo, inicial)
+                )
+            else:
+                self.conexion.execute('DELETE FROM carpetas WHERE tipo = ?', (tipo,))
+
+    def guardar(self):
+        """Confirma los cambios de la ejecución (no hace nada al simular)"""
+        if self.simular:
+            self.conexion.rollback()
+        else:
+            self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.rollback()
+        self.conexion.close()
@@ -3,9 +3,25 @@ Script para organizar archivos en una carpeta
 Distribuye archivos en subcarpetas según su tipo/extensión
 """
 
+import argparse
+import errno
+import hashlib
+import json
 import os
-from pathlib import Path
 import shutil
+import signal
+import stat
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from queue import Queue
+
+from clasificacion import cargar_clasificador, ruta_reglas_por_defecto
+from indice_organizacion import IndiceOrganizacion, fila_de, ruta_indice_por_defecto
+from vigilancia import crear_observador
 
 # Carpeta objetivo: Downloads del usuario
 carpeta_objetivo = Path.home() / "Downloads"
@@ -22,124 +38,1108 @@ TIPOS_ARCHIVO = {
     'Otros': []  # Para archivos sin extensión o extensiones no reconocidas
 }
 
+# Movimientos simultáneos: en discos de red la latencia de cada operación
+# domina, así que varios hilos solapan las esperas
+HILOS_POR_DEFECTO = 8
+# Movimientos pendientes por hilo: limita la memoria con cientos de miles de archivos
+PENDIENTES_POR_HILO = 4
+
+# Qué hacer con los archivos idénticos a otro ya organizado (o a otro de la
+# misma carpeta): dejarlos donde están o crear un enlace duro al original
+MODOS_DUPLICADOS = ('omitir', 'enlazar')
+# Los archivos se leen por bloques para calcular su huella; primero solo el
+# principio, y el archivo completo solo si el principio coincide
+TAMANO_BLOQUE_HUELLA = 1024 * 1024
+BYTES_HUELLA_PARCIAL = 64 * 1024
+
+# Vigilancia: los archivos que llegan se organizan juntos cuando pasan
+# ESPERA_VIGILANCIA segundos sin que llegue otro, y como mucho tras
+# ESPERA_MAXIMA_VIGILANCIA segundos aunque sigan llegando
+ESPERA_VIGILANCIA = 2.0
+ESPERA_MAXIMA_VIGILANCIA = 30.0
+
+# Organización recursiva: las etapas se pasan los archivos en lotes (pasar
+# uno a uno cuesta un cambio de hilo por archivo) y cada cola admite unos
+# pocos lotes, así que la memoria no crece con el tamaño del árbol
+TAMANO_LOTE = 256
+LOTES_POR_COLA = 8
+MAXIMO_ERRORES_DETALLE = 100
 
-def obtener_tipo_archivo(archivo):
+# En Windows y macOS el sistema de archivos por defecto no distingue
+# mayúsculas: 'Foto.jpg' y 'foto.jpg' son el mismo nombre
+if sys.platform in ('win32', 'darwin'):
+    def _clave_nombre(nombre):
+        return nombre.lower()
+else:
+    def _clave_nombre(nombre):
+        return nombre
+
+
+def obtener_tipo_archivo(archivo, clasificador=None):
     """
     Determina el tipo de archivo basándose en su extensión.
     
     Args:
         archivo (Path): Ruta al archivo
+        clasificador (Clasificador, optional): Reglas compiladas (ver
+            clasificacion). Si es None, solo se usa TIPOS_ARCHIVO
         
     Returns:
         str: Nombre de la carpeta de tipo correspondiente
     """
-    extension = archivo.suffix.lower()
+    if clasificador is None:
+        clasificador = cargar_clasificador(TIPOS_ARCHIVO)
+    # El stat solo se hace si alguna regla depende del tamaño o la fecha
+    return clasificador.tipo(archivo.name, lambda: os.stat(archivo))
+
+
+class EntradaArchivo:
+    """
+    Archivo conocido por su nombre, con la misma interfaz que os.DirEntry
+    (name, path, stat(), is_file(), inode()) pero sin listar la carpeta.
+    """
+    
+    __slots__ = ('name', 'path', '_estado')
+    
+    def __init__(self, carpeta, nombre):
+        self.name = nombre
+        self.path = os.path.join(carpeta, nombre)
+        self._estado = None
     
-    for tipo, extensiones in TIPOS_ARCHIVO.items():
-        if extension in extensiones:
-            return tipo
+    def stat(self):
+        if self._estado is None:
+            self._estado = os.stat(self.path)
+        return self._estado
     
-    # Si no coincide con ningún tipo conocido, va a "Otros"
-    return 'Otros'
+    def is_file(self):
+        try:
+            return stat.S_ISREG(self.stat().st_mode)
+        except OSError:
+            return False
+    
+    def inode(self):
+        return self.stat().st_ino
 
 
-def organizar_archivos(carpeta_origen=None):
+def escanear_archivos(carpeta, nombres=None):
     """
-    Organiza los archivos de una carpeta en subcarpetas según su tipo.
+    Archivos del primer nivel de una carpeta.
+    
+    os.scandir obtiene el tipo de cada entrada al leer el directorio, así que
+    distinguir archivos de carpetas no necesita un stat por archivo.
     
     Args:
-        carpeta_origen (Path, optional): Carpeta a organizar. Si es None, usa carpeta_objetivo
+        carpeta (Path): Carpeta a recorrer
+        nombres (iterable, optional): Revisar solo estos nombres (los que
+            existan y sean archivos) en lugar de listar la carpeta
+        
+    Yields:
+        os.DirEntry | EntradaArchivo: Una entrada por archivo
     """
-    if carpeta_origen is None:
-        carpeta_origen = carpeta_objetivo
-    
-    # Verificar que la carpeta existe
-    if not carpeta_origen.exists():
-        print(f"Error: La carpeta {carpeta_origen} no existe.")
+    if nombres is not None:
+        for nombre in sorted(nombres):
+            entrada = EntradaArchivo(carpeta, nombre)
+            if entrada.is_file():
+                yield entrada
         return
+    with os.scandir(carpeta) as entradas:
+        for entrada in entradas:
+            if entrada.is_file():
+                yield entrada
+
+
+class CarpetasDestino:
+    """
+    Carpetas de destino de una organización y nombres ya ocupados en cada una.
     
-    if not carpeta_origen.is_dir():
-        print(f"Error: {carpeta_origen} no es una carpeta.")
-        return
+    Cada carpeta se crea y se lista una sola vez; después, elegir un nombre
+    libre es una consulta a un conjunto en memoria en lugar de un exists()
+    por intento. Como los nombres se reservan antes de mover, varios hilos
+    pueden mover a la vez sin pisarse.
+    """
     
-    print(f"Organizando archivos en: {carpeta_origen}")
-    print("=" * 60)
+    def __init__(self, raiz, ocupados=None, simular=False):
+        """
+        Args:
+            raiz (Path): Carpeta donde se crean las carpetas de cada tipo
+            ocupados (dict, optional): Tipo -> nombres ya ocupados (por
+                ejemplo, los del índice); esas carpetas no se listan
+            simular (bool): No crear carpetas (para calcular un plan)
+        """
+        self.raiz = raiz
+        self.simular = simular
+        self.ocupados = {}
+        # Carpetas ya creadas (o comprobadas) en esta ejecución
+        self._creadas = set()
+        # Siguiente número a probar para cada nombre repetido: con muchos
+        # archivos del mismo nombre no se vuelve a empezar desde _1
+        self._contadores = {}
+        self._rutas = {}
+        for tipo, nombres in (ocupados or {}).items():
+            self.ocupados[tipo] = {_clave_nombre(nombre) for nombre in nombres}
+    
+    def _ocupados(self, tipo):
+        ocupados = self.ocupados.get(tipo)
+        if ocupados is None:
+            carpeta = self.raiz / tipo
+            if not self.simular:
+                carpeta.mkdir(exist_ok=True)
+            try:
+                with os.scandir(carpeta) as entradas:
+                    ocupados = {_clave_nombre(entrada.name) for entrada in entradas}
+            except FileNotFoundError:
+                # Solo al simular: la carpeta se crearía vacía
+                ocupados = set()
+            self.ocupados[tipo] = ocupados
+        elif not self.simular and tipo not in self._creadas:
+            (self.raiz / tipo).mkdir(exist_ok=True)
+        self._creadas.add(tipo)
+        return ocupados
+    
+    def reservar(self, tipo, nombre):
+        """
+        Reserva un nombre libre para un archivo en la carpeta de su tipo.
+        
+        Si ya existe un archivo con el mismo nombre, agrega un número
+        (archivo_1.pdf, archivo_2.pdf, ...).
+        
+        Returns:
+            Path: Ruta de destino reservada
+        """
+        ocupados = self._ocupados(tipo)
+        destino = nombre
+        if _clave_nombre(destino) in ocupados:
+            clave = (tipo, _clave_nombre(nombre))
+            contador = self._contadores.get(clave, 1)
+            nombre_base, extension = os.path.splitext(nombre)
+            while _clave_nombre(destino) in ocupados:
+                destino = f"{nombre_base}_{contador}{extension}"
+                contador += 1
+            self._contadores[clave] = contador
+        ocupados.add(_clave_nombre(destino))
+        return self._carpeta(tipo) / destino
+    
+    def _carpeta(self, tipo):
+        carpeta = self._rutas.get(tipo)
+        if carpeta is None:
+            carpeta = self._rutas[tipo] = self.raiz / tipo
+        return carpeta
+
+
+def mover_archivo(origen, destino):
+    """
+    Mueve un archivo con rename; solo si origen y destino están en
+    dispositivos distintos, copia y borra (shutil.move).
+    """
+    try:
+        os.rename(origen, destino)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(origen, destino)
+
+
+def _resultado(futuro):
+    error = futuro.exception()
+    return (None, error) if error is not None else (futuro.result(), None)
+
+
+def ejecutar_en_hilos(funcion, tareas, hilos=HILOS_POR_DEFECTO):
+    """
+    Ejecuta funcion(*tarea) para cada tarea en un pool de hilos.
+    
+    Solo se envían al pool hilos * PENDIENTES_POR_HILO tareas a la vez, así
+    que las tareas pueden venir de un generador sin cargarse todas en memoria.
+    
+    Yields:
+        tuple: (tarea, resultado, excepción o None) en orden de finalización
+    """
+    maximo_pendientes = max(1, hilos) * PENDIENTES_POR_HILO
+    with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+        pendientes = {}
+        for tarea in tareas:
+            if len(pendientes) >= maximo_pendientes:
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    yield (pendientes.pop(futuro), *_resultado(futuro))
+            pendientes[pool.submit(funcion, *tarea)] = tarea
+        while pendientes:
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                yield (pendientes.pop(futuro), *_resultado(futuro))
+
+
+def huella_archivo(ruta, limite=None):
+    """
+    Huella BLAKE2 del contenido de un archivo, leído por bloques.
+    
+    Args:
+        ruta (str): Ruta del archivo
+        limite (int, optional): Leer solo los primeros `limite` bytes
+        
+    Returns:
+        str: Huella en hexadecimal
+    """
+    huella = hashlib.blake2b(digest_size=20)
+    restante = limite
+    with open(ruta, 'rb') as f:
+        while restante is None or restante > 0:
+            bloque = f.read(TAMANO_BLOQUE_HUELLA if restante is None else min(TAMANO_BLOQUE_HUELLA, restante))
+            if not bloque:
+                break
+            huella.update(bloque)
+            if restante is not None:
+                restante -= len(bloque)
+    return huella.hexdigest()
+
+
+def agrupar_por_contenido(candidatos, hilos=HILOS_POR_DEFECTO, huellas=None):
+    """
+    Agrupa los archivos con contenido idéntico.
+    
+    Solo se leen los archivos cuyo tamaño coincide con el de otro: primero
+    su comienzo y, si también coincide, el archivo completo. Las lecturas se
+    reparten en un pool de hilos. Los archivos vacíos no se agrupan.
+    
+    Args:
+        candidatos (list): Tuplas (ruta, tamaño) en orden de preferencia
+        hilos (int): Lecturas simultáneas
+        huellas (dict, optional): Ruta -> {'huella_parcial', 'huella'} ya
+            conocidas (no se vuelven a leer); se completa con las calculadas
+        
+    Returns:
+        list: Grupos (listas de rutas, en el orden de candidatos) de dos o
+            más archivos idénticos
+    """
+    huellas = {} if huellas is None else huellas
+    por_tamano = defaultdict(list)
+    for ruta, tamano in candidatos:
+        if tamano > 0:
+            por_tamano[tamano].append(ruta)
+    grupos = [(tamano, rutas) for tamano, rutas in por_tamano.items() if len(rutas) > 1]
+    
+    def refinar(grupos, clave, limite):
+        tareas = [
+            (ruta, limite) for _, rutas in grupos for ruta in rutas
+            if huellas.get(ruta, {}).get(clave) is None
+        ]
+        # Un archivo que no se puede leer no se considera duplicado de nada
+        for (ruta, _), huella, error in ejecutar_en_hilos(huella_archivo, tareas, hilos):
+            if error is None:
+                huellas.setdefault(ruta, {})[clave] = huella
+        refinados = []
+        for tamano, rutas in grupos:
+            por_huella = defaultdict(list)
+            for ruta in rutas:
+                huella = huellas.get(ruta, {}).get(clave)
+                if huella is not None:
+                    por_huella[huella].append(ruta)
+            refinados.extend((tamano, iguales) for iguales in por_huella.values() if len(iguales) > 1)
+        return refinados
+    
+    grupos = refinar(grupos, 'huella_parcial', BYTES_HUELLA_PARCIAL)
+    # Los archivos pequeños ya se leyeron completos en la primera pasada
+    pequenos = [rutas for tamano, rutas in grupos if tamano <= BYTES_HUELLA_PARCIAL]
+    grandes = refinar([grupo for grupo in grupos if grupo[0] > BYTES_HUELLA_PARCIAL], 'huella', None)
+    return pequenos + [rutas for _, rutas in grandes]
+
+
+def buscar_duplicados(carpeta_origen, entradas, hilos=HILOS_POR_DEFECTO, organizados=None, huellas=None,
+                      tipos=None):
+    """
+    Archivos por organizar idénticos a uno ya organizado o a otro anterior.
+    
+    Args:
+        carpeta_origen (Path): Carpeta que se organiza
+        entradas (list): Entradas (os.DirEntry) de los archivos por organizar
+        hilos (int): Lecturas simultáneas
+        organizados (dict, optional): Tipo -> {nombre: fila} del índice
+            (ver IndiceOrganizacion.archivos). Si se da, las carpetas de tipo
+            no se listan y se reutilizan las huellas guardadas
+        huellas (dict, optional): Ruta -> huellas de los archivos por
+            organizar; se completa con las que se calculen
+        tipos (iterable, optional): Carpetas de tipo (default: las de TIPOS_ARCHIVO)
+        
+    Returns:
+        tuple: (dict ruta del duplicado -> ruta del original que se conserva
+            (un archivo ya organizado si lo hay, o el primero de la carpeta),
+            lista de (tipo, nombre) de las filas de `organizados` revisadas)
+    """
+    huellas = {} if huellas is None else huellas
+    # Los archivos ya organizados van primero: si hay uno igual, es el original
+    candidatos = []
+    del_indice = {}
+    if organizados is None:
+        for tipo in TIPOS_ARCHIVO if tipos is None else tipos:
+            carpeta = carpeta_origen / tipo
+            if carpeta.is_dir():
+                candidatos.extend((entrada.path, entrada.stat().st_size) for entrada in escanear_archivos(carpeta))
+    else:
+        for tipo, filas in organizados.items():
+            carpeta = os.path.join(carpeta_origen, tipo)
+            for nombre, fila in filas.items():
+                ruta = os.path.join(carpeta, nombre)
+                candidatos.append((ruta, fila['tamano']))
+                del_indice[ruta] = (tipo, nombre, fila)
+    por_organizar = set()
+    for entrada in entradas:
+        try:
+            candidatos.append((entrada.path, entrada.stat().st_size))
+        except OSError:
+            continue
+        por_organizar.add(entrada.path)
+    
+    comprobadas = []
+    if del_indice:
+        # Un archivo organizado puede haberse editado sin que cambie el mtime
+        # de su carpeta: los que pueden ser originales de un duplicado (su
+        # tamaño se repite) se comprueban antes de fiarse de sus huellas
+        repetidos = defaultdict(int)
+        for _, tamano in candidatos:
+            repetidos[tamano] += 1
+        vigentes = []
+        for ruta, tamano in candidatos:
+            if ruta in del_indice and repetidos[tamano] > 1:
+                tipo, nombre, fila = del_indice[ruta]
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue
+                comprobadas.append((tipo, nombre, fila, dict(fila)))
+                if (estado.st_size, estado.st_mtime_ns) != (fila['tamano'], fila['mtime_ns']):
+                    fila.update(fila_de(estado))
+                    tamano = estado.st_size
+                huellas[ruta] = fila
+            vigentes.append((ruta, tamano))
+        candidatos = vigentes
+    
+    originales = {}
+    for rutas in agrupar_por_contenido(candidatos, hilos, huellas):
+        for ruta in rutas[1:]:
+            if ruta in por_organizar:
+                originales[ruta] = rutas[0]
+    # Filas del índice cuyo estado cambió o con huellas nuevas
+    revisadas = [(tipo, nombre) for tipo, nombre, fila, antes in comprobadas if fila != antes]
+    return originales, revisadas
+
+
+class _Etapa:
+    """
+    Elementos procesados, duración y tiempo bloqueado en las colas de una
+    etapa del pipeline. La etapa que menos espera es el cuello de botella.
+    """
+    
+    def __init__(self):
+        self.elementos = 0
+        self.inicio = None
+        self.fin = None
+        self.espera = 0.0
+        self._cerrojo = threading.Lock()
+    
+    def poner(self, cola, elemento):
+        inicio = time.perf_counter()
+        cola.put(elemento)
+        self._esperado(time.perf_counter() - inicio)
+    
+    def tomar(self, cola):
+        inicio = time.perf_counter()
+        elemento = cola.get()
+        self._esperado(time.perf_counter() - inicio)
+        return elemento
+    
+    def _esperado(self, segundos):
+        with self._cerrojo:
+            self.espera += segundos
+    
+    def empezar(self):
+        with self._cerrojo:
+            if self.inicio is None:
+                self.inicio = time.perf_counter()
+    
+    def terminar(self, elementos):
+        with self._cerrojo:
+            self.elementos += elementos
+            self.fin = time.perf_counter()
+    
+    def resumen(self):
+        segundos = self.fin - self.inicio if self.inicio is not None and self.fin is not None else 0.0
+        return {
+            'elementos': self.elementos,
+            'segundos': segundos,
+            'por_segundo': self.elementos / segundos if segundos > 0 else None,
+            # Sumado entre los hilos de la etapa
+            'espera_segundos': self.espera,
+        }
+
+
+def recorrer_archivos(raiz, tipos, recursivo=True):
+    """
+    Archivos de una carpeta y, si es recursivo, de sus subcarpetas.
+    
+    Las carpetas de tipo del primer nivel (lo ya organizado) no se recorren,
+    ni se siguen enlaces simbólicos a carpetas. Se usa una pila explícita:
+    la memoria depende de las carpetas pendientes, no del número de archivos.
     
-    # Contador de archivos movidos
-    archivos_movidos = {tipo: 0 for tipo in TIPOS_ARCHIVO.keys()}
+    Args:
+        raiz (Path): Carpeta a recorrer
+        tipos (iterable): Nombres de las carpetas de tipo
+        recursivo (bool): Entrar en las subcarpetas
+        
+    Yields:
+        tuple: (os.DirEntry, None) por archivo, o (None, mensaje) por cada
+            carpeta que no se pudo leer
+    """
+    tipos = set(tipos)
+    pendientes = [str(raiz)]
+    while pendientes:
+        carpeta = pendientes.pop()
+        try:
+            with os.scandir(carpeta) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if recursivo and not (carpeta == str(raiz) and entrada.name in tipos):
+                            pendientes.append(entrada.path)
+                    elif entrada.is_file():
+                        yield entrada, None
+        except OSError as e:
+            yield None, f"No se pudo leer {carpeta}: {e}"
+
+
+def _raices_validas(raices):
+    """Raíces existentes, sin repetidas ni anidadas; y los errores encontrados"""
+    validas = []
     errores = []
+    for raiz in raices:
+        raiz = Path(raiz)
+        if not raiz.is_dir():
+            errores.append(f"La carpeta {raiz} no existe o no es una carpeta")
+            continue
+        resuelta = raiz.resolve()
+        if any(resuelta == otra or otra in resuelta.parents or resuelta in otra.parents for _, otra in validas):
+            errores.append(f"Se omite {raiz}: coincide con otra carpeta o está dentro de ella")
+            continue
+        validas.append((raiz, resuelta))
+    return [raiz for raiz, _ in validas], errores
+
+
+class _CarpetaOrganizada:
+    """Estado de una de las raíces de organizar_carpetas"""
+    
+    def __init__(self, raiz, destinos, registro=None):
+        self.raiz = raiz
+        self.destinos = destinos
+        self.registro = registro
+        # Rutas del propio índice, si está dentro de la carpeta
+        self.excluidos = set()
+        self._nombres_excluidos = set()
+        # Con duplicados: archivos ya recorridos, duplicado -> original y huellas
+        self.entradas = None
+        self.originales = {}
+        self.por_organizar = set()
+        self.huellas = {}
+        # Destino de cada archivo movido (para enlazar sus duplicados después)
+        self.movidos = {}
+        self.enlaces = []
+        self.omitidos = []
+        self.errores = 0
+    
+    def excluir(self, ruta):
+        ruta = os.path.abspath(ruta)
+        self.excluidos.add(ruta)
+        self._nombres_excluidos.add(os.path.basename(ruta))
+    
+    def excluido(self, entrada):
+        return (entrada.name in self._nombres_excluidos
+                and os.path.abspath(entrada.path) in self.excluidos)
+
+
+def _entradas_carpeta(raiz, tipos, recursivo, nombres=None):
+    """Como recorrer_archivos, pero solo con `nombres` si se indican"""
+    if nombres is None:
+        yield from recorrer_archivos(raiz, tipos, recursivo)
+        return
+    for entrada in escanear_archivos(raiz, nombres):
+        yield entrada, None
+
+
+def _preparar_carpeta(raiz, tipos, recursivo, hilos, simular, duplicados, ruta_indice, nombres):
+    """
+    Abre el índice de una raíz y, con duplicados, la recorre y busca los
+    archivos repetidos antes de mover nada.
+    
+    Returns:
+        _CarpetaOrganizada | None: None si el índice indica que la carpeta
+            no cambió desde una ejecución que la dejó organizada
+    """
+    registro = IndiceOrganizacion(ruta_indice, simular=simular) if ruta_indice is not None else None
+    if registro is not None and nombres is None and not recursivo and registro.sin_cambios(raiz):
+        registro.cerrar()
+        return None
+    organizados = None
+    if registro is not None:
+        organizados = {tipo: registro.archivos(raiz, tipo) for tipo in tipos}
+    carpeta = _CarpetaOrganizada(raiz, CarpetasDestino(raiz, ocupados=organizados, simular=simular), registro)
+    if registro is not None:
+        # El índice guardado dentro de la carpeta no se organiza
+        carpeta.excluir(registro.ruta)
+        carpeta.excluir(str(registro.ruta) + '-journal')
+    if not duplicados:
+        return carpeta
+    
+    # Detectar duplicados requiere conocer todos los tamaños antes de mover:
+    # la lista de archivos de la raíz se guarda en memoria
+    carpeta.entradas = [
+        (entrada, error) for entrada, error in _entradas_carpeta(raiz, tipos, recursivo, nombres)
+        if entrada is None or not carpeta.excluido(entrada)
+    ]
+    entradas = [entrada for entrada, _ in carpeta.entradas if entrada is not None]
+    if registro is not None and duplicados == 'omitir':
+        # Los duplicados omitidos en otra ejecución no se vuelven a leer
+        for entrada in entradas:
+            try:
+                original = registro.omitido(entrada.stat())
+            except OSError:
+                continue
+            if original is not None:
+                carpeta.originales[entrada.path] = original
+    carpeta.por_organizar = {entrada.path for entrada in entradas}
+    nuevos, revisadas = buscar_duplicados(
+        raiz, [entrada for entrada in entradas if entrada.path not in carpeta.originales],
+        hilos, organizados, carpeta.huellas, tipos
+    )
+    carpeta.originales.update(nuevos)
+    if registro is not None:
+        for tipo, nombre in revisadas:
+            registro.registrar(tipo, nombre, organizados[tipo][nombre])
+    return carpeta
+
+
+def organizar_carpetas(raices=None, recursivo=True, hilos=HILOS_POR_DEFECTO, simular=False,
+                       reglas=None, detalle=False, duplicados=None, indice=None, nombres=None):
+    """
+    Organiza varias carpetas (y, si es recursivo, todas sus subcarpetas).
+    
+    Cada archivo se mueve a la carpeta de su tipo dentro de la raíz de la
+    que procede. El trabajo se divide en tres etapas que se ejecutan a la
+    vez, conectadas por colas de LOTES_POR_COLA lotes de TAMANO_LOTE
+    archivos: recorrer carpetas, clasificar y reservar el nombre de destino
+    (un hilo), y mover (un pool de hilos). Las colas acotadas frenan a la etapa rápida si la siguiente
+    no da abasto, así que la memoria no crece con el número de archivos
+    (salvo con duplicados, que necesita la lista de archivos de cada raíz).
+    
+    El índice y la búsqueda de duplicados se preparan antes del pipeline y
+    el índice se actualiza en el hilo principal; los enlaces de los
+    duplicados se crean al final, cuando sus originales ya están en su sitio.
+    
+    Args:
+        raices (list, optional): Carpetas a organizar (default: [carpeta_objetivo])
+        recursivo (bool): Organizar también los archivos de las subcarpetas
+            (las subcarpetas se conservan, aunque queden vacías)
+        hilos (int): Movimientos simultáneos (default: HILOS_POR_DEFECTO)
+        simular (bool): Calcular el resultado sin crear carpetas, mover nada
+            ni modificar el índice
+        reglas (str | Path, optional): Archivo de reglas de clasificación
+        detalle (bool): Mostrar una línea por archivo
+        duplicados (str, optional): Si es 'omitir', los archivos idénticos a
+            otro no se mueven; si es 'enlazar', se organizan como un enlace
+            duro al original (sin ocupar espacio) y se borra la copia
+        indice (str | Path | callable, optional): Archivo SQLite con lo ya
+            organizado (ver indice_organizacion), solo con una raíz; o una
+            función raíz -> archivo, como ruta_indice_por_defecto
+        nombres (iterable, optional): Con una sola raíz y sin recursión,
+            organizar solo estos archivos del primer nivel sin listar la carpeta
+        
+    Returns:
+        dict: Resumen: raíces, archivos y bytes por tipo, totales, duplicados,
+            errores y elementos, duración y ritmo de cada etapa (ver imprimir_resumen)
+    """
+    if duplicados is not None and duplicados not in MODOS_DUPLICADOS:
+        raise ValueError(f"Modo de duplicados desconocido: {duplicados}")
+    inicio = time.perf_counter()
+    raices, errores = _raices_validas(raices or [carpeta_objetivo])
+    if nombres is not None and (recursivo or len(raices) > 1):
+        raise ValueError("nombres solo se admite con una carpeta y sin recursión")
+    if indice is not None and not callable(indice) and len(raices) > 1:
+        raise ValueError("Con varias carpetas, indice debe ser una función carpeta -> archivo")
+    total_errores = len(errores)
+    if detalle:
+        for error in errores:
+            print(f"✗ {error}")
+    clasificador = cargar_clasificador(TIPOS_ARCHIVO, reglas)
+    tipos = clasificador.tipos
+    
+    carpetas = []
+    sin_cambios = []
+    for raiz in raices:
+        ruta_indice = indice(raiz) if callable(indice) else indice
+        carpeta = _preparar_carpeta(raiz, tipos, recursivo, hilos, simular, duplicados, ruta_indice, nombres)
+        if carpeta is None:
+            sin_cambios.append(str(raiz))
+        else:
+            carpetas.append(carpeta)
+    
+    etapas = {nombre: _Etapa() for nombre in ('recorrer', 'clasificar', 'mover')}
+    hilos = max(1, hilos)
+    fin = object()
+    cola_archivos = Queue(LOTES_POR_COLA)
+    cola_movimientos = Queue(LOTES_POR_COLA)
+    cola_resultados = Queue(LOTES_POR_COLA * hilos)
+    
+    # Resultados: (carpeta, acción, origen, destino, tipo, tamaño, dato), con
+    # dato el mensaje de un error, el original de un duplicado o el stat del
+    # archivo movido (para el índice)
+    def recorrer():
+        etapa = etapas['recorrer']
+        etapa.empezar()
+        cantidad = 0
+        lote = []
+        try:
+            for carpeta in carpetas:
+                if carpeta.entradas is not None:
+                    entradas = carpeta.entradas
+                else:
+                    entradas = _entradas_carpeta(carpeta.raiz, tipos, recursivo, nombres)
+                for entrada, error in entradas:
+                    if error is not None:
+                        cola_resultados.put([(carpeta, 'error', None, None, None, None, error)])
+                        continue
+                    if carpeta.excluidos and carpeta.excluido(entrada):
+                        continue
+                    lote.append((carpeta, entrada))
+                    if len(lote) >= TAMANO_LOTE:
+                        etapa.poner(cola_archivos, lote)
+                        cantidad += len(lote)
+                        lote = []
+                # La lista ya no hace falta
+                carpeta.entradas = None
+        finally:
+            if lote:
+                etapa.poner(cola_archivos, lote)
+                cantidad += len(lote)
+            etapa.terminar(cantidad)
+            cola_archivos.put(fin)
+    
+    def clasificar():
+        etapa = etapas['clasificar']
+        etapa.empezar()
+        cantidad = 0
+        try:
+            while True:
+                lote = etapa.tomar(cola_archivos)
+                if lote is fin:
+                    break
+                movimientos = []
+                avisos = []
+                for carpeta, entrada in lote:
+                    try:
+                        tipo = clasificador.tipo(entrada.name, entrada.stat)
+                        original = carpeta.originales.get(entrada.path) if carpeta.originales else None
+                        if original is not None:
+                            if duplicados == 'enlazar':
+                                # Se enlaza al final, con el original ya movido
+                                carpeta.enlaces.append((entrada, tipo, original))
+                            else:
+                                carpeta.omitidos.append((entrada, original))
+                                avisos.append((carpeta, 'duplicado', entrada.path, None, tipo, None, original))
+                            continue
+                        destino = carpeta.destinos.reservar(tipo, entrada.name)
+                    except OSError as e:
+                        # Por ejemplo, sin permiso para crear la carpeta de tipo
+                        avisos.append((carpeta, 'error', entrada.path, None, None, None,
+                                       f"Error al clasificar {entrada.path}: {e}"))
+                        continue
+                    movimientos.append((carpeta, entrada, destino, tipo))
+                cantidad += len(lote)
+                if avisos:
+                    etapa.poner(cola_resultados, avisos)
+                etapa.poner(cola_movimientos, movimientos)
+        finally:
+            etapa.terminar(cantidad)
+            for _ in range(hilos):
+                cola_movimientos.put(fin)
+    
+    def mover():
+        etapa = etapas['mover']
+        etapa.empezar()
+        cantidad = 0
+        try:
+            while True:
+                lote = etapa.tomar(cola_movimientos)
+                if lote is fin:
+                    break
+                resultados = []
+                for carpeta, entrada, destino, tipo in lote:
+                    try:
+                        tamano = entrada.stat().st_size
+                        estado = None
+                        if not simular:
+                            mover_archivo(entrada.path, destino)
+                            if carpeta.registro is not None:
+                                # Estado del archivo ya movido (con shutil.move el inodo cambia)
+                                estado = os.stat(destino)
+                        resultados.append((carpeta, 'movido', entrada.path, destino, tipo, tamano, estado))
+                    except OSError as e:
+                        resultados.append((carpeta, 'error', entrada.path, destino, tipo, None,
+                                           f"Error al mover {entrada.path}: {e}"))
+                cantidad += len(lote)
+                etapa.poner(cola_resultados, resultados)
+        finally:
+            etapa.terminar(cantidad)
+            cola_resultados.put(fin)
+    
+    trabajadores = [threading.Thread(target=recorrer, daemon=True), threading.Thread(target=clasificar, daemon=True)]
+    trabajadores += [threading.Thread(target=mover, daemon=True) for _ in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    
+    por_tipo = defaultdict(lambda: {'archivos': 0, 'bytes': 0})
+    numero_duplicados = 0
+    
+    def anotar_error(carpeta, error):
+        nonlocal total_errores
+        total_errores += 1
+        carpeta.errores += 1
+        if len(errores) < MAXIMO_ERRORES_DETALLE:
+            errores.append(error)
+        if detalle:
+            print(f"✗ {error}")
     
-    # Iterar sobre todos los archivos en la carpeta
-    for item in carpeta_origen.iterdir():
-        # Solo procesar archivos, no carpetas
-        if item.is_file():
-            tipo = obtener_tipo_archivo(item)
-            
-            # Crear la carpeta de destino si no existe
-            carpeta_destino = carpeta_origen / tipo
-            carpeta_destino.mkdir(exist_ok=True)
-            
-            # Ruta completa del archivo de destino
-            archivo_destino = carpeta_destino / item.name
-            
-            # Verificar si ya existe un archivo con el mismo nombre
-            if archivo_destino.exists():
-                # Agregar número al nombre si ya existe
-                contador = 1
-                nombre_base = item.stem
-                extension = item.suffix
-                while archivo_destino.exists():
-                    nuevo_nombre = f"{nombre_base}_{contador}{extension}"
-                    archivo_destino = carpeta_destino / nuevo_nombre
-                    contador += 1
-            
+    # El hilo principal acumula los resultados y es el único que usa el índice
+    terminados = 0
+    while terminados < hilos:
+        lote = cola_resultados.get()
+        if lote is fin:
+            terminados += 1
+            continue
+        for carpeta, accion, origen, destino, tipo, tamano, dato in lote:
+            if accion == 'error':
+                anotar_error(carpeta, dato)
+                continue
+            if accion == 'duplicado':
+                numero_duplicados += 1
+                if detalle:
+                    print(f"= {os.path.relpath(origen, carpeta.raiz)} "
+                          f"(duplicado de {os.path.relpath(dato, carpeta.raiz)})")
+                continue
+            por_tipo[tipo]['archivos'] += 1
+            por_tipo[tipo]['bytes'] += tamano
+            if duplicados:
+                carpeta.movidos[origen] = destino
+            if dato is not None:
+                carpeta.registro.registrar(tipo, destino.name, fila_de(dato, carpeta.huellas.get(origen)))
+            if detalle:
+                flecha = '→' if simular else '✓'
+                print(f"{flecha} {os.path.relpath(origen, carpeta.raiz)} → {tipo}/{destino.name}")
+    for trabajador in trabajadores:
+        trabajador.join()
+    
+    for carpeta in carpetas:
+        # Los enlaces se crean cuando los originales ya están en su sitio
+        for entrada, tipo, original in carpeta.enlaces:
+            numero_duplicados += 1
+            nombre = os.path.relpath(entrada.path, carpeta.raiz)
+            if original in carpeta.por_organizar:
+                # El original era un archivo por organizar: ahora está en su destino
+                original = carpeta.movidos.get(original)
+            if original is None:
+                anotar_error(carpeta, f"No se enlazó {entrada.path}: no se pudo mover el original")
+                continue
+            try:
+                tamano = entrada.stat().st_size
+                destino = carpeta.destinos.reservar(tipo, entrada.name)
+                if not simular:
+                    os.link(original, destino)
+                    os.remove(entrada.path)
+                    if carpeta.registro is not None:
+                        carpeta.registro.registrar(
+                            tipo, destino.name, fila_de(os.stat(destino), carpeta.huellas.get(entrada.path))
+                        )
+            except OSError as e:
+                anotar_error(carpeta, f"Error al enlazar {entrada.path}: {e}")
+                continue
+            por_tipo[tipo]['archivos'] += 1
+            por_tipo[tipo]['bytes'] += tamano
+            if detalle:
+                print(f"⇔ {nombre} → {tipo}/{destino.name} (enlace a {os.path.basename(original)})")
+        
+        registro = carpeta.registro
+        if registro is None:
+            continue
+        for entrada, original in carpeta.omitidos:
             try:
-                # Mover el archivo
-                shutil.move(str(item), str(archivo_destino))
-                archivos_movidos[tipo] += 1
-                print(f"✓ {item.name} → {tipo}/")
-            except Exception as e:
-                error_msg = f"Error al mover {item.name}: {e}"
-                errores.append(error_msg)
-                print(f"✗ {error_msg}")
-    
-    # Resumen
+                # Si el original también se organizó, se anota su nueva ruta
+                registro.registrar_omitido(entrada.stat(), carpeta.movidos.get(original, original))
+            except OSError:
+                continue
+        # Con recursión o solo algunos nombres, la carpeta no se puede dar por organizada
+        completa = not recursivo and nombres is None and not carpeta.errores and not carpeta.omitidos
+        registro.marcar_carpetas(carpeta.raiz, tipos, completa=completa)
+        registro.guardar()
+        registro.cerrar()
+    
+    return {
+        'raices': [str(raiz) for raiz in raices],
+        'recursivo': recursivo,
+        'simulacion': simular,
+        'por_tipo': {tipo: por_tipo[tipo] for tipo in tipos if tipo in por_tipo},
+        'archivos': sum(datos['archivos'] for datos in por_tipo.values()),
+        'bytes': sum(datos['bytes'] for datos in por_tipo.values()),
+        'duplicados': numero_duplicados,
+        'modo_duplicados': duplicados,
+        'sin_cambios': sin_cambios,
+        'errores': total_errores,
+        'detalle_errores': errores,
+        'etapas': {nombre: etapa.resumen() for nombre, etapa in etapas.items()},
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def organizar_archivos(carpeta_origen=None, hilos=HILOS_POR_DEFECTO, duplicados=None,
+                       indice=None, simular=False, nombres=None, resumen=True, reglas=None):
+    """
+    Organiza los archivos del primer nivel de una carpeta en subcarpetas
+    según su tipo, mostrando una línea por archivo.
+    
+    Es organizar_carpetas con una sola carpeta y sin recursión.
+    
+    Args:
+        carpeta_origen (Path, optional): Carpeta a organizar. Si es None, usa carpeta_objetivo
+        hilos (int): Movimientos simultáneos (default: HILOS_POR_DEFECTO)
+        duplicados (str, optional): 'omitir' o 'enlazar' (ver organizar_carpetas)
+        indice (str | Path | callable, optional): Archivo SQLite con lo ya
+            organizado (ver indice_organizacion). Con él, las carpetas de tipo que no
+            cambiaron no se vuelven a listar ni a leer
+        simular (bool): Solo mostrar el plan: no se crean carpetas, no se
+            mueve nada y no se modifica el índice
+        nombres (iterable, optional): Organizar solo estos archivos del
+            primer nivel (por ejemplo, los recién llegados) sin listar la carpeta
+        resumen (bool): Mostrar el encabezado y el resumen final
+        reglas (str | Path, optional): Archivo de reglas de clasificación
+            (ver clasificacion); si no existe, solo se usa TIPOS_ARCHIVO
+        
+    Returns:
+        dict: Resumen (ver organizar_carpetas)
+    """
+    carpeta_origen = Path(carpeta_origen or carpeta_objetivo)
+    if resumen:
+        if simular:
+            print(f"Plan de organización de: {carpeta_origen} (no se modifica nada)")
+        else:
+            print(f"Organizando archivos en: {carpeta_origen}")
+        print("=" * 60)
+    resultado = organizar_carpetas([carpeta_origen], recursivo=False, hilos=hilos, simular=simular,
+                                   reglas=reglas, detalle=True, duplicados=duplicados, indice=indice,
+                                   nombres=nombres)
+    if resumen:
+        imprimir_resumen(resultado)
+    return resultado
+
+
+def _formato_bytes(cantidad):
+    for unidad in ('B', 'KB', 'MB', 'GB'):
+        if cantidad < 1024:
+            return f"{cantidad:.0f} {unidad}" if unidad == 'B' else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:.1f} TB"
+
+
+def imprimir_resumen(resumen):
+    """Muestra el resumen de organizar_carpetas"""
     print("\n" + "=" * 60)
-    print("RESUMEN DE ORGANIZACIÓN")
+    print("PLAN DE ORGANIZACIÓN" if resumen['simulacion'] else "RESUMEN DE ORGANIZACIÓN")
     print("=" * 60)
-    total_movidos = 0
-    for tipo, cantidad in archivos_movidos.items():
-        if cantidad > 0:
-            print(f"{tipo}: {cantidad} archivo(s)")
-            total_movidos += cantidad
-    
-    if total_movidos == 0:
+    for raiz in resumen['sin_cambios']:
+        print(f"Sin cambios desde la última ejecución: {raiz}")
+    for tipo, datos in resumen['por_tipo'].items():
+        print(f"{tipo}: {datos['archivos']} archivo(s), {_formato_bytes(datos['bytes'])}")
+    if resumen['archivos'] == 0:
         print("No se encontraron archivos para organizar.")
     else:
-        print(f"\nTotal: {total_movidos} archivo(s) organizado(s)")
-    
-    if errores:
-        print(f"\nErrores: {len(errores)}")
-        for error in errores:
+        accion = 'por organizar' if resumen['simulacion'] else 'organizado(s)'
+        print(f"\nTotal: {resumen['archivos']} archivo(s) {accion}, {_formato_bytes(resumen['bytes'])}"
+              f" en {len(resumen['raices'])} carpeta(s)")
+    if resumen['duplicados']:
+        accion = 'enlazados' if resumen['modo_duplicados'] == 'enlazar' else 'sin mover'
+        print(f"Duplicados: {resumen['duplicados']} ({accion})")
+    print(f"\nEtapas ({resumen['segundos']:.2f} s en total):")
+    for nombre, etapa in resumen['etapas'].items():
+        ritmo = f"{etapa['por_segundo']:,.0f}/s" if etapa['por_segundo'] else '-'
+        print(f"  {nombre:<11} {etapa['elementos']:>9} en {etapa['segundos']:.2f} s ({ritmo}), "
+              f"esperando {etapa['espera_segundos']:.2f} s")
+    if resumen['errores']:
+        print(f"\nErrores: {resumen['errores']}")
+        for error in resumen['detalle_errores']:
             print(f"  - {error}")
+        if resumen['errores'] > len(resumen['detalle_errores']):
+            print(f"  ... y {resumen['errores'] - len(resumen['detalle_errores'])} más")
+
 
+def _terminar(numero, marco):
+    raise KeyboardInterrupt
 
-def main():
+
+def vigilar_carpeta(carpeta_origen=None, espera=ESPERA_VIGILANCIA, sondeo=False, **opciones):
+    """
+    Organiza una carpeta de forma continua, a medida que llegan archivos.
+    
+    Primero organiza lo que ya hay; después espera avisos del sistema (ver
+    vigilancia) y organiza solo los archivos nuevos, agrupando los que
+    llegan seguidos. No pide confirmación y termina con Ctrl+C o SIGTERM.
+    
+    Args:
+        carpeta_origen (Path, optional): Carpeta a vigilar. Si es None, usa carpeta_objetivo
+        espera (float): Segundos sin archivos nuevos antes de organizar los recibidos
+        sondeo (bool): Sondear la carpeta en lugar de usar inotify
+        **opciones: Parámetros de organizar_archivos (hilos, duplicados, indice)
+    """
+    carpeta_origen = Path(carpeta_origen or carpeta_objetivo)
+    if not carpeta_origen.is_dir():
+        print(f"Error: La carpeta {carpeta_origen} no existe o no es una carpeta.")
+        return
+    
+    try:
+        signal.signal(signal.SIGTERM, _terminar)
+    except ValueError:
+        # Solo el hilo principal puede instalar manejadores de señales
+        pass
+    # El observador se crea antes de la primera pasada para no perder los
+    # archivos que lleguen mientras tanto
+    with crear_observador(carpeta_origen, sondeo=sondeo) as observador:
+        print(f"Vigilando {carpeta_origen} (Ctrl+C para terminar)")
+        try:
+            organizar_archivos(carpeta_origen, resumen=False, **opciones)
+            # Archivos de una pasada fallida (None: revisar la carpeta completa)
+            pendientes = set()
+            while True:
+                nombres = observador.esperar()
+                if nombres is not None and pendientes is not None:
+                    nombres |= pendientes
+                else:
+                    nombres = None
+                limite = time.monotonic() + ESPERA_MAXIMA_VIGILANCIA
+                while nombres is not None:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    nuevos = observador.esperar(timeout=min(espera, restante))
+                    if not nuevos:
+                        if nuevos is None:
+                            nombres = None
+                        break
+                    nombres |= nuevos
+                # None: se perdieron avisos y se revisa la carpeta completa
+                try:
+                    organizar_archivos(carpeta_origen, nombres=nombres, resumen=False, **opciones)
+                    pendientes = set()
+                except ValueError as e:
+                    # Por ejemplo, un archivo de reglas editado con errores: se
+                    # sigue vigilando y estos archivos se reintentan con los siguientes
+                    print(f"✗ {e}")
+                    pendientes = nombres
+        except KeyboardInterrupt:
+            print("\nVigilancia terminada.")
+
+
+def crear_parser():
+    """Argumentos de línea de comandos del organizador"""
+    parser = argparse.ArgumentParser(description='Organiza los archivos de una o varias carpetas por tipo')
+    parser.add_argument('carpetas', nargs='*', type=Path,
+                        help=f'Carpetas a organizar (default: {carpeta_objetivo})')
+    parser.add_argument('-r', '--recursivo', action='store_true',
+                        help='Organizar también los archivos de las subcarpetas')
+    parser.add_argument('--detalle', action='store_true',
+                        help='Mostrar una línea por archivo')
+    parser.add_argument('--json', type=Path, default=None,
+                        help='Guardar el resumen en este archivo JSON')
+    parser.add_argument('--hilos', type=int, default=HILOS_POR_DEFECTO,
+                        help=f'Movimientos simultáneos (default: {HILOS_POR_DEFECTO})')
+    parser.add_argument('--duplicados', choices=MODOS_DUPLICADOS,
+                        help='Detectar archivos idénticos por contenido: omitir (no moverlos) '
+                             'o enlazar (enlace duro al original y borrar la copia)')
+    parser.add_argument('--reglas', type=Path, default=None,
+                        help='Archivo JSON de reglas de clasificación '
+                             '(default: ~/.config/organizar_archivos/reglas.json, si existe)')
+    parser.add_argument('--indice', type=Path, default=None,
+                        help='Archivo del índice de lo ya organizado, con una sola carpeta '
+                             '(default: ~/.cache/organizar_archivos/<carpeta>.db, uno por carpeta)')
+    parser.add_argument('--sin-indice', action='store_true',
+                        help='No usar el índice: revisar la carpeta completa')
+    parser.add_argument('--plan', action='store_true',
+                        help='Mostrar qué se movería y adónde, sin mover nada')
+    parser.add_argument('--vigilar', action='store_true',
+                        help='No terminar: organizar los archivos a medida que llegan (sin confirmación; '
+                             'una sola carpeta, sin --recursivo)')
+    parser.add_argument('--espera', type=float, default=ESPERA_VIGILANCIA,
+                        help=f'Con --vigilar, segundos sin archivos nuevos antes de organizarlos '
+                             f'(default: {ESPERA_VIGILANCIA:g})')
+    parser.add_argument('--sondeo', action='store_true',
+                        help='Con --vigilar, sondear la carpeta en lugar de usar inotify (discos de red)')
+    parser.add_argument('-s', '--si', action='store_true',
+                        help='No pedir confirmación antes de organizar')
+    return parser
+
+
+def main(argv=None):
     """
     Función principal del script.
+    
+    Args:
+        argv (list, optional): Argumentos de línea de comandos (default: sys.argv)
     """
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    carpetas = args.carpetas or [carpeta_objetivo]
+    carpeta = carpetas[0]
+    if args.vigilar:
+        if args.plan or args.json:
+            parser.error('--plan y --json no se pueden combinar con --vigilar')
+        if args.recursivo or len(carpetas) > 1:
+            parser.error('--vigilar vigila una sola carpeta, sin --recursivo')
+    if args.indice is not None and len(carpetas) > 1:
+        parser.error('--indice solo se admite con una carpeta (con varias, cada una usa su índice por defecto)')
+    
     print("=" * 60)
     print("ORGANIZADOR DE ARCHIVOS")
     print("=" * 60)
-    print(f"\nCarpeta objetivo: {carpeta_objetivo}")
+    if len(carpetas) > 1:
+        print("\nCarpetas objetivo:")
+        for ruta in carpetas:
+            print(f"  {ruta}")
+    else:
+        print(f"\nCarpeta objetivo: {carpeta}" + (" (y subcarpetas)" if args.recursivo else ""))
+    
+    # Sin --indice, cada carpeta usa el suyo en la caché del usuario
+    indice = None if args.sin_indice else (args.indice or ruta_indice_por_defecto)
+    reglas = args.reglas or ruta_reglas_por_defecto()
+    if args.reglas is not None and not args.reglas.exists():
+        parser.error(f'No existe el archivo de reglas: {args.reglas}')
+    try:
+        # Validar las reglas antes de empezar (el clasificador queda en caché)
+        cargar_clasificador(TIPOS_ARCHIVO, reglas)
+    except ValueError as e:
+        parser.error(str(e))
     
-    # Confirmar antes de organizar
-    respuesta = input("\n¿Deseas organizar los archivos? (s/n): ").strip().lower()
+    if args.vigilar:
+        vigilar_carpeta(carpeta, espera=args.espera, sondeo=args.sondeo,
+                        hilos=args.hilos, duplicados=args.duplicados, indice=indice, reglas=reglas)
+        return
     
-    if respuesta in ['s', 'si', 'sí', 'y', 'yes']:
-        organizar_archivos()
+    # Confirmar antes de organizar (el plan no modifica nada)
+    if args.si or args.plan:
+        respuesta = 's'
     else:
+        respuesta = input("\n¿Deseas organizar los archivos? (s/n): ").strip().lower()
+    
+    if respuesta not in ['s', 'si', 'sí', 'y', 'yes']:
         print("Operación cancelada.")
+    else:
+        resumen = organizar_carpetas(carpetas, recursivo=args.recursivo, hilos=args.hilos,
+                                     simular=args.plan, reglas=reglas, detalle=args.detalle or args.plan,
+                                     duplicados=args.duplicados, indice=indice)
+        imprimir_resumen(resumen)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(resumen, f, indent=2, ensure_ascii=False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,207 @@
+"""
+Avisos de archivos nuevos en una carpeta
+
+En Linux se usa inotify (a través de ctypes, sin dependencias externas): el
+kernel avisa cuando un archivo termina de escribirse, se mueve a la
+carpeta o se crea en ella como enlace duro a otro, sin recorrerla. En otros sistemas, o si inotify no está
+disponible, se sondea la carpeta: solo se lista cuando cambia su mtime, y
+un archivo nuevo no se avisa hasta que su tamaño y mtime no cambian durante
+un sondeo completo (mientras cambian, aún se está copiando).
+
+Los dos observadores tienen la misma interfaz:
+
+    with crear_observador(carpeta) as observador:
+        while True:
+            nombres = observador.esperar(timeout=2.0)
+            # set() si no hubo avisos; None si se perdieron avisos y hay que
+            # revisar la carpeta completa
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import time
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_CABECERA_EVENTO = struct.Struct('iIII')
+TAMANO_LECTURA = 64 * 1024
+
+# Segundos entre dos sondeos de la carpeta
+INTERVALO_SONDEO = 1.0
+
+
+class ObservadorInotify:
+    """Avisos de inotify sobre el primer nivel de una carpeta"""
+
+    def __init__(self, carpeta):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            numero = ctypes.get_errno()
+            raise OSError(numero, os.strerror(numero))
+        self.carpeta = carpeta
+        # Solo archivos completos: cerrados tras escribir, movidos dentro o
+        # enlaces duros (ln no abre el archivo, así que no hay IN_CLOSE_WRITE)
+        vigilancia = libc.inotify_add_watch(self.fd, os.fsencode(carpeta),
+                                            IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        if vigilancia < 0:
+            numero = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(numero, os.strerror(numero), str(carpeta))
+
+    def esperar(self, timeout=None):
+        """
+        Espera avisos hasta `timeout` segundos (None: sin límite).
+
+        Returns:
+            set | None: Nombres de archivos nuevos, o None si la cola del
+                kernel se desbordó y hay que revisar la carpeta completa
+        """
+        listos, _, _ = select.select([self.fd], [], [], timeout)
+        if not listos:
+            return set()
+        nombres = set()
+        while True:
+            try:
+                datos = os.read(self.fd, TAMANO_LECTURA)
+            except BlockingIOError:
+                return nombres
+            posicion = 0
+            while posicion < len(datos):
+                _, mascara, _, longitud = _CABECERA_EVENTO.unpack_from(datos, posicion)
+                posicion += _CABECERA_EVENTO.size
+                nombre = datos[posicion:posicion + longitud].rstrip(b'\0')
+                posicion += longitud
+                if mascara & IN_Q_OVERFLOW:
+                    return None
+                if nombre and not mascara & IN_ISDIR:
+                    nombre = os.fsdecode(nombre)
+                    if mascara & IN_CREATE and not self._es_enlace_duro(nombre):
+                        # Un archivo recién creado se avisa al cerrarlo tras escribir
+                        continue
+                    nombres.add(nombre)
+
+    def _es_enlace_duro(self, nombre):
+        """True si la entrada creada es otro nombre de un archivo que ya existía"""
+        try:
+            estado = os.lstat(os.path.join(self.carpeta, nombre))
+        except OSError:
+            return False
+        return stat.S_ISREG(estado.st_mode) and estado.st_nlink > 1
+
+    def cerrar(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+        return False
+
+
+class ObservadorSondeo:
+    """Detecta archivos nuevos sondeando la carpeta cada `intervalo` segundos"""
+
+    def __init__(self, carpeta, intervalo=INTERVALO_SONDEO):
+        self.carpeta = carpeta
+        self.intervalo = intervalo
+        self.mtime = None
+        self.nombres = self._listar()
+        # Archivos nuevos aún sin avisar -> ((tamaño, mtime), momento en que se vio ese estado)
+        self.en_copia = {}
+
+    def _listar(self):
+        self.mtime = os.stat(self.carpeta).st_mtime_ns
+        with os.scandir(self.carpeta) as entradas:
+            return {entrada.name for entrada in entradas if entrada.is_file()}
+
+    def _estado(self, nombre):
+        """(tamaño, mtime) de un archivo de la carpeta, o None si ya no existe"""
+        try:
+            estado = os.stat(os.path.join(self.carpeta, nombre))
+        except OSError:
+            return None
+        return estado.st_size, estado.st_mtime_ns
+
+    def _sondear(self):
+        avisos = set()
+        ahora = time.monotonic()
+        # Un archivo se avisa cuando lleva al menos un intervalo de sondeo
+        # sin cambiar; si sigue creciendo, se vuelve a empezar a contar
+        for nombre, (anterior, desde) in list(self.en_copia.items()):
+            actual = self._estado(nombre)
+            if actual is None:
+                del self.en_copia[nombre]
+            elif actual != anterior:
+                self.en_copia[nombre] = (actual, ahora)
+            elif ahora - desde >= self.intervalo:
+                del self.en_copia[nombre]
+                avisos.add(nombre)
+        if os.stat(self.carpeta).st_mtime_ns != self.mtime:
+            nombres = self._listar()
+            for nombre in nombres - self.nombres:
+                actual = self._estado(nombre)
+                if actual is not None:
+                    self.en_copia[nombre] = (actual, ahora)
+            self.nombres = nombres
+        return avisos
+
+    def esperar(self, timeout=None):
+        """
+        Espera avisos hasta `timeout` segundos (None: sin límite).
+
+        Returns:
+            set: Nombres de archivos nuevos que ya no están cambiando
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            avisos = self._sondear()
+            if avisos:
+                return avisos
+            if limite is not None and time.monotonic() >= limite:
+                return set()
+            pausa = self.intervalo if limite is None else min(self.intervalo, max(0.0, limite - time.monotonic()))
+            time.sleep(pausa)
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+def crear_observador(carpeta, sondeo=False, intervalo=INTERVALO_SONDEO):
+    """
+    Observador de archivos nuevos: inotify si está disponible, sondeo si no.
+
+    Args:
+        carpeta (Path): Carpeta a vigilar (solo su primer nivel)
+        sondeo (bool): Sondear aunque haya inotify (por ejemplo, en discos
+            de red, donde inotify no ve los cambios hechos desde otra máquina)
+        intervalo (float): Segundos entre sondeos
+    """
+    if not sondeo and sys.platform.startswith('linux'):
+        try:
+            return ObservadorInotify(carpeta)
+        except (OSError, AttributeError) as e:
+            # AttributeError: libc sin inotify; OSError: límite de vigilancias, etc.
+            if isinstance(e, OSError) and e.errno == errno.ENOENT:
+                raise
+            print(f"Aviso: inotify no disponible ({e}); se sondeará la carpeta cada {intervalo:g} s")
+    return ObservadorSondeo(carpeta, intervalo)